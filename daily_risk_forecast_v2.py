@@ -1,4 +1,5 @@
 # scripts/daily_risk_forecast_v2.py
+import argparse
 import requests
 import pandas as pd
 import numpy as np
@@ -6,18 +7,33 @@ from datetime import datetime, timedelta
 import duckdb
 import folium
 from folium.plugins import HeatMap
-from math import radians, sin, cos, sqrt, atan2
 import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scripts'))
+import features
+import physics
+from utah_grid import day_id_from_date
+from weather_providers import OPEN_METEO_URL, get_provider
+
+parser = argparse.ArgumentParser(description="Daily Utah wildfire risk score forecast")
+parser.add_argument('--days', type=int, default=1,
+                    help="forecast horizon in days (Open-Meteo returns up to 16), scored in one vectorized pass")
+parser.add_argument('--weather', default='open-meteo-lattice', choices=['open-meteo-lattice', 'open-meteo'],
+                    help="per-cell lattice interpolation, or the single demo point")
+parser.add_argument('--weather-url', default=OPEN_METEO_URL,
+                    help="forecast endpoint (point at scripts/open_meteo_stub.py to run offline)")
+args = parser.parse_args()
+n_days = max(1, min(args.days, 16))
 
 print("=== DAILY UTAH WILDFIRE RISK FORECAST V2 ===")
 print(f"Date: {datetime.now().strftime('%Y-%m-%d')}")
 
 con = duckdb.connect('eco_pyric.duckdb')
 
-# Load full Utah grid + proximity
+# Load Utah grid cells + static features (one row per cell)
 df_grid = con.execute("""
-SELECT grid_lat, grid_lon, dist_to_road_km
-FROM utah_grid_ignition_labels_proximity
+SELECT cell_id, grid_lat, grid_lon, dist_to_road_km, dist_to_city_km, dust_exposure
+FROM utah_grid_cells
 """).fetchdf()
 
 print(f"Loaded {len(df_grid):,} grid cells")
@@ -35,91 +51,52 @@ df_grid = df_grid[
 
 print(f"Grid cells after Utah clip: {len(df_grid):,}")
 
-# Precompute dust exposure per grid cell (higher near lake center)
-lake_lat, lake_lon = 41.0, -112.5
-df_grid['dist_to_lake_km'] = np.sqrt(
-    (df_grid['grid_lat'] - lake_lat) ** 2 +
-    (df_grid['grid_lon'] - lake_lon) ** 2
-) * 111
-df_grid['dust_exposure'] = 1 / (df_grid['dist_to_lake_km'] + 1)
-df_grid['dust_exposure'] = df_grid['dust_exposure'].clip(upper=1.0)
+# Get the daily weather forecast per cell, as (days, cells) arrays
+df_grid = df_grid.reset_index(drop=True)  # row positions line up with the weather and risk columns
+provider = get_provider(args.weather, base_url=args.weather_url)
+forecast_dates, weather = provider.forecast(df_grid['grid_lat'].values, df_grid['grid_lon'].values, n_days)
+
+dates = pd.to_datetime(forecast_dates)
+tavg = weather['tavg'].astype(float)
+rh = weather['rh'].astype(float)
+wspd = weather['wspd'].astype(float)
+prcp = weather['prcp'].astype(float)
+n_days = len(dates)
+
+print(f"Forecast ({provider.name}, state mean / min-max):")
+for d in range(n_days):
+    print(
+        f"  {dates[d].date()}: "
+        f"Tavg {tavg[d].mean():.1f}°C ({tavg[d].min():.1f}–{tavg[d].max():.1f}), "
+        f"RH {rh[d].mean():.0f}%, Wind {wspd[d].mean():.1f} km/h, Precip {prcp[d].mean():.1f} mm"
+    )
+
+# Scores for every (day, cell) at once: weather is (days, cells),
+# static cell features broadcast as a (1, cells) row
+row = lambda name: df_grid[name].values[None, :]
+
+# Dryness proxies (shared with training, scripts/features.py)
+vpd_proxy = features.vpd_proxy(tavg, rh)
+low_precip_dryness = features.low_precip_dryness(prcp)
+
+# Risk score: mean of dryness, precip, wind, dust and human-proximity factors (scripts/physics.py)
+risk = physics.risk_score(vpd_proxy, prcp, wspd, row('dust_exposure'), row('dist_to_road_km'),
+                          row('dist_to_city_km'), low_precip_dryness)
+
+# Day 0 keeps the existing per-cell columns for the table and markers
+df_grid['month'] = features.month(day_id_from_date(dates[0].date()))
+df_grid['vpd_proxy'] = vpd_proxy[0]
+df_grid['low_precip_dryness'] = low_precip_dryness[0]
+df_grid['risk_score'] = risk[0]
 
-# NEW: Major Utah cities for human proximity [web:7][web:10]
-cities = [
-    ('Salt Lake City', 40.76, -111.89),
-    ('West Valley City', 40.69, -112.00),
-    ('Provo', 40.23, -111.66),
-    ('West Jordan', 40.61, -111.94),
-    ('Orem', 40.30, -111.70),
-    ('Sandy', 40.59, -111.88),
-    ('St. George', 37.10, -113.58),
-    ('Ogden', 41.22, -111.97),
-    ('Layton', 41.06, -111.97),
-    ('Lehi', 40.39, -111.85),
-    ('Logan', 41.74, -111.83),
-    ('South Jordan', 40.56, -111.93)
-]
-
-def haversine(lat1, lon1, lat2, lon2):
-    R = 6371  # Earth km
-    dlat, dlon = radians(lat2-lat1), radians(lon2-lon1)
-    a = sin(dlat/2)**2 + cos(radians(lat1)) * cos(radians(lat2)) * sin(dlon/2)**2
-    c = 2 * atan2(sqrt(a), sqrt(1-a))
-    return R * c
-
-# NEW: Nearest city distance per grid cell
-df_grid['dist_to_city_km'] = df_grid.apply(
-    lambda row: min(haversine(row['grid_lat'], row['grid_lon'], city_lat, city_lon) 
-                    for _, city_lat, city_lon in cities), axis=1
-)
-
-# Get today's weather forecast
-url = (
-    "https://api.open-meteo.com/v1/forecast?"
-    "latitude=40.5&longitude=-111.9&"
-    "daily=temperature_2m_mean,relative_humidity_2m_mean,"
-    "wind_speed_10m_max,precipitation_sum&timezone=auto"
-)
-r = requests.get(url)
-data = r.json()['daily']
-
-tavg = data['temperature_2m_mean'][0]
-rh = data['relative_humidity_2m_mean'][0]
-wspd = data['wind_speed_10m_max'][0]
-prcp = data['precipitation_sum'][0]
-
-print(
-    f"Today's forecast (Saratoga Springs area): "
-    f"Tavg {tavg}°C, RH {rh}%, Wind {wspd} km/h, Precip {prcp} mm"
-)
-
-# Month for seasonal factor
-df_grid['month'] = datetime.now().month
-
-# Dryness proxies
-df_grid['vpd_proxy'] = (
-    0.6108 * np.exp(17.27 * tavg / (tavg + 237.3)) * (1 - rh / 100)
+os.makedirs("plots", exist_ok=True)
+np.savez(
+    'plots/utah_risk_score_days.npz',
+    risk_score=risk.astype(np.float32),
+    dates=np.array(dates.strftime('%Y-%m-%d'), dtype='U10'),
+    cell_id=df_grid['cell_id'].values
 )
-df_grid['vpd_proxy'] = df_grid['vpd_proxy'].clip(lower=0)
-
-df_grid['dryness_proxy'] = (tavg - (tavg - 10)) / 10
-df_grid['low_precip_dryness'] = np.where(prcp < 1, 1.0, 0.5)
-
-# Risk score components (UPDATED human_factor)
-df_grid['dryness'] = df_grid['vpd_proxy'] / df_grid['vpd_proxy'].max()
-df_grid['precip_factor'] = np.maximum(0, 1 - prcp / 5)
-df_grid['wind_factor'] = np.minimum(wspd / 20, 1.0)
-df_grid['dust_factor'] = df_grid['dust_exposure'] * 2.0
-df_grid['human_factor'] = np.maximum(0, 1 - (df_grid['dist_to_road_km'] + df_grid['dist_to_city_km']) / 20)
-
-df_grid['risk_score'] = (
-    df_grid['dryness'] +
-    df_grid['precip_factor'] +
-    df_grid['wind_factor'] +
-    df_grid['dust_factor'] +
-    df_grid['human_factor'] +
-    df_grid['low_precip_dryness']
-) / 6
+print(f"Saved (day, cell) risk array {risk.shape}: plots/utah_risk_score_days.npz")
 
 print("\nTop 10 highest risk grid cells today:")
 print(
@@ -129,6 +106,11 @@ print(
     ].head(10)
 )
 
+if n_days > 1:
+    print("\nOutlook (mean / max risk score, cells >0.5):")
+    for d in range(n_days):
+        print(f"  {dates[d].date()}: {np.nanmean(risk[d]):.3f} / {np.nanmax(risk[d]):.3f}, {(risk[d] > 0.5).sum():,}")
+
 # Clean NaNs before mapping
 df_grid = df_grid.dropna(subset=['grid_lat', 'grid_lon', 'risk_score'])
 print(f"\nTotal grid cells (after dropna): {len(df_grid):,}")
@@ -186,21 +168,34 @@ m.get_root().html.add_child(folium.Element("""
 </style>
 """))
 
-# Prediction Risk Heatmap (blue-green gradient)
-heat_data = df_grid[['grid_lat', 'grid_lon', 'risk_score']].values.tolist()
-print("Sample heat_data rows:", heat_data[:5])
+# Prediction Risk Heatmap (blue-green gradient), one layer per forecast day
+valid = df_grid.index.values
+lat, lon = df_grid['grid_lat'].values, df_grid['grid_lon'].values
+heat_counts = []
+for d in range(n_days):
+    day_risk = risk[d][valid]
+    ok = ~np.isnan(day_risk)
+    heat_data = np.column_stack([lat[ok], lon[ok], day_risk[ok]]).tolist()
+    heat_counts.append(len(heat_data))
+    if d == 0:
+        print("Sample heat_data rows:", heat_data[:5])
+
+    if len(heat_data) > 0:
+        layer = folium.FeatureGroup(name=str(dates[d].date()), overlay=False, show=(d == 0))
+        HeatMap(
+            heat_data,
+            radius=8,
+            blur=15,
+            gradient={0.2: 'blue', 0.4: 'green', 0.6: 'yellow', 0.8: 'orange', 1.0: 'red'},
+            min_opacity=0.3,
+            max_zoom=13
+        ).add_to(layer)
+        layer.add_to(m)
+    else:
+        print(f"WARNING: No heatmap data for {dates[d].date()}; skipping heatmap layer.")
 
-if len(heat_data) > 0:
-    HeatMap(
-        heat_data,
-        radius=8,
-        blur=15,
-        gradient={0.2: 'blue', 0.4: 'green', 0.6: 'yellow', 0.8: 'orange', 1.0: 'red'},
-        min_opacity=0.3,
-        max_zoom=13
-    ).add_to(m)
-else:
-    print("WARNING: No heatmap data; skipping heatmap layer.")
+if n_days > 1:
+    folium.LayerControl(collapsed=False).add_to(m)
 
 # Add high-risk prediction markers (orange circles) - UPDATED POPUP
 MAX_PREDICTION_MARKERS = 500
@@ -262,4 +257,4 @@ os.makedirs("plots", exist_ok=True)
 html_path = os.path.abspath("plots/utah_daily_risk_map_v2.html")
 m.save(html_path)
 print(f"Interactive map saved: {html_path}")
-print(f"Map includes: {len(heat_data):,} prediction cells, {len(high_risk_sampled):,} risk markers, {len(current_fires):,} current fires")
+print(f"Map includes: {heat_counts[0]:,} prediction cells x {n_days} day(s), {len(high_risk_sampled):,} risk markers, {len(current_fires):,} current fires")
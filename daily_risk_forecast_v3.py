@@ -1,5 +1,5 @@
 # scripts/daily_risk_forecast_v3.py — ML-based version
-import requests
+import argparse
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
@@ -8,6 +8,24 @@ import folium
 from folium.plugins import HeatMap
 from joblib import load
 import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scripts'))
+from features import FEATURES, compute
+from shap_engine import CellExplainer
+from utah_grid import day_id_from_date
+from weather_providers import OPEN_METEO_URL, get_provider
+
+parser = argparse.ArgumentParser(description="Daily Utah ignition risk forecast from the trained classifier")
+parser.add_argument('--days', type=int, default=1,
+                    help="forecast horizon in days (Open-Meteo returns up to 16), scored in one predict call")
+parser.add_argument('--weather', default='open-meteo-lattice', choices=['open-meteo-lattice', 'open-meteo'],
+                    help="per-cell lattice interpolation, or the single demo point")
+parser.add_argument('--weather-url', default=OPEN_METEO_URL,
+                    help="forecast endpoint (point at scripts/open_meteo_stub.py to run offline)")
+parser.add_argument('--popups', type=int, default=200,
+                    help="high-risk cells (>0.5) today that get a marker with their top SHAP drivers")
+args = parser.parse_args()
+n_days = max(1, min(args.days, 16))
 
 print("=== DAILY UTAH WILDFIRE RISK FORECAST V3 (ML CLASSIFIER) ===")
 print(f"Date: {datetime.now().strftime('%Y-%m-%d')}")
@@ -23,78 +41,74 @@ except FileNotFoundError:
 
 con = duckdb.connect('eco_pyric.duckdb')
 
-# Load full Utah grid + proximity
+# Load Utah grid cells + static features (one row per cell)
 df_grid = con.execute("""
-SELECT grid_lat, grid_lon, dist_to_road_km
-FROM utah_grid_ignition_labels_proximity
+SELECT cell_id, grid_lat, grid_lon, dist_to_road_km, dust_exposure
+FROM utah_grid_cells
 """).fetchdf()
 
 print(f"Loaded {len(df_grid):,} grid cells")
 
-# Precompute dust exposure per grid cell
-lake_lat, lake_lon = 41.0, -112.5
-df_grid['dist_to_lake_km'] = np.sqrt(
-    (df_grid['grid_lat'] - lake_lat)**2 + 
-    (df_grid['grid_lon'] + lake_lon)**2
-) * 111
-df_grid['dust_exposure'] = 1 / (df_grid['dist_to_lake_km'] + 1)
-df_grid['dust_exposure'] = df_grid['dust_exposure'].clip(upper=1.0)
-
-# Get today's weather forecast (demo point - expand to per-cell later)
-url = (
-    "https://api.open-meteo.com/v1/forecast?"
-    "latitude=40.5&longitude=-111.9&"
-    "daily=temperature_2m_mean,relative_humidity_2m_mean,"
-    "wind_speed_10m_max,precipitation_sum&timezone=auto"
-)
-r = requests.get(url)
-data = r.json()['daily']
-
-tavg = data['temperature_2m_mean'][0]
-rh = data['relative_humidity_2m_mean'][0]
-wspd = data['wind_speed_10m_max'][0]
-prcp = data['precipitation_sum'][0]
-
-print(
-    f"Today's forecast (Saratoga Springs area): "
-    f"Tavg {tavg}°C, RH {rh}%, Wind {wspd} km/h, Precip {prcp} mm"
-)
+# Get the daily weather forecast per cell, as (days, cells) arrays
+provider = get_provider(args.weather, base_url=args.weather_url)
+forecast_dates, weather = provider.forecast(df_grid['grid_lat'].values, df_grid['grid_lon'].values, n_days)
+
+dates = pd.to_datetime(forecast_dates)
+tavg = weather['tavg'].astype(float)
+rh = weather['rh'].astype(float)
+wspd = weather['wspd'].astype(float)
+prcp = weather['prcp'].astype(float)
+n_days = len(dates)
+
+print(f"Forecast ({provider.name}, state mean / min-max):")
+for d in range(n_days):
+    print(
+        f"  {dates[d].date()}: "
+        f"Tavg {tavg[d].mean():.1f}°C ({tavg[d].min():.1f}–{tavg[d].max():.1f}), "
+        f"RH {rh[d].mean():.0f}%, Wind {wspd[d].mean():.1f} km/h, Precip {prcp[d].mean():.1f} mm"
+    )
+
+# Features must match exactly what was used in training: the shared registry (scripts/features.py)
+# computes one (days, cells, features) block, static cell columns broadcast across days,
+# day_id as a (days, 1) column, per-cell weather as (days, cells)
+n_cells = len(df_grid)
+block = compute(FEATURES, {
+    'cell_id': df_grid['cell_id'].values,
+    'day_id': day_id_from_date(dates.values.astype('datetime64[D]'))[:, None],
+    'dist_to_road_km': df_grid['dist_to_road_km'].values,
+    'grid_lat': df_grid['grid_lat'].values,
+    'grid_lon': df_grid['grid_lon'].values,
+    'tavg': tavg, 'rh': rh, 'prcp': prcp
+})
+
+# Predict probability for every (day, cell) in a single call
+print(f"Predicting ignition probabilities for {n_days} day(s) x {n_cells:,} cells with trained model...")
+X = pd.DataFrame(block.reshape(-1, len(FEATURES)), columns=FEATURES)
+prob = model.predict_proba(X)[:, 1].astype(np.float32).reshape(n_days, n_cells)
+df_grid['predicted_prob'] = prob[0]
 
-# Month for seasonal factor
-df_grid['month'] = datetime.now().month
-
-# Dryness proxies
-df_grid['vpd_proxy'] = (
-    0.6108 * np.exp(17.27 * tavg / (tavg + 237.3)) * (1 - rh / 100)
+os.makedirs("plots", exist_ok=True)
+np.savez(
+    'plots/utah_risk_forecast_days.npz',
+    prob=prob,
+    dates=np.array(dates.strftime('%Y-%m-%d'), dtype='U10'),
+    cell_id=df_grid['cell_id'].values
 )
-df_grid['vpd_proxy'] = df_grid['vpd_proxy'].clip(lower=0)
-
-df_grid['dryness_proxy'] = (tavg - (tavg - 10)) / 10
-df_grid['low_precip_dryness'] = np.where(prcp < 1, 1.0, 0.5)
-
-# Features must match exactly what was used in training
-features = [
-    'dist_to_road_km',
-    'month',
-    'vpd_proxy',
-    'dryness_proxy',
-    'low_precip_dryness',
-    'grid_lat',
-    'grid_lon'
-]
-
-# Predict probability using the trained classifier
-print("Predicting ignition probabilities with trained model...")
-df_grid['predicted_prob'] = model.predict_proba(df_grid[features])[:, 1]
+print(f"Saved (day, cell) probability array {prob.shape}: plots/utah_risk_forecast_days.npz")
 
 print("\nTop 10 highest ML-predicted risk grid cells today:")
 print(df_grid.sort_values('predicted_prob', ascending=False)[
     ['grid_lat', 'grid_lon', 'predicted_prob', 'dust_exposure', 'dist_to_road_km']
 ].head(10))
 
+if n_days > 1:
+    print("\nOutlook (mean / max probability, cells >0.5):")
+    for d in range(n_days):
+        print(f"  {dates[d].date()}: {prob[d].mean():.3f} / {prob[d].max():.3f}, {(prob[d] > 0.5).sum():,}")
+
 # Clean NaNs before mapping
-df_grid = df_grid.dropna(subset=['grid_lat', 'grid_lon', 'predicted_prob'])
-print(f"\nTotal grid cells (after dropna): {len(df_grid):,}")
+valid = df_grid[['grid_lat', 'grid_lon']].notna().all(axis=1).values
+print(f"\nTotal grid cells (after dropna): {valid.sum():,}")
 
 # High-risk subset for markers
 high_risk = df_grid[df_grid['predicted_prob'] > 0.5]
@@ -107,16 +121,41 @@ m = folium.Map(
     tiles='CartoDB positron'
 )
 
-# Heatmap for ML-predicted probability
-heat_data = [[row['grid_lat'], row['grid_lon'], row['predicted_prob']] for _, row in df_grid.iterrows()]
-HeatMap(
-    heat_data,
-    radius=8,
-    blur=15,
-    gradient={0.2: 'blue', 0.5: 'yellow', 0.8: 'orange', 1.0: 'red'},
-    min_opacity=0.3,
-    max_zoom=13
-).add_to(m)
+# Heatmap for ML-predicted probability, one layer per forecast day
+lat, lon = df_grid['grid_lat'].values[valid], df_grid['grid_lon'].values[valid]
+for d in range(n_days):
+    day_prob = prob[d][valid]
+    ok = ~np.isnan(day_prob)
+    heat_data = np.column_stack([lat[ok], lon[ok], day_prob[ok]]).tolist()
+    layer = folium.FeatureGroup(name=str(dates[d].date()), overlay=False, show=(d == 0))
+    HeatMap(
+        heat_data,
+        radius=8,
+        blur=15,
+        gradient={0.2: 'blue', 0.5: 'yellow', 0.8: 'orange', 1.0: 'red'},
+        min_opacity=0.3,
+        max_zoom=13
+    ).add_to(layer)
+    layer.add_to(m)
+
+# Markers on today's highest-risk cells: what pushed each prediction up (scripts/shap_engine.py)
+popup_idx = np.flatnonzero(prob[0] > 0.5)
+popup_idx = popup_idx[np.argsort(-prob[0][popup_idx], kind='stable')][:args.popups]
+if len(popup_idx):
+    explainer = CellExplainer(model, 'risk_classifier_model.joblib')
+    markers = folium.FeatureGroup(name="High-risk drivers", overlay=True)
+    for i, drivers in zip(popup_idx, explainer.top_drivers(X.iloc[popup_idx], k=3)):
+        lines = ''.join(f"<br>{d['feature']} = {d['value']:.2f} ({d['shap']:+.2f})" for d in drivers)
+        folium.CircleMarker(
+            location=[df_grid['grid_lat'].iloc[i], df_grid['grid_lon'].iloc[i]],
+            radius=4, color='red', fill=True, fill_opacity=0.8,
+            popup=folium.Popup(f"<b>Risk {prob[0][i]:.2f}</b> (log-odds contributions){lines}", max_width=300)
+        ).add_to(markers)
+    markers.add_to(m)
+    print(f"Explained {len(popup_idx):,} high-risk cells for map popups")
+
+if n_days > 1 or len(popup_idx):
+    folium.LayerControl(collapsed=False).add_to(m)
 
 # Add legend
 legend_html = '''
@@ -8,9 +8,22 @@ from streamlit_folium import st_folium
 from datetime import datetime
 import duckdb
 from joblib import load
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts'))
+from features import FEATURES, compute
+from utah_grid import day_id_from_date
+from shap_engine import CellExplainer
 
 st.set_page_config(page_title="Utah Wildfire Risk Dashboard", layout="wide")
 
+
+@st.cache_resource
+def cell_explainer(model_path):
+    # One TreeExplainer per session, reused from the model's SHAP store when it has one
+    return CellExplainer(load(model_path), model_path)
+
+
 st.title("Utah Daily Wildfire Ignition Risk Dashboard")
 st.markdown("Predicts probability of new fire ignition per grid cell using trained XGBoost classifier")
 
@@ -26,7 +39,7 @@ zoom_level = st.sidebar.slider("Map zoom level", 6, 10, 7)
 region = st.sidebar.selectbox(
     "Select Utah Region to View",
     [
-        "Full State (slowest – up to 13.5M cells)",
+        "Full State (all 2,601 cells)",
         "Great Salt Lake & Northern Utah (lat 40–42)",
         "Wasatch Front & Central Utah (lat 39–41)",
         "Southern Utah (lat 37–39)",
@@ -48,7 +61,7 @@ if region == "Custom (use sliders below)":
     custom_lon_max = st.sidebar.slider("Max Longitude", -114.0, -109.0, -109.0, 0.1)
 
 # Map region to lat/lon bounds
-if region == "Full State (slowest – up to 13.5M cells)":
+if region == "Full State (all 2,601 cells)":
     lat_min, lat_max = 37.0, 42.0
     lon_min, lon_max = -114.0, -109.0
 elif region == "Great Salt Lake & Northern Utah (lat 40–42)":
@@ -79,8 +92,8 @@ st.sidebar.write(f"Precip: {prcp} mm")
 # Load grid data for the selected region
 con = duckdb.connect('eco_pyric.duckdb')
 query = f"""
-SELECT grid_lat, grid_lon, dist_to_road_km
-FROM utah_grid_ignition_labels_proximity
+SELECT cell_id, grid_lat, grid_lon, dist_to_road_km
+FROM utah_grid_cells
 WHERE grid_lat BETWEEN {lat_min} AND {lat_max}
   AND grid_lon BETWEEN {lon_min} AND {lon_max}
 """
@@ -88,20 +101,19 @@ df_grid = con.execute(query).fetchdf()
 
 st.sidebar.write(f"Loaded {len(df_grid):,} grid cells for selected region")
 
-# Compute features
-df_grid['month'] = selected_date.month
-df_grid['vpd_proxy'] = 0.6108 * np.exp(17.27 * tavg / (tavg + 237.3)) * (1 - rh / 100)
-df_grid['vpd_proxy'] = df_grid['vpd_proxy'].clip(lower=0)
-df_grid['dryness_proxy'] = (tavg - (tavg - 10)) / 10
-df_grid['low_precip_dryness'] = 1.0 if prcp < 1 else 0.5
+# Compute features (shared registry, scripts/features.py; demo weather broadcasts over the cells)
+X = compute(FEATURES, {'cell_id': df_grid['cell_id'].values, 'day_id': day_id_from_date(selected_date),
+                       'dist_to_road_km': df_grid['dist_to_road_km'].values,
+                       'grid_lat': df_grid['grid_lat'].values, 'grid_lon': df_grid['grid_lon'].values,
+                       'tavg': tavg, 'rh': rh, 'prcp': prcp})
 
 # Load real model predictions if available
 try:
     model = load('risk_classifier_model.joblib')
-    features = ['dist_to_road_km', 'month', 'vpd_proxy', 'dryness_proxy', 'low_precip_dryness', 'grid_lat', 'grid_lon']
-    df_grid['predicted_prob'] = model.predict_proba(df_grid[features])[:, 1]
+    df_grid['predicted_prob'] = model.predict_proba(pd.DataFrame(X, columns=FEATURES))[:, 1]
     st.sidebar.success("Using real ML classifier predictions")
 except FileNotFoundError:
+    model = None
     df_grid['predicted_prob'] = np.random.uniform(0.05, 0.35, len(df_grid))
     st.sidebar.warning("Model file not found — using random demo values")
 
@@ -113,6 +125,19 @@ st.dataframe(
     use_container_width=True
 )
 
+# Per-cell explanation: SHAP contributions behind one of the top cells
+if model is not None and len(top_risk):
+    st.subheader("Why is this cell high risk?")
+    cell = st.selectbox(
+        "Grid cell", top_risk.index,
+        format_func=lambda i: f"{df_grid.at[i, 'grid_lat']:.1f}, {df_grid.at[i, 'grid_lon']:.1f} "
+                              f"(p = {df_grid.at[i, 'predicted_prob']:.3f})"
+    )
+    contrib = cell_explainer('risk_classifier_model.joblib').contributions(
+        pd.DataFrame(X[[df_grid.index.get_loc(cell)]], columns=FEATURES))[0]
+    st.bar_chart(pd.Series(contrib, index=FEATURES, name='SHAP (log-odds)'))
+    st.caption("Positive bars push the ignition probability up, negative bars pull it down.")
+
 # Interactive map
 st.subheader("Predicted Risk Map")
 m = folium.Map(location=[(lat_min + lat_max)/2, (lon_min + lon_max)/2], zoom_start=zoom_level, tiles='CartoDB positron')
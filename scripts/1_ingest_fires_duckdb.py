@@ -1,21 +1,34 @@
+import argparse
 import duckdb
 import os
+import time
 from datetime import datetime
 
-print("=== STEP 1: FRESH INGESTION WITH DUCKDB ===")
-print(f"Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+from firms_parquet import (CONFIDENCE_EXCLUDE, MAX_LAT, MAX_LON, MIN_LAT, MIN_LON, PARQUET_DIR, WORKERS,
+                           create_view, drop_view, ingest, parquet_files)
 
-db_file = "eco_pyric.duckdb"
-target_files = [
+parser = argparse.ArgumentParser(description="Ingest FIRMS CSVs into DuckDB")
+parser.add_argument('--mode', choices=['table', 'parquet'], default='table',
+                    help="table = VARCHAR-dated fire_events table (original), "
+                         "parquet = typed year/month Parquet dataset behind a fire_events view")
+parser.add_argument('--db', default='eco_pyric.duckdb')
+parser.add_argument('--files', nargs='+', default=[
     'data/firms/fire_archive_SV-C2_708466.csv',
     'data/firms/fire_nrt_SV-C2_708466.csv'
-]
+])
+parser.add_argument('--out', default=PARQUET_DIR, help="Parquet dataset directory (parquet mode)")
+parser.add_argument('--workers', type=int, default=WORKERS, help="CSVs loaded in parallel (parquet mode)")
+parser.add_argument('--force', action='store_true', help="reload CSVs even if the manifest says unchanged")
+args = parser.parse_args()
+
+print("=== STEP 1: FRESH INGESTION WITH DUCKDB ===")
+print(f"Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
 
-MIN_LAT, MAX_LAT = 31.0, 49.0
-MIN_LON, MAX_LON = -125.0, -102.0
-CONFIDENCE_EXCLUDE = 'l'
+db_file = args.db
+target_files = args.files
 
 print(f"Database: {db_file}")
+print(f"Mode: {args.mode}")
 print(f"Files: {len(target_files)}")
 print(f"Bounding box: Lat {MIN_LAT}–{MAX_LAT}, Lon {MIN_LON}–{MAX_LON}")
 print(f"Excluding confidence = '{CONFIDENCE_EXCLUDE}'")
@@ -23,51 +36,74 @@ print("=" * 50 + "\n")
 
 con = duckdb.connect(db_file)
 
-# Drop any old table (clean start)
-con.execute("DROP TABLE IF EXISTS fire_events")
-
-# Create table
-con.execute('''
-CREATE TABLE fire_events (
-    source_file VARCHAR,
-    latitude DOUBLE,
-    longitude DOUBLE,
-    acq_date VARCHAR,
-    brightness DOUBLE,
-    frp DOUBLE,
-    confidence VARCHAR
-)
-''')
-
-total_rows = 0
-
-for csv_file in target_files:
-    if not os.path.exists(csv_file):
-        print(f"[SKIP] File not found: {csv_file}")
-        continue
-    
-    file_name = os.path.basename(csv_file)
-    print(f"Processing {file_name}...")
-
-    con.execute(f"""
-    INSERT INTO fire_events
-    SELECT
-        '{file_name}' AS source_file,
-        latitude,
-        longitude,
-        acq_date,
-        brightness,
-        frp,
-        confidence
-    FROM read_csv_auto('{csv_file}')
-    WHERE latitude BETWEEN {MIN_LAT} AND {MAX_LAT}
-      AND longitude BETWEEN {MIN_LON} AND {MAX_LON}
-      AND confidence != '{CONFIDENCE_EXCLUDE}'
-    """)
-
-    rows_added = con.execute(f"SELECT COUNT(*) FROM fire_events WHERE source_file = '{file_name}'").fetchone()[0]
-    total_rows += rows_added
-    print(f"  Added {rows_added:,} rows")
+
+def ingest_parquet(con):
+    start = time.time()
+    results = ingest(target_files, args.out, args.workers, args.force)
+    for csv_file, (status, rows) in results.items():
+        if status == 'missing':
+            print(f"[SKIP] File not found: {csv_file}")
+        else:
+            print(f"{os.path.basename(csv_file)}: {status}, {rows:,} rows")
+    # Downstream scripts keep reading fire_events; the view pushes their filters into the Parquet scan
+    create_view(con, 'fire_events', args.out)
+    print(f"Parquet dataset: {len(parquet_files(args.out)):,} files in {args.out}/ "
+          f"({time.time() - start:.1f} seconds), fire_events is now a view over it")
+    return con.execute("SELECT COUNT(*) FROM fire_events").fetchone()[0]
+
+
+def ingest_table(con):
+    # Drop any old table (clean start)
+    drop_view(con, 'fire_events')
+    con.execute("DROP TABLE IF EXISTS fire_events")
+
+    # Create table
+    con.execute('''
+    CREATE TABLE fire_events (
+        source_file VARCHAR,
+        latitude DOUBLE,
+        longitude DOUBLE,
+        acq_date VARCHAR,
+        acq_time SMALLINT,
+        brightness DOUBLE,
+        frp DOUBLE,
+        confidence VARCHAR
+    )
+    ''')
+
+    total_rows = 0
+
+    for csv_file in target_files:
+        if not os.path.exists(csv_file):
+            print(f"[SKIP] File not found: {csv_file}")
+            continue
+
+        file_name = os.path.basename(csv_file)
+        print(f"Processing {file_name}...")
+
+        rows_added = con.execute(f"""
+        INSERT INTO fire_events
+        SELECT
+            '{file_name}' AS source_file,
+            latitude,
+            longitude,
+            acq_date,
+            acq_time,
+            brightness,
+            frp,
+            confidence
+        FROM read_csv_auto('{csv_file}')
+        WHERE latitude BETWEEN {MIN_LAT} AND {MAX_LAT}
+          AND longitude BETWEEN {MIN_LON} AND {MAX_LON}
+          AND confidence != '{CONFIDENCE_EXCLUDE}'
+        """).fetchone()[0]
+
+        total_rows += rows_added
+        print(f"  Added {rows_added:,} rows")
+    return total_rows
+
+
+total_rows = ingest_parquet(con) if args.mode == 'parquet' else ingest_table(con)
 
 print("\n" + "="*50)
 print("INGESTION COMPLETE")
@@ -0,0 +1,51 @@
+# scripts/add_cell_elevation.py
+# Per-cell elevation (m) for the weather cube's lapse-rate adjustment, from the
+# Open-Meteo elevation API (90 m DEM), 100 coordinates per request.
+import argparse
+from datetime import datetime
+
+import duckdb
+import numpy as np
+import pandas as pd
+import requests
+
+from utah_grid import all_cell_ids, cell_latlon
+
+ELEVATION_URL = "https://api.open-meteo.com/v1/elevation"
+CHUNK = 100  # API limit per request
+
+parser = argparse.ArgumentParser(description="Add utah_grid_cell_elevation")
+parser.add_argument('--db', default='eco_pyric.duckdb')
+parser.add_argument('--url', default=ELEVATION_URL)
+args = parser.parse_args()
+
+print("=== ADDING GRID CELL ELEVATION ===")
+print(f"Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+
+cell_ids = all_cell_ids()
+lats, lons = cell_latlon(cell_ids)
+
+elevation = []
+for start in range(0, len(cell_ids), CHUNK):
+    r = requests.get(args.url, params={
+        'latitude': ','.join(f"{v:g}" for v in lats[start:start + CHUNK]),
+        'longitude': ','.join(f"{v:g}" for v in lons[start:start + CHUNK])
+    }, timeout=30)
+    r.raise_for_status()
+    elevation.extend(r.json()['elevation'])
+
+df = pd.DataFrame({'cell_id': cell_ids, 'elevation_m': np.asarray(elevation, dtype=np.float32)})
+print(f"Fetched {len(df):,} elevations in {-(-len(cell_ids) // CHUNK)} requests "
+      f"({df['elevation_m'].min():.0f}–{df['elevation_m'].max():.0f} m)")
+
+con = duckdb.connect(args.db)
+con.register('elev_df', df)
+con.execute("""
+CREATE OR REPLACE TABLE utah_grid_cell_elevation AS
+SELECT CAST(cell_id AS SMALLINT) AS cell_id, elevation_m
+FROM elev_df
+ORDER BY cell_id
+""")
+con.close()
+print("Saved table 'utah_grid_cell_elevation'")
+print("Done.")
@@ -3,17 +3,21 @@ import pandas as pd
 import numpy as np
 from scipy.spatial.distance import cdist  # FIXED: Import cdist
 
-print("=== ADDING PROXIMITY TO PEOPLE (ROADS) TO UTAH GRID ===")
+import features
+import physics
+from utah_grid import all_cell_ids, cell_latlon
+
+print("=== BUILDING STATIC PER-CELL FEATURES (ROADS, CITIES, DUST) FOR UTAH GRID ===")
 
 con = duckdb.connect('eco_pyric.duckdb')
 
-# Load grid labels (from your previous script)
-df_grid = con.execute("""
-SELECT grid_lat, grid_lon, date, ignition
-FROM utah_grid_ignition_labels
-""").fetchdf()
+# Static features only depend on the cell, so they are computed once per cell
+# (2,601 rows) into 'utah_grid_cells' instead of once per grid-date row
+cell_ids = all_cell_ids()
+grid_lat, grid_lon = cell_latlon(cell_ids)
+df_cells = pd.DataFrame({'cell_id': cell_ids, 'grid_lat': grid_lat, 'grid_lon': grid_lon})
 
-print(f"Loaded {len(df_grid):,} grid-date rows")
+print(f"Building features for {len(df_cells):,} grid cells")
 
 # Example major roads in Utah (lat/lon points along highways — add more for accuracy)
 # You can expand this with real road coordinates from OpenStreetMap or manual lookup
@@ -26,21 +30,74 @@ major_roads = [
     # Add 10–20 more points along I-15, I-80, I-70, US-89, etc.
 ]
 
-road_coords = np.array(major_roads)
+# Major Utah cities for human proximity [web:7][web:10]
+cities = [
+    ('Salt Lake City', 40.76, -111.89),
+    ('West Valley City', 40.69, -112.00),
+    ('Provo', 40.23, -111.66),
+    ('West Jordan', 40.61, -111.94),
+    ('Orem', 40.30, -111.70),
+    ('Sandy', 40.59, -111.88),
+    ('St. George', 37.10, -113.58),
+    ('Ogden', 41.22, -111.97),
+    ('Layton', 41.06, -111.97),
+    ('Lehi', 40.39, -111.85),
+    ('Logan', 41.74, -111.83),
+    ('South Jordan', 40.56, -111.93)
+]
 
-# Calculate distance to nearest road for each grid cell
+grid_coords = df_cells[['grid_lat', 'grid_lon']].values
+
+# Distance to nearest road
 print("Calculating distance to nearest road...")
-grid_coords = df_grid[['grid_lat', 'grid_lon']].values
+road_coords = np.array(major_roads)
 distances = cdist(grid_coords, road_coords, metric='euclidean') * 111  # approx km conversion
-df_grid['dist_to_road_km'] = distances.min(axis=1)
+df_cells['dist_to_road_km'] = distances.min(axis=1)
+
+# Distance to nearest city (haversine, km; scripts/physics.py)
+print("Calculating distance to nearest city...")
+city_coords = np.array([(lat, lon) for _, lat, lon in cities])
+df_cells['dist_to_city_km'] = physics.nearest_km(grid_lat, grid_lon, city_coords[:, 0], city_coords[:, 1])
+
+# Great Salt Lake dust exposure (inverse distance to lake center, scripts/features.py)
+print("Calculating dust exposure...")
+df_cells['dist_to_lake_km'] = features.dist_to_lake_km(grid_lat, grid_lon)
+df_cells['dust_exposure'] = features.dust_exposure(df_cells['dist_to_lake_km'].values)
+
+print("Added 'dist_to_road_km', 'dist_to_city_km', 'dist_to_lake_km', 'dust_exposure'")
+print(df_cells.head(10))
+
+# Save the per-cell dimension table (add future static attributes as new columns here)
+con.register('grid_cells', df_cells)
+con.execute("""
+CREATE OR REPLACE TABLE utah_grid_cells AS
+SELECT CAST(cell_id AS SMALLINT) AS cell_id,
+       grid_lat,
+       grid_lon,
+       CAST(dist_to_road_km AS FLOAT) AS dist_to_road_km,
+       CAST(dist_to_city_km AS FLOAT) AS dist_to_city_km,
+       CAST(dist_to_lake_km AS FLOAT) AS dist_to_lake_km,
+       CAST(dust_exposure AS FLOAT) AS dust_exposure
+FROM grid_cells
+ORDER BY cell_id
+""")
+print("Saved per-cell features to 'utah_grid_cells'")
 
-print("Added 'dist_to_road_km' feature (lower = closer to roads = higher human ignition risk)")
-print(df_grid[['grid_lat', 'grid_lon', 'date', 'dist_to_road_km', 'ignition']].head(10))
+# The per-day table is now a view: static features are joined lazily at query time
+existing = con.execute("""
+SELECT table_type FROM information_schema.tables
+WHERE table_name = 'utah_grid_ignition_labels_proximity'
+""").fetchone()
+if existing and existing[0] == 'BASE TABLE':
+    con.execute("DROP TABLE utah_grid_ignition_labels_proximity")
 
-# Save back with new feature
-con.register('grid_with_proximity', df_grid)
-con.execute("CREATE OR REPLACE TABLE utah_grid_ignition_labels_proximity AS SELECT * FROM grid_with_proximity")
+con.execute("""
+CREATE OR REPLACE VIEW utah_grid_ignition_labels_proximity AS
+SELECT l.cell_id, l.day_id, l.ignition, c.* EXCLUDE (cell_id, grid_lat, grid_lon)
+FROM utah_grid_ignition_labels l
+JOIN utah_grid_cells c USING (cell_id)
+""")
 
 con.close()
-print("Saved with proximity feature to 'utah_grid_ignition_labels_proximity'")
-print("Done.")
\ No newline at end of file
+print("Created view 'utah_grid_ignition_labels_proximity' (labels + per-cell features)")
+print("Done.")
@@ -1,96 +1,53 @@
+import argparse
 import duckdb
-import requests
 import pandas as pd
 from datetime import datetime
-from tqdm import tqdm
-import json
-import os
-import time
 
-CACHE_FILE = "weather_cache_nws.json"
+from nws_cache import (CACHE_PATH, CONCURRENCY, NWS_URL, OBS_FIELDS, OBS_TTL_S, RATE_PER_S, SNAP_DEG,
+                       fetch_observations)
+
+parser = argparse.ArgumentParser(description="Add latest NWS observations to fire events")
+parser.add_argument('--db', default='eco_pyric.duckdb')
+parser.add_argument('--limit', type=int, default=100, help="fires to fetch (0 = all)")
+parser.add_argument('--base-url', default=NWS_URL, help="api.weather.gov or a local nws_stub.py")
+parser.add_argument('--cache', default=CACHE_PATH, help="SQLite cache of point->station + observations")
+parser.add_argument('--concurrency', type=int, default=CONCURRENCY)
+parser.add_argument('--rate', type=float, default=RATE_PER_S, help="max requests per second")
+parser.add_argument('--obs-ttl', type=int, default=OBS_TTL_S, help="seconds a cached observation stays fresh")
+args = parser.parse_args()
 
 print("=== ADDING LIVE WEATHER (NWS API + Cache) ===")
 print(f"Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
 
-# Load or create cache
-cache = {}
-if os.path.exists(CACHE_FILE):
-    with open(CACHE_FILE, 'r') as f:
-        cache = json.load(f)
-print(f"Cache entries: {len(cache)}")
-
-con = duckdb.connect('eco_pyric.duckdb')
+con = duckdb.connect(args.db)
 
-# Load a small test batch (increase LIMIT or remove for full run)
-df_fires = con.execute("""
+# Load a small test batch (--limit 0 for a full run)
+df_fires = con.execute(f"""
 SELECT latitude, longitude, acq_date, dust_exposure
 FROM fire_events_with_dust
-LIMIT 100
+{f'LIMIT {args.limit}' if args.limit else ''}
 """).fetchdf()
 
-print(f"Fetching weather for {len(df_fires):,} fire events")
+print(f"Fetching weather for {len(df_fires):,} fire events "
+      f"(stations shared per {SNAP_DEG}° point, observations cached {args.obs_ttl:,} s)")
+
+results, stats = fetch_observations(list(zip(df_fires['latitude'], df_fires['longitude'])),
+                                    cache_path=args.cache, base_url=args.base_url,
+                                    concurrency=args.concurrency, rate_per_s=args.rate, obs_ttl=args.obs_ttl)
 
 weather_data = []
-success = 0
 fail = 0
-cache_hits = 0
-
-headers = {
-    'User-Agent': '(WildfireRiskCapstone, jared@example.com)',  # Required - change email
-    'Accept': 'application/geo+json'
-}
-
-for idx, row in tqdm(df_fires.iterrows(), total=len(df_fires), desc="Fetching weather"):
-    key = f"{row['latitude']:.4f}_{row['longitude']:.4f}_{row['acq_date']}"
-    
-    if key in cache:
-        weather_data.append({**cache[key], 'index': idx})
-        cache_hits += 1
-        success += 1
-        continue
-    
-    try:
-        lat = row['latitude']
-        lon = row['longitude']
-
-        # Step 1: Get point info
-        url = f"https://api.weather.gov/points/{lat},{lon}"
-        r = requests.get(url, headers=headers, timeout=15)
-        r.raise_for_status()
-        point_data = r.json()
-
-        # Step 2: Get observation station
-        station_url = point_data['properties']['observationStations']
-        r_station = requests.get(station_url, headers=headers, timeout=15)
-        r_station.raise_for_status()
-        stations = r_station.json()
-
-        if 'observationStations' in stations and stations['observationStations']:
-            station_id = stations['observationStations'][0]
-            obs_url = f"https://api.weather.gov/stations/{station_id}/observations/latest"
-            r_obs = requests.get(obs_url, headers=headers, timeout=15)
-            r_obs.raise_for_status()
-            obs = r_obs.json()['properties']
-
-            entry = {
-                'tavg_c': obs.get('temperature', {}).get('value'),
-                'rh_pct': obs.get('relativeHumidity', {}).get('value'),
-                'wspd_kmh': obs.get('windSpeed', {}).get('value'),
-                'prcp_mm': obs.get('precipitationLast3Hours', {}).get('value') or obs.get('precipitationLastHour', {}).get('value')
-            }
-            weather_data.append({**entry, 'index': idx})
-            cache[key] = entry
-            success += 1
-        else:
-            fail += 1
-    except Exception as e:
-        fail += 1
-
-# Save updated cache
-with open(CACHE_FILE, 'w') as f:
-    json.dump(cache, f)
-
-print(f"\nWeather fetch: {success} succeeded ({cache_hits} from cache), {fail} failed/skipped")
+for idx, result in zip(df_fires.index, results):
+    if isinstance(result, dict):
+        weather_data.append({**{f: result[f] for f in OBS_FIELDS}, 'nws_station': result['station_id'],
+                             'index': idx})
+    else:
+        fail += 1  # no station for the point, or the request failed
+
+print(f"\nWeather fetch: {len(weather_data)} succeeded, {fail} failed/skipped")
+print(f"Requests: {stats['requests']:,} | stations: {stats['point_fetches']:,} fetched, "
+      f"{stats['point_hits']:,} from cache | observations: {stats['obs_fetches']:,} fetched, "
+      f"{stats['obs_hits']:,} from cache")
 
 if weather_data:
     weather_df = pd.DataFrame(weather_data).set_index('index')
@@ -106,4 +63,4 @@ else:
     print("No weather data fetched — check network or NWS coverage.")
 
 con.close()
-print("Done.")
\ No newline at end of file
+print("Done.")
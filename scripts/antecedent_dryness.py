@@ -0,0 +1,165 @@
+# scripts/antecedent_dryness.py
+# Antecedent-dryness features on the weather cube: accumulated drought, not same-day weather.
+#
+#   PRCP_7D / PRCP_14D / PRCP_30D   precipitation sum over the trailing window (mm, day included)
+#   DAYS_SINCE_RAIN                  days since PRCP >= RAIN_MM (NaN before the first rain on record)
+#   TMAX_7D_MAX                      trailing 7-day maximum of TMAX (°C)
+#
+# Computed on the (n_days, N_CELLS) cube arrays, all cells at once: window sums by
+# cumulative-sum differencing, days-since-rain with a running maximum of the last
+# rain day, rolling max with scipy's O(n) maximum_filter1d. Everything is O(days x cells).
+# Missing station-days (NaN) count as no rain; a window with no data at all is NaN.
+#
+# Stored next to the cube as <VAR>.npy (listed in antecedent.json), so
+# WeatherCube.lookup() reads them like any other variable. Per-day digests of the
+# PRCP/TMAX rows decide what is recomputed: after a cube rebuild that only added
+# days, just the new days are computed.
+#
+#   python scripts/antecedent_dryness.py            # only new / changed days (also run by build_weather_cube.py)
+#   python scripts/antecedent_dryness.py --full     # recompute everything
+import argparse
+import hashlib
+import json
+import os
+import time
+from datetime import datetime
+
+import numpy as np
+from scipy.ndimage import maximum_filter1d
+
+from weather_cube import ANTECEDENT_META, CUBE_DIR
+
+PRCP_WINDOWS = [7, 14, 30]
+TMAX_WINDOW = 7
+RAIN_MM = 0.254            # "measurable" precipitation: 0.01 in
+ANTECEDENT_VARS = [f'PRCP_{w}D' for w in PRCP_WINDOWS] + ['DAYS_SINCE_RAIN', f'TMAX_{TMAX_WINDOW}D_MAX']
+CONTEXT_DAYS = max(PRCP_WINDOWS + [TMAX_WINDOW]) - 1  # earlier base rows a new day depends on
+
+
+def window_sums(x, windows, skip=0):
+    """Trailing-window sums along axis 0 via cumsum differencing; rows < skip are context only."""
+    valid = ~np.isnan(x)
+    csum = np.zeros((len(x) + 1,) + x.shape[1:])
+    np.cumsum(np.where(valid, x, 0.0), axis=0, out=csum[1:])
+    cnt = np.zeros((len(x) + 1,) + x.shape[1:], dtype=np.int32)
+    np.cumsum(valid, axis=0, out=cnt[1:])
+
+    out = {}
+    end = np.arange(skip, len(x)) + 1
+    for w in windows:
+        begin = np.maximum(end - w, 0)
+        total = csum[end] - csum[begin]
+        total[(cnt[end] - cnt[begin]) == 0] = np.nan
+        out[w] = total.astype(np.float32)
+    return out
+
+
+def days_since_rain(prcp, rain_mm=RAIN_MM, last_rain=None, day0=0):
+    """Days since the last prcp >= rain_mm; last_rain is the per-column last rain day before day0."""
+    days = np.arange(day0, day0 + len(prcp), dtype=np.float64)[:, None]
+    rained = np.where(prcp >= rain_mm, days, -np.inf)  # NaN >= x is False
+    if last_rain is not None:
+        rained[0] = np.maximum(rained[0], last_rain)
+    last = np.maximum.accumulate(rained, axis=0)
+    out = days - last
+    out[np.isinf(out)] = np.nan
+    return out.astype(np.float32)
+
+
+def rolling_max(x, w, skip=0):
+    """Trailing w-day max along axis 0 (NaN-aware; all-NaN window -> NaN)."""
+    filled = np.where(np.isnan(x), -np.inf, x)
+    out = maximum_filter1d(filled, w, axis=0, mode='constant', cval=-np.inf, origin=(w - 1) // 2)[skip:]
+    out[np.isinf(out)] = np.nan
+    return out.astype(np.float32)
+
+
+def compute(prcp, tmax, start=0, prev_days_since_rain=None):
+    """Features for rows start.. of the (days, cells) base arrays; rows < start are only read as context."""
+    lo = max(start - CONTEXT_DAYS, 0)
+    p = np.asarray(prcp[lo:], dtype=np.float64)
+    t = np.asarray(tmax[lo:], dtype=np.float32)
+    skip = start - lo
+
+    sums = window_sums(p, PRCP_WINDOWS, skip)
+    out = {f'PRCP_{w}D': sums[w] for w in PRCP_WINDOWS}
+    last_rain = None
+    if prev_days_since_rain is not None:
+        last_rain = np.where(np.isnan(prev_days_since_rain), -np.inf, (start - 1) - prev_days_since_rain)
+    out['DAYS_SINCE_RAIN'] = days_since_rain(p[skip:], last_rain=last_rain, day0=start)
+    out[f'TMAX_{TMAX_WINDOW}D_MAX'] = rolling_max(t, TMAX_WINDOW, skip)
+    return out
+
+
+def row_digests(prcp, tmax):
+    """One 64-bit hash per day of the base PRCP + TMAX rows."""
+    return np.array([int.from_bytes(hashlib.blake2b(prcp[d].tobytes() + tmax[d].tobytes(), digest_size=8).digest(),
+                                    'little') for d in range(len(prcp))], dtype=np.uint64)
+
+
+def build(cube_dir=CUBE_DIR, full=False):
+    """Bring the antecedent arrays in line with the cube. Returns (first day computed, n_days).
+
+    Days are recomputed from the first day whose PRCP/TMAX row changed (or was added)
+    since the last run, so appending a day to the cube only computes that day.
+    """
+    with open(os.path.join(cube_dir, 'meta.json')) as f:
+        meta = json.load(f)
+    n_days, n_cells = meta['n_days'], meta['n_cells']
+    prcp = np.load(os.path.join(cube_dir, 'PRCP.npy'), mmap_mode='r')
+    tmax = np.load(os.path.join(cube_dir, 'TMAX.npy'), mmap_mode='r')
+    digests = row_digests(prcp, tmax)
+
+    state_path = os.path.join(cube_dir, ANTECEDENT_META)
+    digest_path = os.path.join(cube_dir, 'antecedent_digests.npy')
+    start, n_old = 0, None
+    if not full and os.path.exists(state_path) and os.path.exists(digest_path):
+        with open(state_path) as f:
+            state = json.load(f)
+        if state['vars'] == ANTECEDENT_VARS and state['rain_mm'] == RAIN_MM:
+            old_digests = np.load(digest_path)
+            n_old = len(old_digests)
+            n = min(n_old, n_days)
+            changed = np.flatnonzero(old_digests[:n] != digests[:n])
+            start = int(changed[0]) if len(changed) else n
+    if start == n_days == n_old:
+        return n_days, n_days
+
+    old = {var: np.load(os.path.join(cube_dir, f"{var}.npy"), mmap_mode='r') for var in ANTECEDENT_VARS} if start else {}
+    prev = old['DAYS_SINCE_RAIN'][start - 1] if start else None
+    features = compute(prcp, tmax, start, prev)
+
+    for var in ANTECEDENT_VARS:
+        path = os.path.join(cube_dir, f"{var}.npy")
+        arr = np.lib.format.open_memmap(path + '.tmp', mode='w+', dtype=np.float32, shape=(n_days, n_cells))
+        if start:
+            arr[:start] = old[var][:start]
+        arr[start:] = features[var]
+        arr.flush()
+        del arr
+        os.replace(path + '.tmp', path)
+
+    np.save(digest_path, digests)
+    with open(state_path, 'w') as f:
+        json.dump({'vars': ANTECEDENT_VARS, 'n_days': n_days, 'rain_mm': RAIN_MM,
+                   'prcp_windows': PRCP_WINDOWS, 'tmax_window': TMAX_WINDOW,
+                   'built': datetime.now().isoformat(timespec='seconds')}, f, indent=2)
+    return start, n_days
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Add antecedent-dryness features to the weather cube")
+    parser.add_argument('--cube', default=CUBE_DIR)
+    parser.add_argument('--full', action='store_true', help="recompute every day, not just new ones")
+    args = parser.parse_args()
+
+    print("=== ANTECEDENT DRYNESS FEATURES ===")
+    print(f"Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    t0 = time.time()
+    first, n_days = build(args.cube, args.full)
+    if first == n_days:
+        print(f"Up to date ({n_days:,} days)")
+    else:
+        print(f"Days {first:,}..{n_days - 1:,} computed ({n_days - first:,} days) in {time.time() - t0:.2f} seconds")
+        print(f"Saved {', '.join(ANTECEDENT_VARS)} to {args.cube}/")
+    print("Done.")
@@ -0,0 +1,117 @@
+# scripts/bench_antecedent_dryness.py
+# Benchmark + parity check for antecedent_dryness.py on a full-size synthetic cube
+# (5,136 days x 2,601 cells = 13.4M grid-days): full build, one-day incremental
+# extension, and equality with the same features written as DuckDB WINDOW queries.
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+from datetime import datetime
+
+import duckdb
+import numpy as np
+import pandas as pd
+
+import antecedent_dryness as ad
+from utah_grid import N_CELLS
+from perf_utils import peak_rss_mb
+
+parser = argparse.ArgumentParser(description="Benchmark antecedent-dryness features")
+parser.add_argument('--days', type=int, default=5136)
+parser.add_argument('--parity-cells', type=int, default=N_CELLS,
+                    help="cells compared against the DuckDB WINDOW version")
+args = parser.parse_args()
+
+print("=== BENCHMARK: ANTECEDENT DRYNESS ===")
+print(f"Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+
+rng = np.random.default_rng(0)
+cube_dir = tempfile.mkdtemp(prefix='antecedent_bench_')
+
+
+# Generated once for days + 1; the cube is a prefix of it, so earlier days never change
+shape = (args.days + 1, N_CELLS)
+all_prcp = np.where(rng.random(shape) < 0.15, rng.gamma(0.8, 4.0, shape), 0.0)
+all_tmax = 15 + 15 * np.sin(np.arange(shape[0]) / 58.1)[:, None] + rng.normal(0, 3, shape)
+missing = rng.random(shape) < 0.05
+all_prcp[missing] = np.nan
+all_tmax[missing] = np.nan
+all_prcp[:, :40] = np.nan  # a few cells with no station coverage at all
+
+
+def write_cube(n_days):
+    np.save(os.path.join(cube_dir, 'PRCP.npy'), all_prcp[:n_days].astype(np.float32))
+    np.save(os.path.join(cube_dir, 'TMAX.npy'), all_tmax[:n_days].astype(np.float32))
+    with open(os.path.join(cube_dir, 'meta.json'), 'w') as f:
+        json.dump({'vars': ['PRCP', 'TMAX'], 'n_days': n_days, 'n_cells': N_CELLS, 'fingerprint': str(n_days)}, f)
+
+
+def load_features():
+    return {var: np.load(os.path.join(cube_dir, f"{var}.npy")) for var in ad.ANTECEDENT_VARS}
+
+
+# ================= FULL BUILD =================
+write_cube(args.days)
+start = time.time()
+first, n_days = ad.build(cube_dir)
+full_seconds = time.time() - start
+print(f"Full build: {n_days * N_CELLS:,} grid-days in {full_seconds:.2f} s "
+      f"({n_days * N_CELLS / full_seconds / 1e6:.1f}M grid-days/s)")
+
+# ================= +1 DAY =================
+write_cube(args.days + 1)
+start = time.time()
+first, n_days = ad.build(cube_dir)
+inc_seconds = time.time() - start
+assert first == args.days, first
+print(f"Incremental: day {first:,} only, {inc_seconds:.2f} s (mostly copying the arrays)")
+incremental = load_features()
+
+ad.build(cube_dir, full=True)
+full = load_features()
+for var in ad.ANTECEDENT_VARS:
+    assert np.allclose(incremental[var], full[var], equal_nan=True, atol=1e-3), var
+print("Incremental == full recompute")
+
+# ================= DUCKDB WINDOW REFERENCE =================
+cells = np.arange(args.parity_cells)
+prcp = np.load(os.path.join(cube_dir, 'PRCP.npy'))[:, cells]
+tmax = np.load(os.path.join(cube_dir, 'TMAX.npy'))[:, cells]
+long = pd.DataFrame({
+    'day_id': np.repeat(np.arange(n_days, dtype=np.int32), len(cells)),
+    'cell_id': np.tile(cells.astype(np.int16), n_days),
+    'prcp': prcp.ravel(), 'tmax': tmax.ravel()
+})
+con = duckdb.connect()
+con.register('weather_df', long)
+con.execute("CREATE TABLE weather AS SELECT day_id, cell_id, "
+            "CASE WHEN isnan(prcp) THEN NULL ELSE prcp END AS prcp, "
+            "CASE WHEN isnan(tmax) THEN NULL ELSE tmax END AS tmax FROM weather_df")
+window_sql = ', '.join(f"SUM(prcp) OVER (PARTITION BY cell_id ORDER BY day_id "
+                       f"ROWS BETWEEN {w - 1} PRECEDING AND CURRENT ROW) AS PRCP_{w}D" for w in ad.PRCP_WINDOWS)
+start = time.time()
+ref = con.execute(f"""
+SELECT day_id, cell_id, {window_sql},
+       day_id - MAX(CASE WHEN prcp >= {ad.RAIN_MM} THEN day_id END)
+           OVER (PARTITION BY cell_id ORDER BY day_id ROWS UNBOUNDED PRECEDING) AS DAYS_SINCE_RAIN,
+       MAX(tmax) OVER (PARTITION BY cell_id ORDER BY day_id
+           ROWS BETWEEN {ad.TMAX_WINDOW - 1} PRECEDING AND CURRENT ROW) AS TMAX_{ad.TMAX_WINDOW}D_MAX
+FROM weather
+ORDER BY day_id, cell_id
+""").fetchnumpy()
+sql_seconds = time.time() - start
+for var in ad.ANTECEDENT_VARS:
+    expected = np.ma.filled(ref[var].astype(np.float64), np.nan).reshape(n_days, len(cells))  # NULL -> NaN
+    assert np.allclose(full[var][:, cells], expected, equal_nan=True, rtol=1e-4, atol=1e-2), var
+print(f"DuckDB WINDOW on {len(long):,} grid-days: {sql_seconds:.2f} s — matches")
+
+print("\n" + "=" * 50)
+print(f"NumPy full build:   {full_seconds:.2f} s")
+print(f"NumPy +1 day:       {inc_seconds:.2f} s")
+print(f"DuckDB WINDOW:      {sql_seconds:.2f} s ({len(cells):,} cells)")
+print(f"Peak RSS: {peak_rss_mb():.1f} MB")
+print("=" * 50)
+shutil.rmtree(cube_dir)
+print("Done.")
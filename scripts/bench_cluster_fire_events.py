@@ -0,0 +1,93 @@
+# scripts/bench_cluster_fire_events.py
+# Benchmark + parity check for cluster_fire_events.py on synthetic western-US
+# detections (~3M, like fire_events): a few large multi-week fires with thousands
+# of pixels, many small ones, and scattered single detections. Parity: the per-day
+# KD-tree + union-find equals connected components of the brute-force pair graph
+# on a sample.
+import argparse
+import time
+from datetime import datetime
+
+import numpy as np
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+from scipy.spatial.distance import pdist, squareform
+
+import cluster_fire_events as cfe
+from perf_utils import peak_rss_mb
+
+parser = argparse.ArgumentParser(description="Benchmark fire-event clustering")
+parser.add_argument('--detections', type=int, default=3_000_000)
+parser.add_argument('--days', type=int, default=5136)
+parser.add_argument('--parity-sample', type=int, default=6000, help="detections checked by brute force")
+args = parser.parse_args()
+
+print("=== BENCHMARK: FIRE EVENT CLUSTERING ===")
+print(f"Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+
+rng = np.random.default_rng(0)
+
+
+def synthetic_fires(n_detections, n_days):
+    """Fires with Pareto-sized detection counts that spread outward from an origin over their lifetime."""
+    lat, lon, day = [], [], []
+    n = 0
+    while n < n_detections * 0.9:
+        size = int(min(rng.pareto(1.1) * 5 + 1, 40_000))
+        duration = int(min(1 + size ** 0.5 / 2, 90))
+        origin = rng.uniform([31.0, -125.0, 0], [49.0, -102.0, n_days - duration])
+        t = rng.integers(0, duration, size)
+        spread_km = 0.3 + 0.4 * t  # perimeter grows ~0.4 km/day
+        lat.append(origin[0] + rng.normal(0, 1, size) * spread_km / 111.0)
+        lon.append(origin[1] + rng.normal(0, 1, size) * spread_km / 85.0)
+        day.append(origin[2].astype(int) + t)
+        n += size
+    single = n_detections - n  # scattered false alarms / small burns
+    lat.append(rng.uniform(31.0, 49.0, single))
+    lon.append(rng.uniform(-125.0, -102.0, single))
+    day.append(rng.integers(0, n_days, single))
+    return np.concatenate(lat), np.concatenate(lon), np.concatenate(day)
+
+
+lat, lon, day = synthetic_fires(args.detections, args.days)
+print(f"Synthetic: {len(day):,} detections over {args.days:,} days")
+
+# ================= FULL RUN =================
+start = time.time()
+event = cfe.cluster(lat, lon, day)
+cluster_seconds = time.time() - start
+start = time.time()
+events = cfe.summarize(lat, lon, day, np.ones(len(day)), event)
+summary_seconds = time.time() - start
+sizes = events['n_detections'].to_numpy()
+print(f"Clustered into {len(events):,} events in {cluster_seconds:.2f} s (+{summary_seconds:.2f} s summary); "
+      f"largest {sizes.max():,} detections, {int((sizes == 1).sum()):,} singletons")
+
+# Event ids are numbered by start day
+assert np.all(np.diff(events['start_day_id'].to_numpy()) >= 0)
+
+# ================= BRUTE-FORCE PARITY =================
+# A dense window (one big fire's days + neighbours) so the sample actually has links
+big = events['event_id'][np.argmax(sizes)]
+d0 = events['start_day_id'][big]
+window = np.flatnonzero((day >= d0) & (day < d0 + 30))
+sample = np.sort(rng.choice(window, min(args.parity_sample, len(window)), replace=False))
+s_lat, s_lon, s_day = lat[sample], lon[sample], day[sample]
+xyz = cfe.sphere_km(s_lat, s_lon)
+near = squareform(pdist(xyz) <= cfe.RADIUS_KM) & (np.abs(s_day[:, None] - s_day[None, :]) <= cfe.MAX_GAP_DAYS)
+i, j = np.nonzero(near)
+_, expected = connected_components(coo_matrix((np.ones(len(i)), (i, j)), shape=(len(sample),) * 2), directed=False)
+got = cfe.cluster(s_lat, s_lon, s_day, pair_batch=10_000)  # many small batches
+# Same partition: ids map one-to-one
+pairs = set(zip(expected.tolist(), got.tolist()))
+assert len(pairs) == len(set(expected.tolist())) == len(set(got.tolist()))
+print(f"Parity: {len(sample):,} detections, {len(i) // 2:,} linked pairs, "
+      f"{len(set(got.tolist())):,} events — same partition as brute-force connected components")
+
+print("\n" + "=" * 50)
+print(f"Detections:      {len(day):,}")
+print(f"Events:          {len(events):,}")
+print(f"Clustering time: {cluster_seconds:.2f} s")
+print(f"Peak RSS: {peak_rss_mb():.1f} MB")
+print("=" * 50)
+print("Done.")
@@ -0,0 +1,150 @@
+# scripts/bench_features.py
+# Parity check + micro-benchmark for the shared feature registry (features.py).
+#
+# Parity: the registry reproduces the per-script formulas it replaced (training
+# DataFrame code, the v3 (days x cells) block, the proximity/NRT dust score), and
+# a cell-day gets the same features through the training and serving paths.
+# Benchmark: feature rows per second for a 1M-row training batch and a 16-day
+# forecast block, registry vs the old pandas column assignments.
+import argparse
+import time
+from datetime import datetime
+
+import duckdb
+import numpy as np
+import pandas as pd
+
+import features
+import update_nrt
+from features import FEATURES, TRAINING_RH, compute
+from training_data import derive_features
+from utah_grid import N_CELLS, cell_latlon, day_id_from_date, month_from_day_id
+from perf_utils import peak_rss_mb
+
+parser = argparse.ArgumentParser(description="Parity + throughput of the shared feature registry")
+parser.add_argument('--rows', type=int, default=1_000_000, help="training rows per batch")
+parser.add_argument('--days', type=int, default=16, help="forecast horizon")
+parser.add_argument('--repeat', type=int, default=5)
+args = parser.parse_args()
+
+print("=== BENCHMARK: SHARED FEATURE REGISTRY ===")
+print(f"Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+rng = np.random.default_rng(0)
+
+
+class RandomCube:
+    """Stands in for WeatherCube.training_weather: deterministic per (day, cell), NaN-free."""
+
+    def training_weather(self, day_id, cell_id):
+        key = day_id.astype(np.int64) * N_CELLS + cell_id
+        return (key % 600) / 10 - 20.0, (key % 97) / 10.0
+
+
+# ================= REFERENCE: THE FORMULAS AS THEY WERE =================
+def legacy_training(df, cube):
+    df['grid_lat'], df['grid_lon'] = cell_latlon(df['cell_id'].values)
+    df['month'] = month_from_day_id(df['day_id'].values)
+    if cube is not None:
+        df['tavg'], df['prcp'] = cube.training_weather(df['day_id'].values, df['cell_id'].values)
+    else:
+        df['tavg'] = 10
+        df['prcp'] = 0
+    df['vpd_proxy'] = 0.6108 * np.exp(17.27 * df['tavg'] / (df['tavg'] + 237.3)) * (1 - 50 / 100)
+    df['vpd_proxy'] = df['vpd_proxy'].clip(lower=0)
+    df['dryness_proxy'] = (df['tavg'] - (df['tavg'] - 10)) / 10
+    df['low_precip_dryness'] = np.where(df['prcp'] < 1, 1.0, 0.5)
+    return df[FEATURES].astype(np.float32)
+
+
+def legacy_forecast(df_grid, dates, tavg, rh, prcp):
+    n_days, n_cells = tavg.shape
+    vpd_proxy = np.clip(0.6108 * np.exp(17.27 * tavg / (tavg + 237.3)) * (1 - rh / 100), 0, None)
+    return pd.DataFrame({
+        'dist_to_road_km': np.tile(df_grid['dist_to_road_km'].values, n_days),
+        'month': np.repeat(dates.month.values, n_cells),
+        'vpd_proxy': vpd_proxy.ravel(),
+        'dryness_proxy': ((tavg - (tavg - 10)) / 10).ravel(),
+        'low_precip_dryness': np.where(prcp < 1, 1.0, 0.5).ravel(),
+        'grid_lat': np.tile(df_grid['grid_lat'].values, n_days),
+        'grid_lon': np.tile(df_grid['grid_lon'].values, n_days)
+    })[FEATURES]
+
+
+def timed(fn):
+    best = float('inf')
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - start)
+    return out, best
+
+
+# ================= TRAINING PATH =================
+cell_id = rng.integers(0, N_CELLS, args.rows).astype(np.int16)
+day_id = rng.integers(0, 5136, args.rows).astype(np.int16)
+road = rng.uniform(0, 300, args.rows).astype(np.float32)
+ids = pd.DataFrame({'cell_id': cell_id, 'day_id': day_id, 'dist_to_road_km': road})
+for cube in [None, RandomCube()]:
+    old, old_s = timed(lambda: legacy_training(ids.copy(), cube))
+    new, new_s = timed(lambda: derive_features(cell_id, day_id, road, cube))
+    assert new.dtype == np.float32 and np.array_equal(old.to_numpy(), new), cube
+    label = 'placeholders' if cube is None else 'cube weather'
+    print(f"Training ({label}): identical; pandas {args.rows / old_s / 1e6:.1f}M rows/s, "
+          f"registry {args.rows / new_s / 1e6:.1f}M rows/s")
+train_old_s, train_new_s = old_s, new_s
+
+# ================= SERVING PATH (v3 / service) =================
+df_grid = pd.DataFrame({'cell_id': np.arange(N_CELLS, dtype=np.int16)})
+df_grid['grid_lat'], df_grid['grid_lon'] = cell_latlon(df_grid['cell_id'].values)
+df_grid['dist_to_road_km'] = rng.uniform(0, 300, N_CELLS).astype(np.float32)
+dates = pd.date_range('2025-06-25', periods=args.days)
+shape = (args.days, N_CELLS)
+tavg, rh, prcp = rng.uniform(-15, 40, shape), rng.uniform(5, 100, shape), rng.gamma(0.5, 3, shape)
+tavg[0, :50] = np.nan  # cells the weather provider couldn't fill
+block_cols = {'cell_id': df_grid['cell_id'].values, 'dist_to_road_km': df_grid['dist_to_road_km'].values,
+              'grid_lat': df_grid['grid_lat'].values, 'grid_lon': df_grid['grid_lon'].values,
+              'day_id': day_id_from_date(dates.values.astype('datetime64[D]'))[:, None],
+              'tavg': tavg, 'rh': rh, 'prcp': prcp}
+old, serve_old_s = timed(lambda: legacy_forecast(df_grid, dates, tavg, rh, prcp))
+new, serve_new_s = timed(lambda: compute(FEATURES, block_cols).reshape(-1, len(FEATURES)))
+np.testing.assert_array_equal(old.to_numpy(np.float32), new)
+n_block = args.days * N_CELLS
+print(f"Forecast block ({args.days} days x {N_CELLS:,} cells): identical incl. NaN weather; "
+      f"pandas {serve_old_s * 1000:.1f} ms, registry {serve_new_s * 1000:.1f} ms")
+
+# grid_lat/lon derived from cell_id equal the utah_grid_cells columns the forecasters pass in
+derived = compute(FEATURES, {k: v for k, v in block_cols.items() if k not in ('grid_lat', 'grid_lon')})
+assert np.array_equal(derived.reshape(-1, len(FEATURES)), new, equal_nan=True)
+
+# ================= TRAIN / SERVE SKEW =================
+# A forecast at the training RH gives the training row's features for the same cell-day
+cube = RandomCube()
+d = day_id_from_date(dates.values.astype('datetime64[D]'))
+cells = df_grid['cell_id'].values
+train_rows = derive_features(np.tile(cells, args.days), np.repeat(d, N_CELLS),
+                             np.tile(df_grid['dist_to_road_km'].values, args.days), cube)
+t, p = cube.training_weather(np.repeat(d, N_CELLS), np.tile(cells, args.days))
+serve = compute(FEATURES, {**block_cols, 'tavg': t.reshape(shape), 'prcp': p.reshape(shape), 'rh': TRAINING_RH})
+assert np.array_equal(train_rows, serve.reshape(-1, len(FEATURES)))
+print("Train/serve: same cell-day, same weather -> identical feature rows")
+
+# ================= DUST =================
+lat, lon = df_grid['grid_lat'].values, df_grid['grid_lon'].values
+legacy_km = np.sqrt((lat - 41.0) ** 2 + (lon - -112.5) ** 2) * 111
+legacy_dust = pd.Series(1 / (legacy_km + 1)).clip(upper=1.0).to_numpy()
+assert np.array_equal(features.dist_to_lake_km(lat, lon), legacy_km)
+assert np.array_equal(features.dust_exposure(features.dist_to_lake_km(lat, lon)), legacy_dust)
+con = duckdb.connect()
+con.register('cells', pd.DataFrame({'latitude': lat, 'longitude': lon}))
+sql_dust = con.execute(f"SELECT {update_nrt.DUST_SQL['dust_exposure']} FROM cells").fetchnumpy()
+np.testing.assert_allclose(next(iter(sql_dust.values())), legacy_dust, rtol=1e-12)
+print("Dust: registry == add_proximity_feature formula == update_nrt SQL")
+
+print("\n" + "=" * 50)
+print(f"Training batch ({args.rows:,} rows): {args.rows / train_old_s / 1e6:.1f}M -> "
+      f"{args.rows / train_new_s / 1e6:.1f}M rows/s")
+print(f"Forecast block ({n_block:,} cell-days): {n_block / serve_old_s / 1e6:.1f}M -> "
+      f"{n_block / serve_new_s / 1e6:.1f}M cell-days/s")
+print(f"Peak RSS: {peak_rss_mb():.1f} MB")
+print("=" * 50)
+print("Done.")
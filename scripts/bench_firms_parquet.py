@@ -0,0 +1,135 @@
+# scripts/bench_firms_parquet.py
+# Benchmark for the Parquet FIRMS ingest (firms_parquet.py) on synthetic FIRMS
+# CSVs (~3M western-US rows in archive + NRT files): table-mode ingest vs the
+# parallel Parquet ingest, a re-run with nothing changed, and the EDA-style
+# queries on the VARCHAR table vs the typed view (with the filter pushed into the scan).
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from datetime import datetime
+
+import duckdb
+import numpy as np
+import pandas as pd
+
+import firms_parquet as fp
+from perf_utils import peak_rss_mb
+
+parser = argparse.ArgumentParser(description="Benchmark the Parquet FIRMS ingest")
+parser.add_argument('--rows', type=int, default=3_000_000)
+parser.add_argument('--files', type=int, default=4, help="CSV files the rows are split into")
+parser.add_argument('--workers', type=int, default=fp.WORKERS)
+args = parser.parse_args()
+
+print("=== BENCHMARK: PARQUET FIRMS INGEST ===")
+print(f"Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+
+work = tempfile.mkdtemp(prefix='firms_parquet_bench_')
+rng = np.random.default_rng(0)
+dates = pd.date_range('2012-01-20', '2026-01-09')
+csv_files = []
+for i, n in enumerate(np.diff(np.linspace(0, args.rows, args.files + 1).astype(int))):
+    df = pd.DataFrame({
+        'latitude': np.round(rng.uniform(30.5, 49.5, n), 5),
+        'longitude': np.round(rng.uniform(-125.5, -101.5, n), 5),
+        'bright_ti4': np.round(rng.uniform(295, 367, n), 2),
+        'acq_date': dates[np.sort(rng.integers(0, len(dates), n))].strftime('%Y-%m-%d'),
+        'acq_time': rng.integers(0, 2400, n),
+        'confidence': rng.choice(['l', 'n', 'h'], n, p=[0.1, 0.8, 0.1]),
+        'frp': np.round(rng.gamma(1.2, 5.0, n), 2),
+    }).rename(columns={'bright_ti4': 'brightness'})
+    path = os.path.join(work, f"fire_archive_part{i}.csv")
+    df.to_csv(path, index=False)
+    csv_files.append(path)
+print(f"Synthetic: {args.rows:,} rows in {len(csv_files)} CSVs "
+      f"({sum(os.path.getsize(f) for f in csv_files) / 1024**2:.0f} MB)")
+
+con = duckdb.connect(os.path.join(work, 'bench.duckdb'))
+
+# ================= TABLE MODE (original) =================
+start = time.time()
+con.execute("CREATE TABLE fire_events_table (source_file VARCHAR, latitude DOUBLE, longitude DOUBLE, "
+            "acq_date VARCHAR, acq_time SMALLINT, brightness DOUBLE, frp DOUBLE, confidence VARCHAR)")
+for csv_file in csv_files:
+    con.execute(f"""
+    INSERT INTO fire_events_table
+    SELECT '{os.path.basename(csv_file)}', latitude, longitude, acq_date, acq_time, brightness, frp, confidence
+    FROM read_csv_auto('{csv_file}', types={{'acq_date': 'VARCHAR'}})
+    WHERE latitude BETWEEN {fp.MIN_LAT} AND {fp.MAX_LAT}
+      AND longitude BETWEEN {fp.MIN_LON} AND {fp.MAX_LON}
+      AND confidence != '{fp.CONFIDENCE_EXCLUDE}'
+    """)
+    con.execute(f"SELECT COUNT(*) FROM fire_events_table WHERE source_file = '{os.path.basename(csv_file)}'")
+table_seconds = time.time() - start
+print(f"Table ingest (serial, count per file): {table_seconds:.2f} s")
+
+# ================= PARQUET MODE =================
+out_dir = os.path.join(work, 'firms_parquet')
+start = time.time()
+results = fp.ingest(csv_files, out_dir, args.workers)
+parquet_seconds = time.time() - start
+assert all(status == 'loaded' for status, _ in results.values())
+fp.create_view(con, 'fire_events', out_dir)
+n_table = con.execute("SELECT COUNT(*) FROM fire_events_table").fetchone()[0]
+n_view = con.execute("SELECT COUNT(*) FROM fire_events").fetchone()[0]
+assert n_table == n_view, (n_table, n_view)
+size_mb = sum(os.path.getsize(f) for f in fp.parquet_files(out_dir)) / 1024**2
+print(f"Parquet ingest ({args.workers} workers): {parquet_seconds:.2f} s, "
+      f"{len(fp.parquet_files(out_dir)):,} files, {size_mb:.0f} MB, {n_view:,} rows (= table)")
+
+start = time.time()
+results = fp.ingest(csv_files, out_dir, args.workers)
+rerun_seconds = time.time() - start
+assert all(status == 'unchanged' for status, _ in results.values())
+print(f"Re-run, nothing changed: {rerun_seconds * 1000:.0f} ms")
+
+encodings = con.execute(f"""
+SELECT DISTINCT encodings FROM parquet_metadata('{os.path.join(out_dir, '*', '*', '*.parquet')}')
+WHERE path_in_schema = 'confidence'
+""").fetchall()
+print(f"confidence encodings: {sorted({e for row in encodings for e in row[0].split(', ')})}")
+
+# ================= EDA QUERIES =================
+queries = {
+    'yearly': "SELECT strftime({d}, '%Y') AS year, COUNT(*) FROM {t} GROUP BY year",
+    'utah yearly': "SELECT strftime({d}, '%Y') AS year, COUNT(*) FROM {t} "
+                   "WHERE latitude BETWEEN 37 AND 42 AND longitude BETWEEN -114 AND -109 GROUP BY year",
+    'recent daily': "SELECT acq_date, COUNT(*) FROM {t} WHERE {d} >= DATE '2025-01-01' GROUP BY acq_date",
+}
+timings = {}
+for name, sql in queries.items():
+    start = time.time()
+    old = con.execute(sql.format(d="strptime(acq_date, '%Y-%m-%d')", t='fire_events_table')).fetchall()
+    old_ms = (time.time() - start) * 1000
+    start = time.time()
+    new = con.execute(sql.format(d="CAST(acq_date AS DATE)", t='fire_events')).fetchall()
+    new_ms = (time.time() - start) * 1000
+    assert len(old) == len(new) and sum(r[1] for r in old) == sum(r[1] for r in new), name
+    timings[name] = (old_ms, new_ms)
+    print(f"{name:>13}: VARCHAR table + strptime {old_ms:6.0f} ms | Parquet view {new_ms:6.0f} ms")
+
+plan = '\n'.join(r[1] for r in con.execute(
+    "EXPLAIN SELECT COUNT(*) FROM fire_events WHERE CAST(acq_date AS DATE) >= DATE '2025-01-01'").fetchall())
+assert 'Filters' in plan and 'acq_date' in plan.split('Filters')[1][:200]
+print("Plan: the acq_date filter is pushed into the Parquet scan")
+
+# One file changes: only its Parquet files are replaced
+with open(csv_files[0], 'a') as f:
+    f.write("40.0,-111.0,330.0,2024-07-04,1200,h,12.5\n")
+results = fp.ingest(csv_files, out_dir, args.workers)
+assert [status for status, _ in results.values()].count('loaded') == 1
+assert con.execute("SELECT COUNT(*) FROM fire_events").fetchone()[0] == n_view + 1
+print("Re-run, one CSV appended: only that file reloaded")
+
+con.close()
+shutil.rmtree(work)
+print("\n" + "=" * 50)
+print(f"Table ingest:    {table_seconds:.2f} s")
+print(f"Parquet ingest:  {parquet_seconds:.2f} s (re-run {rerun_seconds * 1000:.0f} ms)")
+for name, (old_ms, new_ms) in timings.items():
+    print(f"{name + ':':<16} {old_ms:.0f} ms -> {new_ms:.0f} ms")
+print(f"Peak RSS: {peak_rss_mb():.1f} MB")
+print("=" * 50)
+print("Done.")
@@ -0,0 +1,68 @@
+# scripts/bench_grid_labels.py
+# Benchmark: grid-date label builder, DuckDB SQL mode vs original pandas cross-product
+import argparse
+import os
+import sys
+import duckdb
+from datetime import datetime
+
+from perf_utils import run_with_peak_rss
+
+parser = argparse.ArgumentParser(description="Benchmark the grid-date label builder modes")
+parser.add_argument('--db', default='eco_pyric.duckdb')
+parser.add_argument('--modes', nargs='+', default=['pandas', 'sql'])
+parser.add_argument('--keep', action='store_true', help="keep the scratch benchmark tables")
+args = parser.parse_args()
+
+LABEL_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scripts_create_utah_grid_labels.py')
+
+print("=== BENCHMARK: GRID-DATE LABEL BUILDER ===")
+print(f"Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+print(f"Database: {args.db}")
+print("=" * 50 + "\n")
+
+results = []
+for mode in args.modes:
+    table = f"bench_grid_labels_{mode}"
+    print(f"--- {mode} ---")
+    rc, seconds, peak_mb = run_with_peak_rss(
+        [sys.executable, LABEL_SCRIPT, '--mode', mode, '--db', args.db, '--table', table]
+    )
+    if rc != 0:
+        print(f"[FAIL] {mode} exited with code {rc}")
+        continue
+
+    con = duckdb.connect(args.db)
+    n_rows, n_ignitions = con.execute(f"SELECT COUNT(*), SUM(ignition) FROM {table}").fetchone()
+    con.close()
+
+    results.append({
+        'mode': mode,
+        'rows': n_rows,
+        'ignitions': n_ignitions,
+        'seconds': seconds,
+        'rows_per_s': n_rows / seconds,
+        'peak_rss_mb': peak_mb
+    })
+    print()
+
+print("=" * 50)
+print(f"{'mode':<8}{'rows':>14}{'ignitions':>12}{'seconds':>10}{'rows/s':>14}{'peak RSS MB':>14}")
+for r in results:
+    print(f"{r['mode']:<8}{r['rows']:>14,}{r['ignitions']:>12,}{r['seconds']:>10.1f}"
+          f"{r['rows_per_s']:>14,.0f}{r['peak_rss_mb']:>14,.0f}")
+
+by_mode = {r['mode']: r for r in results}
+if 'pandas' in by_mode and 'sql' in by_mode:
+    print(f"\nSpeedup (sql vs pandas): {by_mode['pandas']['seconds'] / by_mode['sql']['seconds']:.1f}x")
+    print(f"Peak RSS ratio (pandas / sql): {by_mode['pandas']['peak_rss_mb'] / by_mode['sql']['peak_rss_mb']:.1f}x")
+    same = by_mode['pandas']['ignitions'] == by_mode['sql']['ignitions']
+    print(f"Ignition counts match: {'yes' if same else 'NO'}")
+
+if not args.keep:
+    con = duckdb.connect(args.db)
+    for mode in args.modes:
+        con.execute(f"DROP TABLE IF EXISTS bench_grid_labels_{mode}")
+    con.close()
+print("=" * 50)
+print("Done.")
@@ -0,0 +1,101 @@
+# scripts/bench_label_cube.py
+# Benchmark for label_cube.py on a full-size synthetic label set (5,136 days x
+# 2,601 cells = 13.4M cell-days): size on disk, open, date/bbox slicing and
+# to_long() against reading the same rows from the long DuckDB table.
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from datetime import datetime
+
+import duckdb
+import numpy as np
+import pandas as pd
+
+from label_cube import LabelCube
+from utah_grid import N_CELLS, date_from_day_id, register_grid_macros
+from perf_utils import peak_rss_mb
+
+parser = argparse.ArgumentParser(description="Benchmark the bit-packed label cube")
+parser.add_argument('--days', type=int, default=5136)
+parser.add_argument('--rate', type=float, default=0.0003, help="share of cell-days with an ignition")
+args = parser.parse_args()
+
+print("=== BENCHMARK: BIT-PACKED LABEL CUBE ===")
+print(f"Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+
+rng = np.random.default_rng(0)
+n_fires = int(args.days * N_CELLS * args.rate)
+day_id = rng.integers(0, args.days, n_fires).astype(np.int16)
+cell_id = rng.integers(0, N_CELLS, n_fires).astype(np.int16)
+work = tempfile.mkdtemp(prefix='label_cube_bench_')
+
+# Reference: the long table, built the same way as scripts_create_utah_grid_labels.py (sql mode)
+con = duckdb.connect(os.path.join(work, 'bench.duckdb'))
+register_grid_macros(con)
+con.register('fires_df', pd.DataFrame({'cell_id': cell_id, 'day_id': day_id}))
+con.execute(f"""
+CREATE TABLE utah_grid_ignition_labels AS
+WITH f AS (SELECT DISTINCT cell_id, day_id FROM fires_df)
+SELECT CAST(c AS SMALLINT) AS cell_id, CAST(d AS SMALLINT) AS day_id,
+       CAST(f.cell_id IS NOT NULL AS TINYINT) AS ignition
+FROM range({N_CELLS}) AS cells(c)
+CROSS JOIN range(0, {args.days}) AS days(d)
+LEFT JOIN f ON f.cell_id = c AND f.day_id = d
+ORDER BY cell_id, day_id
+""")
+
+# ================= BUILD + OPEN =================
+start = time.time()
+cube = LabelCube.from_table(con, 'utah_grid_ignition_labels')
+cube.save(work)
+build_seconds = time.time() - start
+start = time.time()
+cube = LabelCube.open(work)
+open_ms = (time.time() - start) * 1000
+size_mb = os.path.getsize(os.path.join(work, 'labels.npy')) / 1024**2
+print(f"Packed {cube.n_days:,} days x {N_CELLS:,} cells from the table in {build_seconds:.2f} s: "
+      f"{size_mb:.2f} MB on disk, opened in {open_ms:.1f} ms")
+
+# ================= FULL HISTORY: CUBE vs TABLE =================
+start = time.time()
+table = con.execute("SELECT cell_id, day_id, ignition FROM utah_grid_ignition_labels").fetchdf()
+table_seconds = time.time() - start
+table_mb = table.memory_usage(deep=True).sum() / 1024**2
+start = time.time()
+long = cube.to_long()
+long_seconds = time.time() - start
+for col in ['cell_id', 'day_id', 'ignition']:
+    assert np.array_equal(table[col].to_numpy(), long[col].to_numpy()), col
+print(f"Full history: table fetch {table_seconds:.2f} s ({table_mb:.0f} MB frame), "
+      f"cube.to_long() {long_seconds:.2f} s — identical")
+del table, long
+
+# ================= ONE SUMMER IN A BBOX =================
+first, last = date_from_day_id([args.days // 2, args.days // 2 + 91])
+bbox = (38.0, 39.5, -112.5, -111.0)
+start = time.time()
+ref = con.execute(f"""
+SELECT cell_id, day_id, ignition FROM utah_grid_ignition_labels
+WHERE day_id BETWEEN date_to_day(DATE '{first}') AND date_to_day(DATE '{last}')
+  AND cell_lat(cell_id) BETWEEN {bbox[0]} AND {bbox[1]}
+  AND cell_lon(cell_id) BETWEEN {bbox[2]} AND {bbox[3]}
+ORDER BY cell_id, day_id
+""").fetchdf()
+sql_ms = (time.time() - start) * 1000
+start = time.time()
+part = cube.to_long(str(first), str(last), bbox)
+slice_ms = (time.time() - start) * 1000
+assert np.array_equal(ref.to_numpy(), part.to_numpy())
+print(f"{first}..{last} in {bbox}: SQL {sql_ms:.0f} ms, cube {slice_ms:.1f} ms — {len(part):,} rows match")
+
+con.close()
+shutil.rmtree(work)
+print("\n" + "=" * 50)
+print(f"Cube on disk:     {size_mb:.2f} MB")
+print(f"to_long (all):    {long_seconds:.2f} s vs table fetch {table_seconds:.2f} s")
+print(f"Date+bbox slice:  {slice_ms:.1f} ms vs SQL {sql_ms:.0f} ms")
+print(f"Peak RSS: {peak_rss_mb():.1f} MB")
+print("=" * 50)
+print("Done.")
@@ -0,0 +1,85 @@
+# scripts/bench_negative_sampling.py
+# Benchmark: AUC / PR-AUC / training time vs negative sampling fraction
+import argparse
+import time
+import duckdb
+import numpy as np
+from datetime import datetime
+from sklearn.metrics import roc_auc_score, average_precision_score
+from xgboost import XGBClassifier
+
+from training_data import TRAIN_QUERY, iter_batches
+from sampling import sample_training_rows
+from perf_utils import peak_rss_mb
+
+parser = argparse.ArgumentParser(description="Benchmark case-control negative downsampling")
+parser.add_argument('--db', default='eco_pyric.duckdb')
+parser.add_argument('--limit', type=int, default=None, help="only use the first N grid-day rows")
+parser.add_argument('--fractions', type=float, nargs='+', default=[1.0, 0.3, 0.1, 0.03, 0.01])
+parser.add_argument('--n-estimators', type=int, default=200)
+args = parser.parse_args()
+
+print("=== BENCHMARK: NEGATIVE DOWNSAMPLING ===")
+print(f"Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+
+con = duckdb.connect(args.db, read_only=True)
+query = TRAIN_QUERY + (f"LIMIT {args.limit}" if args.limit else "")
+
+
+def collect(subset):
+    parts = list(iter_batches(con, query, subset=subset))
+    X = np.concatenate([p[0] for p in parts])
+    y = np.concatenate([p[1] for p in parts]).astype(np.int8)
+    cell_id = np.concatenate([p[2] for p in parts])
+    day_id = np.concatenate([p[3] for p in parts])
+    return X, y, cell_id, day_id
+
+
+X_train, y_train, cell_train, day_train = collect('train')
+X_test, y_test, _, _ = collect('test')
+con.close()
+
+scale_pos_weight = (y_train == 0).sum() / (y_train == 1).sum()
+print(f"Train rows: {len(y_train):,}  Test rows: {len(y_test):,}  Scale pos weight: {scale_pos_weight:.2f}")
+print("=" * 50 + "\n")
+
+results = []
+for frac in args.fractions:
+    if frac < 1:
+        X_fit, y_fit, w_fit, _ = sample_training_rows(X_train, y_train, cell_train, day_train, frac)
+    else:
+        X_fit, y_fit, w_fit = X_train, y_train, None
+
+    model = XGBClassifier(
+        n_estimators=args.n_estimators,
+        learning_rate=0.05,
+        max_depth=7,
+        scale_pos_weight=scale_pos_weight,
+        random_state=42,
+        tree_method='hist'
+    )
+    start = time.time()
+    model.fit(X_fit, y_fit, sample_weight=w_fit)
+    fit_seconds = time.time() - start
+
+    proba = model.predict_proba(X_test)[:, 1]
+    results.append({
+        'fraction': frac,
+        'rows': len(y_fit),
+        'fit_seconds': fit_seconds,
+        'auc': roc_auc_score(y_test, proba),
+        'pr_auc': average_precision_score(y_test, proba),
+        'mean_proba': proba.mean()
+    })
+    print(f"fraction {frac:.3f}: {len(y_fit):,} rows, fit {fit_seconds:.1f}s, AUC {results[-1]['auc']:.4f}")
+
+print("\n" + "=" * 50)
+print(f"{'fraction':>9}{'rows':>14}{'fit s':>9}{'speedup':>9}{'AUC':>8}{'PR-AUC':>9}{'mean p':>10}")
+base = results[0]
+for r in results:
+    print(f"{r['fraction']:>9.3f}{r['rows']:>14,}{r['fit_seconds']:>9.1f}"
+          f"{base['fit_seconds'] / r['fit_seconds']:>8.1f}x{r['auc']:>8.4f}{r['pr_auc']:>9.4f}{r['mean_proba']:>10.5f}")
+# mean p should stay close to the first row if the weights keep the outputs calibrated
+print(f"Peak RSS: {peak_rss_mb():.1f} MB")
+print("=" * 50)
+print("Done.")
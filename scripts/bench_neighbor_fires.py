@@ -0,0 +1,101 @@
+# scripts/bench_neighbor_fires.py
+# Benchmark + parity check for neighbor_fires.py on a full-size synthetic label set
+# (5,136 days x 2,601 cells = 13.4M cell-days): the vectorized cube pass vs the
+# same box counts as a DuckDB self-join, plus a leakage check (day-t ignitions
+# must not change day-t features).
+import argparse
+import time
+from datetime import datetime
+
+import duckdb
+import numpy as np
+import pandas as pd
+
+import neighbor_fires as nf
+from label_cube import LabelCube
+from utah_grid import N_CELLS, N_LON
+from perf_utils import peak_rss_mb
+
+parser = argparse.ArgumentParser(description="Benchmark neighbour-fire features")
+parser.add_argument('--days', type=int, default=5136)
+parser.add_argument('--rate', type=float, default=0.002, help="share of cell-days with an ignition")
+parser.add_argument('--parity-cells', type=int, default=200,
+                    help="random cells compared against the DuckDB self-join")
+args = parser.parse_args()
+
+print("=== BENCHMARK: NEIGHBOR FIRE FEATURES ===")
+print(f"Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+
+rng = np.random.default_rng(0)
+labels = (rng.random((args.days, N_CELLS)) < args.rate).astype(np.int8)
+con = duckdb.connect()
+con.register('labels_df', pd.DataFrame({
+    'cell_id': np.repeat(np.arange(N_CELLS, dtype=np.int16), args.days),
+    'day_id': np.tile(np.arange(args.days, dtype=np.int16), N_CELLS),
+    'ignition': labels.T.ravel()
+}))
+con.execute(f"CREATE TABLE {nf.LABELS_TABLE} AS SELECT * FROM labels_df")
+con.unregister('labels_df')
+print(f"Labels: {args.days * N_CELLS:,} cell-days, {int(labels.sum()):,} ignitions")
+
+# ================= VECTORIZED BUILD =================
+start = time.time()
+rows = nf.build(con)
+build_seconds = time.time() - start
+print(f"Cube pass + write: {rows:,} cell-days in {build_seconds:.2f} s "
+      f"({rows / build_seconds / 1e6:.1f}M cell-days/s)")
+
+# ================= NO LEAKAGE =================
+# Fires on day t flip, features for day t stay the same; day t+1 sees them
+day_id, cell_id = np.nonzero(labels)
+cube = LabelCube.from_pairs(cell_id, day_id, 0, args.days - 1).dense()
+t = args.days // 2
+before = nf.compute(cube)
+flipped = cube.copy()
+flipped[t] = 1 - flipped[t]
+after = nf.compute(flipped)
+for name in nf.NEIGHBOR_FEATURES:
+    assert np.array_equal(before[name][:t + 1], after[name][:t + 1]), name
+    assert not np.array_equal(before[name][t + 1], after[name][t + 1]), name
+print(f"No leakage: flipping every ignition on day {t:,} leaves days <= {t:,} unchanged")
+
+# ================= DUCKDB SELF-JOIN REFERENCE =================
+cells = np.sort(rng.choice(N_CELLS, args.parity_cells, replace=False)).astype(np.int16)
+box = {name: spec for name, spec in nf.NEIGHBOR_FEATURES.items() if spec[1] in ('own', 'box')}
+sums = ', '.join(
+    f"COALESCE(SUM(f.ignition) FILTER (WHERE f.day_id >= s.day_id - {w} "
+    f"AND abs(f.cell_id // {N_LON} - s.cell_id // {N_LON}) <= {r} "
+    f"AND abs(f.cell_id % {N_LON} - s.cell_id % {N_LON}) <= {r} "
+    f"AND f.cell_id {'=' if kernel == 'own' else '<>'} s.cell_id), 0) AS {name}"
+    for name, (w, kernel, r) in box.items())
+max_w = max(w for w, _, _ in box.values())
+max_r = max(r for _, _, r in box.values())
+con.register('sample_cells', pd.DataFrame({'cell_id': cells}))
+start = time.time()
+ref = con.execute(f"""
+WITH fires AS (SELECT cell_id, day_id, ignition FROM {nf.LABELS_TABLE} WHERE ignition = 1),
+spine AS (SELECT l.cell_id, l.day_id FROM {nf.LABELS_TABLE} l SEMI JOIN sample_cells USING (cell_id))
+SELECT s.cell_id, s.day_id, {sums}
+FROM spine s
+LEFT JOIN fires f
+  ON f.day_id BETWEEN s.day_id - {max_w} AND s.day_id - 1
+ AND abs(f.cell_id // {N_LON} - s.cell_id // {N_LON}) <= {max_r}
+ AND abs(f.cell_id % {N_LON} - s.cell_id % {N_LON}) <= {max_r}
+GROUP BY s.cell_id, s.day_id
+ORDER BY s.cell_id, s.day_id
+""").fetchdf()
+sql_seconds = time.time() - start
+ours = con.execute(f"""
+SELECT n.* FROM {nf.NEIGHBOR_TABLE} n SEMI JOIN sample_cells USING (cell_id) ORDER BY cell_id, day_id
+""").fetchdf()
+for name in box:
+    assert np.array_equal(ours[name].to_numpy(), ref[name].to_numpy()), name
+print(f"DuckDB self-join on {len(ref):,} cell-days ({len(cells)} cells): {sql_seconds:.2f} s — matches")
+
+print("\n" + "=" * 50)
+print(f"Cube pass (all cells): {build_seconds:.2f} s")
+print(f"Self-join ({len(cells)} cells):  {sql_seconds:.2f} s "
+      f"(~{sql_seconds * N_CELLS / len(cells):.0f} s extrapolated to all cells)")
+print(f"Peak RSS: {peak_rss_mb():.1f} MB")
+print("=" * 50)
+print("Done.")
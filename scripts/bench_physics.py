@@ -0,0 +1,159 @@
+# scripts/bench_physics.py
+# Parity check + benchmark for the vectorized physics kernels (physics.py) against
+# the row-wise code they replaced:
+#   - the hybrid model's fwi_proxy boost, via DataFrame.apply(axis=1)
+#   - nearest-city distance, via DataFrame.apply over a math.haversine generator
+#   - the v2 heuristic risk_score, as pandas column arithmetic for one day at a time
+# The boost kernel is also run over a full grid's worth of rows (5,136 days x 2,601 cells).
+import argparse
+import time
+from datetime import datetime
+from math import atan2, cos, radians, sin, sqrt
+
+import numpy as np
+import pandas as pd
+
+import physics
+from perf_utils import peak_rss_mb
+from utah_grid import N_CELLS, all_cell_ids, cell_latlon
+
+parser = argparse.ArgumentParser(description="Vectorized physics kernels vs row-wise apply")
+parser.add_argument('--rows', type=int, default=200_000, help="rows for the apply comparison")
+parser.add_argument('--grid-days', type=int, default=5136, help="days for the full-grid boost run")
+parser.add_argument('--days', type=int, default=16, help="forecast horizon for the risk score")
+args = parser.parse_args()
+
+print("=== BENCHMARK: VECTORIZED PHYSICS KERNELS ===")
+print(f"Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+rng = np.random.default_rng(0)
+
+
+# ================= REFERENCE: THE ROW-WISE CODE AS IT WAS =================
+def legacy_fwi_boost(row):
+    dryness = max(0, (row['TMAX'] - row['TMIN']) / 20)  # Diurnal range
+    precip_factor = max(0, 1 - row['PRCP'] / 5)  # Low precip boosts
+    wind_factor = min(row['AWND'] / 15, 1.5)  # Cap wind boost
+    dust_factor = row['dust_exposure'] * 2.0
+    fwi = dryness + precip_factor + wind_factor + dust_factor
+    if fwi > 5:
+        boost = 1.0 + min(fwi * 0.1, 0.3)  # Cap boost at +30%
+    else:
+        boost = 1.0
+    return boost
+
+
+def legacy_haversine(lat1, lon1, lat2, lon2):
+    R = 6371  # Earth km
+    dlat, dlon = radians(lat2-lat1), radians(lon2-lon1)
+    a = sin(dlat/2)**2 + cos(radians(lat1)) * cos(radians(lat2)) * sin(dlon/2)**2
+    c = 2 * atan2(sqrt(a), sqrt(1-a))
+    return R * c
+
+
+def legacy_risk(df_grid, tavg, rh, wspd, prcp):
+    df_grid = df_grid.copy()
+    df_grid['vpd_proxy'] = (0.6108 * np.exp(17.27 * tavg / (tavg + 237.3)) * (1 - rh / 100))
+    df_grid['vpd_proxy'] = df_grid['vpd_proxy'].clip(lower=0)
+    df_grid['low_precip_dryness'] = np.where(prcp < 1, 1.0, 0.5)
+    df_grid['dryness'] = df_grid['vpd_proxy'] / df_grid['vpd_proxy'].max()
+    df_grid['precip_factor'] = np.maximum(0, 1 - prcp / 5)
+    df_grid['wind_factor'] = np.minimum(wspd / 20, 1.0)
+    df_grid['dust_factor'] = df_grid['dust_exposure'] * 2.0
+    df_grid['human_factor'] = np.maximum(0, 1 - (df_grid['dist_to_road_km'] + df_grid['dist_to_city_km']) / 20)
+    return ((df_grid['dryness'] + df_grid['precip_factor'] + df_grid['wind_factor'] + df_grid['dust_factor']
+             + df_grid['human_factor'] + df_grid['low_precip_dryness']) / 6).to_numpy()
+
+
+def weather_rows(n):
+    """NOAA standard units as in fire_events_utah_with_weather, after the hybrid script's fillna."""
+    tmin = rng.uniform(-10, 75, n)
+    return pd.DataFrame({
+        'dust_exposure': rng.uniform(0, 1, n) ** 2,
+        'TMAX': tmin + rng.uniform(0, 45, n),
+        'TMIN': tmin,
+        'AWND': rng.gamma(2.0, 5.0, n),
+        'PRCP': rng.gamma(0.3, 0.3, n),
+    })
+
+
+# ================= HYBRID BOOST =================
+df = weather_rows(args.rows)
+start = time.time()
+old = df.apply(legacy_fwi_boost, axis=1).to_numpy()
+apply_s = time.time() - start
+start = time.time()
+new = physics.physics_boost(physics.fwi_proxy(df['TMAX'].values, df['TMIN'].values, df['PRCP'].values,
+                                              df['AWND'].values, df['dust_exposure'].values))
+kernel_s = time.time() - start
+assert np.array_equal(old, new)
+print(f"Hybrid boost ({args.rows:,} rows, {(new > 1).mean():.1%} boosted): identical; "
+      f"apply {apply_s:.2f} s, kernel {kernel_s * 1000:.1f} ms ({apply_s / kernel_s:,.0f}x)")
+
+# Full grid: (days, cells) weather blocks against a (cells,) dust column, a year at a time
+dust = rng.uniform(0, 1, N_CELLS) ** 2
+n_grid = args.grid_days * N_CELLS
+grid_s = 0.0
+n_boosted = 0
+for first in range(0, args.grid_days, 366):
+    n = min(366, args.grid_days - first)
+    w = weather_rows(n * N_CELLS)
+    block = {k: w[k].to_numpy().reshape(n, N_CELLS) for k in ['TMAX', 'TMIN', 'PRCP', 'AWND']}
+    start = time.time()
+    boost = physics.physics_boost(physics.fwi_proxy(block['TMAX'], block['TMIN'], block['PRCP'],
+                                                    block['AWND'], dust))
+    grid_s += time.time() - start
+    n_boosted += int((boost > 1).sum())
+apply_grid_s = apply_s / args.rows * n_grid
+print(f"Hybrid boost, full grid ({n_grid:,} grid-days): kernel {grid_s:.2f} s; "
+      f"apply would take ~{apply_grid_s / 60:.0f} min (extrapolated)")
+
+# ================= NEAREST CITY =================
+cities = [(40.76, -111.89), (40.69, -112.00), (40.23, -111.66), (40.61, -111.94), (40.30, -111.70),
+          (40.59, -111.88), (37.10, -113.58), (41.22, -111.97), (41.06, -111.97), (40.39, -111.85),
+          (41.74, -111.83), (40.56, -111.93)]
+grid_lat, grid_lon = cell_latlon(all_cell_ids())
+df_grid = pd.DataFrame({'grid_lat': grid_lat, 'grid_lon': grid_lon})
+start = time.time()
+old_city = df_grid.apply(
+    lambda row: min(legacy_haversine(row['grid_lat'], row['grid_lon'], city_lat, city_lon)
+                    for city_lat, city_lon in cities), axis=1
+).to_numpy()
+city_apply_s = time.time() - start
+city = np.array(cities)
+start = time.time()
+new_city = physics.nearest_km(grid_lat, grid_lon, city[:, 0], city[:, 1])
+city_kernel_s = time.time() - start
+np.testing.assert_allclose(new_city, old_city, rtol=1e-12)  # math vs NumPy transcendental rounding
+print(f"Nearest city ({N_CELLS:,} cells x {len(cities)} cities): equal to 1e-12; "
+      f"apply {city_apply_s * 1000:.0f} ms, kernel {city_kernel_s * 1000:.2f} ms "
+      f"({city_apply_s / city_kernel_s:,.0f}x)")
+
+# ================= V2 RISK SCORE =================
+df_grid['dust_exposure'] = rng.uniform(0, 1, N_CELLS) ** 3
+df_grid['dist_to_road_km'] = rng.gamma(1.5, 20, N_CELLS)
+df_grid['dist_to_city_km'] = new_city
+shape = (args.days, N_CELLS)
+tavg, rh = rng.uniform(-15, 40, shape), rng.uniform(5, 100, shape)
+wspd, prcp = rng.gamma(2.0, 6.0, shape), rng.gamma(0.5, 3, shape)
+start = time.time()
+old_risk = np.stack([legacy_risk(df_grid, tavg[d], rh[d], wspd[d], prcp[d]) for d in range(args.days)])
+risk_old_s = time.time() - start
+row = lambda name: df_grid[name].values[None, :]
+start = time.time()
+vpd = np.clip(0.6108 * np.exp(17.27 * tavg / (tavg + 237.3)) * (1 - rh / 100), 0, None)
+new_risk = physics.risk_score(vpd, prcp, wspd, row('dust_exposure'), row('dist_to_road_km'),
+                              row('dist_to_city_km'), np.where(prcp < 1, 1.0, 0.5))
+risk_new_s = time.time() - start
+assert np.array_equal(old_risk, new_risk)
+print(f"v2 risk score ({args.days} days x {N_CELLS:,} cells): identical; "
+      f"pandas per day {risk_old_s * 1000:.0f} ms, kernel {risk_new_s * 1000:.1f} ms "
+      f"({risk_old_s / risk_new_s:,.0f}x)")
+
+print("\n" + "=" * 50)
+print(f"Hybrid boost:  {args.rows / apply_s / 1e6:.2f}M -> {args.rows / kernel_s / 1e6:.0f}M rows/s; "
+      f"full grid {grid_s:.2f} s (apply ~{apply_grid_s / 60:.0f} min)")
+print(f"Nearest city:  {city_apply_s * 1000:.0f} ms -> {city_kernel_s * 1000:.2f} ms")
+print(f"v2 risk score: {risk_old_s * 1000:.0f} ms -> {risk_new_s * 1000:.1f} ms")
+print(f"Peak RSS: {peak_rss_mb():.1f} MB")
+print("=" * 50)
+print("Done.")
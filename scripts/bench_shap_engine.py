@@ -0,0 +1,152 @@
+# scripts/bench_shap_engine.py
+# Benchmark + parity check for shap_engine.py on a classifier with the training
+# script's settings (200 trees, depth 7) and a synthetic test split.
+#
+# Baseline: shap.Explainer(model)(X_test) on the whole split, as the training
+# scripts did, timed on a slice and extrapolated. Engine: stratified sample
+# explained in chunks across the process pool, the cached re-run, and single-cell
+# explanations for popups. Parity: the engine's values equal TreeExplainer's on
+# the same rows, and SHAP values + base value add up to the model's log-odds.
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import shap
+from joblib import dump, load
+from xgboost import XGBClassifier
+
+import shap_engine
+from features import FEATURES
+from perf_utils import peak_rss_mb
+
+parser = argparse.ArgumentParser(description="Benchmark the cached, parallel TreeSHAP engine")
+parser.add_argument('--train-rows', type=int, default=200_000)
+parser.add_argument('--test-rows', type=int, default=2_000_000, help="size of the test split being explained")
+parser.add_argument('--baseline-rows', type=int, default=5000, help="rows timed for the full-split extrapolation")
+parser.add_argument('--sample', type=int, default=shap_engine.SAMPLE_ROWS)
+parser.add_argument('--interactions', type=int, default=shap_engine.INTERACTION_ROWS)
+parser.add_argument('--workers', type=int, default=shap_engine.WORKERS)
+args = parser.parse_args()
+
+print("=== BENCHMARK: CACHED PARALLEL TREESHAP ENGINE ===")
+print(f"Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+
+work = tempfile.mkdtemp(prefix='shap_engine_bench_')
+os.chdir(work)  # SHAP stores and cache/shap/ land here
+rng = np.random.default_rng(0)
+
+
+def synthetic(n):
+    X = pd.DataFrame({
+        'dist_to_road_km': rng.gamma(1.5, 20, n),
+        'month': rng.integers(1, 13, n),
+        'vpd_proxy': rng.gamma(2.0, 0.6, n),
+        'dryness_proxy': np.ones(n),
+        'low_precip_dryness': rng.choice([0.5, 1.0], n, p=[0.3, 0.7]),
+        'grid_lat': np.round(rng.uniform(37, 42, n), 1),
+        'grid_lon': np.round(rng.uniform(-114, -109, n), 1),
+    }, columns=FEATURES).astype(np.float32)
+    logit = (-5.5 + 0.8 * X['vpd_proxy'] + 0.9 * (X['low_precip_dryness'] == 1)
+             - 0.02 * X['dist_to_road_km'] + 0.8 * X['month'].between(6, 9))
+    y = (rng.random(n) < 1 / (1 + np.exp(-logit))).astype(np.int8)
+    return X, y
+
+
+X_train, y_train = synthetic(args.train_rows)
+X_test, y_test = synthetic(args.test_rows)
+print(f"Synthetic: {len(X_train):,} training rows, {len(X_test):,} test rows ({y_test.mean():.2%} ignitions)")
+
+start = time.time()
+model = XGBClassifier(n_estimators=200, learning_rate=0.05, max_depth=7, random_state=42, tree_method='hist',
+                      scale_pos_weight=(y_train == 0).sum() / max((y_train == 1).sum(), 1))
+model.fit(X_train, y_train)
+print(f"Trained classifier in {time.time() - start:.1f} s")
+dump(model, 'risk_classifier_model.joblib')
+
+# ================= BASELINE: WHOLE TEST SPLIT =================
+start = time.time()
+shap.Explainer(model)(X_test.iloc[:args.baseline_rows])
+baseline_per_row = (time.time() - start) / args.baseline_rows
+baseline_seconds = baseline_per_row * len(X_test)
+print(f"shap.Explainer on the whole split: {baseline_per_row * 1e3:.2f} ms/row -> "
+      f"~{baseline_seconds:,.0f} s for {len(X_test):,} rows (extrapolated from {args.baseline_rows:,})")
+
+# ================= ENGINE =================
+timings = {}
+for workers in sorted({1, args.workers}):
+    start = time.time()
+    arrays, meta = shap_engine.explain_sample(model, X_test, y_test, strata=X_test['month'],
+                                              model_path='risk_classifier_model.joblib', n=args.sample,
+                                              n_interactions=args.interactions, workers=workers, force=True)
+    timings[workers] = time.time() - start
+    print(f"Engine, {workers} worker(s): {timings[workers]:.1f} s for {len(arrays['X']):,} SHAP rows "
+          f"+ {len(arrays['interaction_rows']):,} interaction rows")
+
+start = time.time()
+cached, _ = shap_engine.explain_sample(model, X_test, y_test, strata=X_test['month'],
+                                       model_path='risk_classifier_model.joblib', n=args.sample,
+                                       n_interactions=args.interactions)
+cached_seconds = time.time() - start
+assert np.array_equal(cached['shap_values'], arrays['shap_values'])
+print(f"Re-run, same model: {cached_seconds:.2f} s (loaded from risk_classifier_model.shap/)")
+
+# A reloaded model is the same version; retrained trees are a new one
+assert shap_engine.model_version(load('risk_classifier_model.joblib')) == meta['model_version']
+other = XGBClassifier(n_estimators=10, max_depth=3).fit(X_train.iloc[:10000], y_train[:10000])
+assert shap_engine.model_version(other) != meta['model_version']
+
+# ================= SAMPLE =================
+y_s = np.asarray(arrays['y'])
+w = np.asarray(arrays['weights'])
+months = np.asarray(arrays['X'])[:, FEATURES.index('month')]
+assert set(months) == set(X_test['month'])
+weighted_rate = (w * y_s).sum() / w.sum()
+assert np.isclose(weighted_rate, y_test.mean(), rtol=1e-4)
+print(f"Sample: {y_s.sum():,} ignitions of {len(y_s):,} rows (test split {y_test.mean():.2%}), all 12 months; "
+      f"weighted ignition rate {weighted_rate:.4%} = split rate")
+
+# ================= PARITY =================
+X_sample = pd.DataFrame(arrays['X'], columns=FEATURES)
+explainer = shap.TreeExplainer(model)
+np.testing.assert_allclose(arrays['shap_values'], explainer.shap_values(X_sample), atol=1e-6)
+X_inter = X_sample.iloc[arrays['interaction_rows']]
+np.testing.assert_allclose(arrays['interaction_values'], explainer.shap_interaction_values(X_inter), atol=1e-6)
+margin = model.predict(X_sample, output_margin=True)
+np.testing.assert_allclose(np.asarray(arrays['shap_values']).sum(axis=1) + meta['expected_value'], margin,
+                           atol=1e-4)
+np.testing.assert_allclose(np.asarray(arrays['interaction_values']).sum(axis=2), arrays['shap_values'][
+    arrays['interaction_rows']], atol=1e-4)
+print("Parity: SHAP + interaction values equal TreeExplainer; values + base = model log-odds")
+
+# ================= PER-CELL EXPLANATIONS =================
+start = time.time()
+cells = shap_engine.CellExplainer(load('risk_classifier_model.joblib'), 'risk_classifier_model.joblib')
+load_ms = (time.time() - start) * 1000
+latencies = []
+for i in rng.integers(0, len(X_test), 200):
+    start = time.perf_counter()
+    drivers = cells.top_drivers(X_test.iloc[[i]], k=3)[0]
+    latencies.append((time.perf_counter() - start) * 1000)
+    assert np.isclose(drivers[0]['shap'], explainer.shap_values(X_test.iloc[[i]])[0][
+        FEATURES.index(drivers[0]['feature'])], atol=1e-6)
+start = time.time()
+cells.top_drivers(X_test.iloc[:200], k=3)
+batch_ms = (time.time() - start) * 1000
+print(f"Per-cell: explainer loaded in {load_ms:.0f} ms; one cell p50 {np.percentile(latencies, 50):.1f} ms, "
+      f"p99 {np.percentile(latencies, 99):.1f} ms; 200 popups in one call {batch_ms:.0f} ms")
+
+os.chdir(os.path.dirname(work))
+shutil.rmtree(work)
+print("\n" + "=" * 50)
+print(f"Whole-split SHAP (old): ~{baseline_seconds:,.0f} s (extrapolated)")
+for workers, seconds in timings.items():
+    print(f"Engine, {workers} worker(s):  {seconds:.1f} s ({baseline_seconds / seconds:,.0f}x faster)")
+print(f"Engine, cached:       {cached_seconds:.2f} s")
+print(f"Peak RSS: {peak_rss_mb():.1f} MB")
+print("=" * 50)
+print("Done.")
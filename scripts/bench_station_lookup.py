@@ -0,0 +1,64 @@
+# scripts/bench_station_lookup.py
+# Benchmark: KD-tree nearest-reporting-station lookup vs the old fires x stations cdist
+import argparse
+import time
+from datetime import datetime
+
+import duckdb
+import numpy as np
+import pandas as pd
+from scipy.spatial.distance import cdist
+
+from station_lookup import lookup_weather
+from noaa_station_days import load_station_days
+from perf_utils import peak_rss_mb
+
+parser = argparse.ArgumentParser(description="Benchmark the NOAA nearest-station lookup")
+parser.add_argument('--db', default='eco_pyric.duckdb')
+parser.add_argument('--table', default='fire_events', help="fire table to look up (western US by default)")
+parser.add_argument('--synthetic', type=int, default=None,
+                    help="use N random fires over the station dates instead of --table")
+parser.add_argument('--cdist-sample', type=int, default=20000, help="fires used to time the cdist baseline")
+args = parser.parse_args()
+
+print("=== BENCHMARK: NEAREST REPORTING STATION ===")
+print(f"Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+
+con = duckdb.connect(args.db)
+station_days = load_station_days(con)
+station_days['DATE'] = station_days['DATE'].dt.date
+n_stations = station_days['STATION'].nunique()
+weather_vars = ['TAVG', 'TMAX', 'TMIN', 'PRCP', 'AWND']
+
+if args.synthetic:
+    rng = np.random.default_rng(0)
+    dates = np.array(sorted(station_days['DATE'].unique()))
+    fires = pd.DataFrame({
+        'latitude': rng.uniform(37, 42, args.synthetic),
+        'longitude': rng.uniform(-114, -109, args.synthetic),
+        'acq_date': dates[rng.integers(0, len(dates), args.synthetic)]
+    })
+else:
+    fires = con.execute(f"SELECT latitude, longitude, acq_date FROM {args.table}").fetchdf()
+con.close()
+print(f"{len(fires):,} fires x {n_stations:,} stations")
+
+start = time.time()
+_, hit_rate = lookup_weather(fires, station_days, weather_vars)
+kdtree_seconds = time.time() - start
+
+sample = fires[['latitude', 'longitude']].values[:args.cdist_sample]
+station_coords = station_days[['LATITUDE', 'LONGITUDE']].drop_duplicates().values
+start = time.time()
+cdist(sample, station_coords).argmin(axis=1)
+cdist_seconds = (time.time() - start) * len(fires) / max(len(sample), 1)
+
+print("\n" + "=" * 50)
+print(f"KD-tree lookup ({len(weather_vars)} vars, with fallback): {kdtree_seconds:.1f} s "
+      f"({len(fires) / kdtree_seconds:,.0f} fires/s)")
+print(f"cdist nearest only (extrapolated from {len(sample):,}): {cdist_seconds:.1f} s, "
+      f"distance matrix {len(fires) * len(station_coords) * 8 / 1024**3:.2f} GB")
+print("Hit rate: " + ", ".join(f"{var} {rate:.1%}" for var, rate in hit_rate.items()))
+print(f"Peak RSS: {peak_rss_mb():.1f} MB")
+print("=" * 50)
+print("Done.")
@@ -0,0 +1,156 @@
+# scripts/bench_update_nrt.py
+# Benchmark + parity check for update_nrt.py at full scale (~3M western-US
+# detections, 5,136 days x 2,601 cells of labels): the full rebuild a new NRT
+# day used to need (re-ingest, Utah filter, labels, cube, neighbour features)
+# against the incremental update. The NRT file re-sends its last days, so the
+# update also has to skip detections it already has. Parity: after the update,
+# labels and neighbour features equal a full rebuild.
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from datetime import datetime
+
+import duckdb
+import numpy as np
+import pandas as pd
+
+import neighbor_fires
+import update_nrt
+from firms_parquet import CONFIDENCE_EXCLUDE, MAX_LAT, MAX_LON, MIN_LAT, MIN_LON
+from label_cube import EVERY_DETECTION, FIRST_DAY_ONLY, LABEL_CUBE_DIR, LabelCube, set_label_mode
+from perf_utils import peak_rss_mb
+from utah_grid import IN_GRID_SQL, N_CELLS, register_grid_macros
+
+parser = argparse.ArgumentParser(description="Benchmark the incremental NRT update")
+parser.add_argument('--rows', type=int, default=3_000_000)
+parser.add_argument('--days', type=int, default=5136)
+parser.add_argument('--nrt-days', type=int, default=60, help="days covered by the NRT file")
+args = parser.parse_args()
+
+print("=== BENCHMARK: INCREMENTAL NRT UPDATE ===")
+print(f"Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+
+work = tempfile.mkdtemp(prefix='update_nrt_bench_')
+os.chdir(work)  # update_nrt writes the label cube to data/label_cube/
+rng = np.random.default_rng(0)
+dates = pd.date_range('2012-01-20', periods=args.days + 1)
+
+
+def detections(n, day_lo, day_hi):
+    return pd.DataFrame({
+        'latitude': np.round(rng.uniform(30.5, 49.5, n), 5),
+        'longitude': np.round(rng.uniform(-125.5, -101.5, n), 5),
+        'brightness': np.round(rng.uniform(295, 367, n), 2),
+        'acq_date': dates[np.sort(rng.integers(day_lo, day_hi, n))].strftime('%Y-%m-%d'),
+        'acq_time': rng.integers(0, 2400, n),
+        'confidence': rng.choice(['l', 'n', 'h'], n, p=[0.1, 0.8, 0.1]),
+        'frp': np.round(rng.gamma(1.2, 5.0, n), 2),
+    })
+
+
+# Archive up to the NRT window; the NRT file covers the last nrt_days (today's day comes later)
+per_day = args.rows // args.days
+archive = detections(per_day * (args.days - args.nrt_days), 0, args.days - args.nrt_days)
+nrt = detections(per_day * args.nrt_days, args.days - args.nrt_days, args.days)
+overlap = archive[archive['acq_date'] >= dates[args.days - args.nrt_days - 5].strftime('%Y-%m-%d')]
+archive_csv, nrt_csv = os.path.join(work, 'fire_archive_SV-C2_1.csv'), os.path.join(work, 'fire_nrt_SV-C2_1.csv')
+archive.to_csv(archive_csv, index=False)
+pd.concat([overlap, nrt]).to_csv(nrt_csv, index=False)  # archive's last days re-sent in NRT
+print(f"Synthetic: {len(archive):,} archive + {len(nrt):,} NRT detections (+{len(overlap):,} overlapping)")
+
+con = duckdb.connect(os.path.join(work, 'bench.duckdb'))
+register_grid_macros(con)
+
+
+def full_rebuild(csv_files):
+    """The pre-incremental pipeline: 1_ingest (table mode) -> filter_utah_fires -> labels (sql) -> cube -> neighbours."""
+    con.execute("CREATE OR REPLACE TABLE fire_events (source_file VARCHAR, latitude DOUBLE, longitude DOUBLE, "
+                "acq_date VARCHAR, acq_time SMALLINT, brightness DOUBLE, frp DOUBLE, confidence VARCHAR)")
+    for csv_file in csv_files:
+        con.execute(f"""
+        INSERT INTO fire_events
+        SELECT '{os.path.basename(csv_file)}', latitude, longitude, acq_date, acq_time, brightness, frp, confidence
+        FROM read_csv_auto('{csv_file}', types={{'acq_date': 'VARCHAR'}})
+        WHERE latitude BETWEEN {MIN_LAT} AND {MAX_LAT}
+          AND longitude BETWEEN {MIN_LON} AND {MAX_LON}
+          AND confidence != '{CONFIDENCE_EXCLUDE}'
+        """)
+    con.execute(f"CREATE OR REPLACE TABLE fire_events_utah AS SELECT * FROM fire_events "
+                f"WHERE {update_nrt.UTAH_BBOX_SQL}")
+    min_day, max_day = con.execute(f"SELECT MIN(date_to_day(acq_date)), MAX(date_to_day(acq_date)) "
+                                   f"FROM fire_events_utah WHERE {IN_GRID_SQL}").fetchone()
+    con.execute(f"""
+    CREATE OR REPLACE TABLE utah_grid_ignition_labels AS
+    WITH fires AS (
+        SELECT DISTINCT latlon_to_cell(latitude, longitude) AS cell_id, date_to_day(acq_date) AS day_id
+        FROM fire_events_utah WHERE {IN_GRID_SQL}
+    )
+    SELECT CAST(c AS SMALLINT) AS cell_id, CAST(d AS SMALLINT) AS day_id,
+           CAST(f.cell_id IS NOT NULL AS TINYINT) AS ignition
+    FROM range({N_CELLS}) AS cells(c)
+    CROSS JOIN range({min_day}, {max_day + 1}) AS days(d)
+    LEFT JOIN fires f ON f.cell_id = c AND f.day_id = d
+    ORDER BY cell_id, day_id
+    """)
+    set_label_mode(con, 'utah_grid_ignition_labels', EVERY_DETECTION)
+    LabelCube.from_table(con, 'utah_grid_ignition_labels').save(LABEL_CUBE_DIR, label_mode=EVERY_DETECTION)
+    neighbor_fires.build(con)
+
+
+# ================= YESTERDAY'S STATE =================
+start = time.time()
+full_rebuild([archive_csv, nrt_csv])
+rebuild_seconds = time.time() - start
+n_labels = con.execute("SELECT COUNT(*) FROM utah_grid_ignition_labels").fetchone()[0]
+print(f"Full rebuild: {rebuild_seconds:.2f} s ({n_labels:,} label rows)")
+
+# ================= TODAY: ONE NEW DAY IN THE NRT FILE =================
+today = detections(per_day, args.days, args.days + 1)
+late = detections(per_day // 10, args.days - 2, args.days)  # late detections for the last two days
+pd.concat([overlap, nrt, late, today]).to_csv(nrt_csv, index=False)
+start = time.time()
+report = update_nrt.update(con, [nrt_csv])
+update_seconds = time.time() - start
+for stage, summary in report.items():
+    print(f"  {stage}: {summary}")
+print(f"Incremental update: {update_seconds:.2f} s")
+
+start = time.time()
+report = update_nrt.update(con, [nrt_csv])
+rerun_seconds = time.time() - start
+assert report['fire_events'] == '+0 rows', report
+print(f"Re-run, same file: {rerun_seconds:.2f} s, nothing added")
+
+# ================= PARITY WITH A FULL REBUILD =================
+con.execute("CREATE TABLE inc_labels AS SELECT * FROM utah_grid_ignition_labels")
+con.execute("CREATE TABLE inc_neighbors AS SELECT * FROM utah_grid_neighbor_fires")
+n_events = con.execute("SELECT COUNT(*) FROM fire_events").fetchone()[0]
+full_rebuild([archive_csv, nrt_csv])
+# Same rows as re-ingesting both files: nothing the update had already seen was added again
+assert n_events == con.execute("SELECT COUNT(*) FROM fire_events").fetchone()[0]
+for inc, full in [('inc_labels', 'utah_grid_ignition_labels'), ('inc_neighbors', 'utah_grid_neighbor_fires')]:
+    diff = con.execute(f"SELECT COUNT(*) FROM (SELECT * FROM {inc} EXCEPT ALL SELECT * FROM {full})").fetchone()[0]
+    rows = con.execute(f"SELECT COUNT(*) FROM {inc}").fetchone()[0]
+    assert diff == 0 and rows == con.execute(f"SELECT COUNT(*) FROM {full}").fetchone()[0], inc
+print("Parity: labels and neighbour features equal a full rebuild")
+
+# A first-day-only labels table is refused, not mixed with every-detection rows
+set_label_mode(con, 'utah_grid_ignition_labels', FIRST_DAY_ONLY)
+n_ignitions = con.execute("SELECT SUM(ignition) FROM utah_grid_ignition_labels").fetchone()[0]
+pd.concat([overlap, nrt, late, today, detections(per_day, args.days - 1, args.days + 1)]).to_csv(nrt_csv, index=False)
+report = update_nrt.update(con, [nrt_csv])
+assert report['utah_grid_ignition_labels'].startswith('REFUSED'), report
+assert n_ignitions == con.execute("SELECT SUM(ignition) FROM utah_grid_ignition_labels").fetchone()[0]
+print("First-day-only labels: refused, table unchanged")
+
+con.close()
+os.chdir(os.path.dirname(work))
+shutil.rmtree(work)
+print("\n" + "=" * 50)
+print(f"Full rebuild:       {rebuild_seconds:.2f} s")
+print(f"Incremental update: {update_seconds:.2f} s ({rebuild_seconds / update_seconds:.0f}x faster)")
+print(f"Peak RSS: {peak_rss_mb():.1f} MB")
+print("=" * 50)
+print("Done.")
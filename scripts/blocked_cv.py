@@ -0,0 +1,245 @@
+# scripts/blocked_cv.py
+# Spatio-temporal blocked cross-validation for the daily ignition classifier.
+#
+# A random split of grid-days puts neighbouring cells of the same day (often the
+# same fire) on both sides, so its AUC is optimistic. Here folds are whole blocks:
+#
+#   year        years split into K contiguous runs; a fold tests on one run
+#   space       1° blocks of cells (10 x 10) dealt into K folds; training drops cells
+#               within --buffer cells of the test blocks
+#   space-time  test = fold k's years x fold k's blocks; training = other years x other
+#               blocks (minus the buffer), so no test cell-day has a same-day or
+#               adjacent-cell twin in training
+#   random      the old per-row hash split, for comparison
+#
+# The feature matrix is built once into the on-disk feature cache (feature_cache.py)
+# and every fold process opens it with mmap, so folds share the page cache instead
+# of each holding a copy. Folds train concurrently in a process pool with an
+# nthread budget each (--threads / --parallel). A fold's peak memory is its own
+# process's high-water mark, restarted when the fold begins (perf_utils); it
+# counts the mmap'd matrix pages the fold touches, which other folds share.
+# Reports per-fold AUC, PR-AUC, training time and peak memory, and writes them
+# to plots/blocked_cv_<scheme>.csv.
+#
+#   python scripts/blocked_cv.py --scheme space-time random --folds 5 --parallel 5
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import duckdb
+import numpy as np
+import pandas as pd
+from scipy.ndimage import binary_dilation
+
+import feature_cache
+from features import FEATURES
+from perf_utils import peak_rss_mb, reset_peak_rss
+from sampling import sample_training_rows
+from training_data import SPLIT_SEED, TRAIN_QUERY, derive_features, split_hash
+from utah_grid import N_LAT, N_LON, date_from_day_id
+from weather_cube import open_cube
+
+DB_PATH = 'eco_pyric.duckdb'
+SCHEMES = ['year', 'space', 'space-time', 'random']
+N_FOLDS = 5
+BLOCK_CELLS = 10           # spatial block edge, in cells (1°)
+BUFFER_CELLS = 1           # training cells dropped around the test blocks
+FOLD_SEED = 42
+
+# Same settings as the training scripts
+XGB_PARAMS = {'n_estimators': 200, 'learning_rate': 0.05, 'max_depth': 7, 'random_state': 42,
+              'tree_method': 'hist'}
+
+
+# ================= FOLDS =================
+def year_of(day_id):
+    return date_from_day_id(day_id).astype('datetime64[Y]').astype(np.int64) + 1970
+
+
+def block_of(cell_id, block_cells=BLOCK_CELLS):
+    """Spatial block per cell: (lat_idx // b, lon_idx // b) flattened."""
+    cell_id = np.asarray(cell_id, dtype=np.int64)
+    n_block_lon = -(-N_LON // block_cells)
+    return (cell_id // N_LON) // block_cells * n_block_lon + (cell_id % N_LON) // block_cells
+
+
+def fold_plan(day_id, n_folds=N_FOLDS, block_cells=BLOCK_CELLS, seed=FOLD_SEED):
+    """Fold of every year (contiguous runs) and of every spatial block (shuffled, dealt round-robin)."""
+    years = np.unique(year_of(np.unique(day_id)))
+    year_fold = {int(y): k for k, run in enumerate(np.array_split(years, n_folds)) for y in run}
+    n_blocks = int(block_of(np.arange(N_LAT * N_LON), block_cells).max()) + 1
+    block_fold = np.empty(n_blocks, dtype=np.int64)
+    block_fold[np.random.default_rng(seed).permutation(n_blocks)] = np.arange(n_blocks) % n_folds
+    return {'n_folds': n_folds, 'block_cells': block_cells, 'year_fold': year_fold,
+            'block_fold': block_fold.tolist()}
+
+
+def _buffered_cells(test_cells, buffer):
+    """Cells within `buffer` cells (Chebyshev) of a test cell, test cells included."""
+    grid = np.zeros((N_LAT, N_LON), dtype=bool)
+    grid.flat[test_cells] = True
+    if buffer > 0:
+        grid = binary_dilation(grid, structure=np.ones((3, 3), dtype=bool), iterations=buffer)
+    return np.flatnonzero(grid)
+
+
+def fold_masks(cell_id, day_id, scheme, fold, plan, buffer=BUFFER_CELLS):
+    """(train, test) boolean masks over the rows for one fold."""
+    k = fold
+    if scheme == 'random':
+        row_fold = (split_hash(cell_id, day_id, SPLIT_SEED) * plan['n_folds']).astype(np.int64)
+        return row_fold != k, row_fold == k
+
+    cell_in_test = np.zeros(N_LAT * N_LON, dtype=bool)
+    cell_block = block_of(np.arange(N_LAT * N_LON), plan['block_cells'])
+    cell_in_test[np.asarray(plan['block_fold'])[cell_block] == k] = True
+    cell_near_test = np.zeros_like(cell_in_test)
+    cell_near_test[_buffered_cells(np.flatnonzero(cell_in_test), buffer)] = True
+
+    # Years -> folds through a per-year lookup, so the per-row work is one gather
+    years = year_of(day_id)
+    year_min = int(years.min())
+    fold_by_year = np.full(int(years.max()) - year_min + 1, -1, dtype=np.int64)
+    for y, f in plan['year_fold'].items():
+        if year_min <= int(y) < year_min + len(fold_by_year):
+            fold_by_year[int(y) - year_min] = f
+    year_test = fold_by_year[years - year_min] == k
+
+    cell_id = np.asarray(cell_id, dtype=np.int64)
+    if scheme == 'year':
+        return ~year_test, year_test
+    if scheme == 'space':
+        return ~cell_near_test[cell_id], cell_in_test[cell_id]
+    if scheme == 'space-time':
+        return ~year_test & ~cell_near_test[cell_id], year_test & cell_in_test[cell_id]
+    raise ValueError(f"unknown scheme {scheme}")
+
+
+# ================= ONE FOLD (pool worker) =================
+def run_fold(key, cache_dir, scheme, fold, plan, buffer, nthread, neg_fraction):
+    """Train + score one fold from the memory-mapped cache entry; runs in its own process."""
+    from sklearn.metrics import average_precision_score, roc_auc_score
+    from xgboost import XGBClassifier
+
+    # ru_maxrss is inherited from the parent; measure this fold from here on
+    reset_peak_rss()
+    arrays, _ = feature_cache.load_matrices(key, cache_dir)
+    cell_id, day_id = arrays['cell_id'], arrays['day_id']
+    train, test = fold_masks(cell_id, day_id, scheme, fold, plan, buffer)
+    X_train, y_train = arrays['X'][train], np.asarray(arrays['y'][train])
+    w_train = None
+    if neg_fraction < 1:
+        X_train, y_train, w_train, _ = sample_training_rows(X_train, y_train, cell_id[train], day_id[train],
+                                                            neg_fraction)
+
+    n_pos = int(y_train.sum())
+    result = {'scheme': scheme, 'fold': fold, 'train_rows': len(y_train), 'test_rows': int(test.sum()),
+              'test_pos': int(arrays['y'][test].sum())}
+    if n_pos == 0 or result['test_pos'] == 0 or result['test_pos'] == result['test_rows']:
+        return {**result, 'auc': np.nan, 'pr_auc': np.nan, 'train_s': 0.0, 'peak_rss_mb': peak_rss_mb()}
+
+    model = XGBClassifier(**XGB_PARAMS, n_jobs=nthread, scale_pos_weight=(len(y_train) - n_pos) / n_pos)
+    start = time.time()
+    model.fit(X_train, y_train, sample_weight=w_train)
+    train_s = time.time() - start
+    del X_train
+
+    y_test = np.asarray(arrays['y'][test])
+    proba = model.predict_proba(arrays['X'][test])[:, 1]
+    return {**result, 'test_rate': float(y_test.mean()), 'auc': roc_auc_score(y_test, proba),
+            'pr_auc': average_precision_score(y_test, proba), 'train_s': train_s, 'peak_rss_mb': peak_rss_mb()}
+
+
+# ================= FEATURE MATRIX =================
+def build_matrix(con, cube, no_cache=False):
+    """Cache key of the (X, y, cell_id, day_id) entry for every grid-day, building it if needed."""
+    key = feature_cache.cache_key(feature_cache.source_fingerprint(con, TRAIN_QUERY), FEATURES, None,
+                                  purpose='blocked_cv', weather=cube.fingerprint if cube is not None else None)
+    if not no_cache and feature_cache.load_matrices(key)[1] is not None:
+        print(f"Opened cached feature matrix {key} (mmap)")
+        return key
+
+    df = con.execute(TRAIN_QUERY).fetchdf()
+    print(f"Loaded {len(df):,} grid-days; deriving features...")
+    X = derive_features(df['cell_id'].values, df['day_id'].values, df['dist_to_road_km'].values, cube)
+    feature_cache.save_matrices(key, {'X': X, 'y': df['ignition'].values.astype(np.int8),
+                                      'cell_id': df['cell_id'].values.astype(np.int16),
+                                      'day_id': df['day_id'].values.astype(np.int16)},
+                                meta={'features': FEATURES, 'query': TRAIN_QUERY, 'purpose': 'blocked_cv'})
+    print(f"Cached feature matrix as {key}")
+    return key
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Spatio-temporal blocked CV for the ignition classifier")
+    parser.add_argument('--db', default=DB_PATH)
+    parser.add_argument('--scheme', nargs='+', default=['space-time', 'random'], choices=SCHEMES)
+    parser.add_argument('--folds', type=int, default=N_FOLDS)
+    parser.add_argument('--block-cells', type=int, default=BLOCK_CELLS, help="spatial block edge in cells")
+    parser.add_argument('--buffer', type=int, default=BUFFER_CELLS, help="cells dropped around test blocks")
+    parser.add_argument('--parallel', type=int, default=None, help="folds trained at once (default: all)")
+    parser.add_argument('--threads', type=int, default=os.cpu_count() or 1, help="total XGBoost thread budget")
+    parser.add_argument('--neg-fraction', type=float, default=1.0,
+                        help="downsample non-ignition training rows per fold (sampling.py), 1.0 = all")
+    parser.add_argument('--no-cache', action='store_true')
+    args = parser.parse_args()
+
+    print("=== BLOCKED CROSS-VALIDATION: DAILY IGNITION CLASSIFIER ===")
+    print(f"Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+
+    con = duckdb.connect(args.db, read_only=True)
+    cube = open_cube()
+    print(f"Weather: {'NOAA cube ' + cube.fingerprint if cube is not None else 'placeholders (tavg=10, prcp=0)'}")
+    key = build_matrix(con, cube, args.no_cache)
+    con.close()
+
+    arrays, _ = feature_cache.load_matrices(key)
+    day_id = np.asarray(arrays['day_id'])
+    n_years = len(np.unique(year_of(np.unique(day_id))))
+    print(f"Spatial blocks: {args.block_cells}x{args.block_cells} cells, buffer {args.buffer} cell(s); "
+          f"{n_years} year(s) of grid-days")
+
+    os.makedirs('plots', exist_ok=True)
+    summary = []
+    for scheme in args.scheme:
+        # Time-blocked schemes can't have more folds than years
+        n_folds = min(args.folds, n_years) if scheme in ('year', 'space-time') else args.folds
+        plan = fold_plan(day_id, n_folds, args.block_cells)
+        parallel = max(1, min(args.parallel or n_folds, n_folds))
+        nthread = max(1, args.threads // parallel)
+        runs = {}
+        for y, k in sorted(plan['year_fold'].items()):
+            runs.setdefault(k, []).append(y)
+        print(f"\n--- {scheme}: {n_folds} folds, {parallel} at a time x {nthread} thread(s) ---")
+        if scheme in ('year', 'space-time'):
+            print(f"Year folds: {', '.join(f'{k}: {v[0]}-{v[-1]}' for k, v in runs.items())}")
+
+        start = time.time()
+        # A fresh process per fold; the mmap'd matrix is shared through the page cache
+        with ProcessPoolExecutor(max_workers=parallel, max_tasks_per_child=1) as pool:
+            futures = [pool.submit(run_fold, key, feature_cache.CACHE_DIR, scheme, k, plan, args.buffer,
+                                   nthread, args.neg_fraction) for k in range(n_folds)]
+            results = pd.DataFrame([f.result() for f in futures])
+        wall = time.time() - start
+
+        print(results[['fold', 'train_rows', 'test_rows', 'test_pos', 'auc', 'pr_auc', 'train_s',
+                       'peak_rss_mb']].round(4).to_string(index=False))
+        print(f"AUC {results['auc'].mean():.4f} ± {results['auc'].std():.4f}, "
+              f"PR-AUC {results['pr_auc'].mean():.4f} ± {results['pr_auc'].std():.4f}; "
+              f"wall {wall:.1f} s (fold training total {results['train_s'].sum():.1f} s)")
+        results.to_csv(f"plots/blocked_cv_{scheme}.csv", index=False)
+        summary.append((scheme, results['auc'].mean(), results['pr_auc'].mean(), wall))
+
+    print("\n" + "=" * 50)
+    for scheme, auc, pr_auc, wall in summary:
+        print(f"{scheme:>10}: AUC {auc:.4f}, PR-AUC {pr_auc:.4f} ({wall:.1f} s)")
+    print(f"Peak RSS, this process: {peak_rss_mb():.1f} MB (fold peaks above are per fold)")
+    print("Per-fold results: plots/blocked_cv_<scheme>.csv")
+    print("=" * 50)
+    print("Done.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+# scripts/build_weather_cube.py
+# Build the (days x cells) NOAA weather cube used by training / forecasting.
+#
+#   python scripts/build_weather_cube.py
+#
+# Reads station-days from data/weather_noaa/ (via the noaa_station_days table), interpolates TAVG/TMAX/TMIN/PRCP/AWND
+# onto every grid cell for every day since EPOCH_START, and writes
+# data/weather_cube/<VAR>.npy (float32, mmap-able) + meta.json.
+import argparse
+import hashlib
+import json
+import os
+import time
+from datetime import datetime
+
+import duckdb
+import numpy as np
+import pandas as pd
+
+from utah_grid import N_CELLS, EPOCH_START, all_cell_ids, cell_latlon
+from perf_utils import peak_rss_mb
+import weather_cube as wc
+import antecedent_dryness
+
+parser = argparse.ArgumentParser(description="Interpolate NOAA station weather onto the Utah grid")
+parser.add_argument('--db', default='eco_pyric.duckdb')
+parser.add_argument('--weather-dir', default=wc.WEATHER_DIR)
+parser.add_argument('--out', default=wc.CUBE_DIR)
+parser.add_argument('--day-chunk', type=int, default=1024, help="days interpolated per pass")
+args = parser.parse_args()
+
+print("=== BUILDING NOAA WEATHER CUBE ===")
+print(f"Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+start = time.time()
+
+# ================= STATIONS =================
+con = duckdb.connect(args.db)
+station_days = wc.load_station_days(con, args.weather_dir)
+stations = wc.station_table(station_days)
+print(f"Loaded {len(station_days):,} station-days from {len(stations):,} stations")
+
+# ================= CELLS =================
+tables = {t[0] for t in con.execute("SHOW TABLES").fetchall()}
+
+cell_ids = all_cell_ids()
+cell_lat, cell_lon = cell_latlon(cell_ids)
+
+if 'utah_grid_cell_elevation' in tables:
+    elev = con.execute("SELECT cell_id, elevation_m FROM utah_grid_cell_elevation").fetchdf()
+    cell_elev = np.full(N_CELLS, np.nan)
+    cell_elev[elev['cell_id'].values] = elev['elevation_m'].values
+    print("Cell elevations: utah_grid_cell_elevation")
+else:
+    cell_elev = np.full(N_CELLS, np.nan)
+    print("WARNING: utah_grid_cell_elevation not found (run add_cell_elevation.py) — "
+          "using station-interpolated elevations, so the lapse-rate adjustment is ~0")
+
+# Day range: epoch through the later of the last station day and the last label day
+last_day = (station_days['DATE'].max().date() - EPOCH_START).days
+if 'utah_grid_ignition_labels' in tables:
+    last_day = max(last_day, con.execute("SELECT MAX(day_id) FROM utah_grid_ignition_labels").fetchone()[0])
+con.close()
+n_days = last_day + 1
+print(f"Cube: {n_days:,} days x {N_CELLS:,} cells x {len(wc.CUBE_VARS)} vars "
+      f"({n_days * N_CELLS * len(wc.CUBE_VARS) * 4 / 1024**2:,.0f} MB)")
+
+# ================= IDW WEIGHTS =================
+station_elev = stations['ELEVATION'].values.astype(float)
+missing_elev = np.isnan(cell_elev)
+if missing_elev.any():
+    # Fill gaps from the stations themselves (all weights, every station reporting)
+    W0 = wc.idw_weights(stations['LATITUDE'].values, stations['LONGITUDE'].values, cell_lat, cell_lon)
+    cell_elev[missing_elev] = wc.interpolate_days(W0, station_elev[:, None])[missing_elev, 0]
+
+W, weights_fp, rebuilt = wc.load_or_build_weights(stations, cell_lat, cell_lon, cell_elev, args.out)
+print(f"IDW weights {weights_fp}: {W.nnz:,} nonzeros "
+      f"({'rebuilt' if rebuilt else 'reused — station set unchanged'})")
+no_station = np.asarray(W.sum(axis=1)).ravel() == 0
+if no_station.any():
+    print(f"WARNING: {no_station.sum():,} cells have no station within {wc.MAX_DIST_KM:.0f} km")
+
+# ================= INTERPOLATE =================
+station_pos = np.searchsorted(stations['STATION'].values, station_days['STATION'].values)
+day_pos = (station_days['DATE'].dt.normalize() - pd.Timestamp(EPOCH_START)).dt.days.values
+in_range = (day_pos >= 0) & (day_pos < n_days)
+
+os.makedirs(args.out, exist_ok=True)
+content = hashlib.sha1(weights_fp.encode())
+for var in wc.CUBE_VARS:
+    cube = np.lib.format.open_memmap(os.path.join(args.out, f"{var}.npy"), mode='w+',
+                                     dtype=np.float32, shape=(n_days, N_CELLS))
+    if var not in station_days.columns:
+        cube[:] = np.nan
+        print(f"  {var}: not in station files — all NaN")
+        continue
+
+    raw = wc.to_metric(var, station_days[var].values.astype(float))
+    ok = in_range & ~np.isnan(raw)
+    content.update(np.ascontiguousarray(np.column_stack([station_pos[ok], day_pos[ok], raw[ok]])).tobytes())
+
+    for d0 in range(0, n_days, args.day_chunk):
+        d1 = min(d0 + args.day_chunk, n_days)
+        sel = ok & (day_pos >= d0) & (day_pos < d1)
+        values = np.full((len(stations), d1 - d0), np.nan)
+        values[station_pos[sel], day_pos[sel] - d0] = raw[sel]
+        elev_args = (station_elev, cell_elev) if var in wc.TEMP_VARS else ()
+        cube[d0:d1] = wc.interpolate_days(W, values, *elev_args).T
+
+    covered = np.isfinite(cube).mean()
+    print(f"  {var}: {ok.sum():,} station-days -> {covered:.1%} of cell-days filled")
+    cube.flush()
+    del cube
+
+meta = {
+    'vars': wc.CUBE_VARS,
+    'units': wc.UNITS,
+    'n_days': n_days,
+    'n_cells': N_CELLS,
+    'epoch': EPOCH_START.isoformat(),
+    'stations': len(stations),
+    'weights_fingerprint': weights_fp,
+    'fingerprint': content.hexdigest()[:16],
+    'lapse_rate_c_per_m': wc.LAPSE_RATE_C_PER_M,
+    'built': datetime.now().isoformat(timespec='seconds')
+}
+with open(os.path.join(args.out, 'meta.json'), 'w') as f:
+    json.dump(meta, f, indent=2)
+
+print(f"Saved cube to {args.out}/ (fingerprint {meta['fingerprint']}) in {time.time() - start:.1f} seconds")
+
+# ================= ANTECEDENT DRYNESS =================
+first, _ = antecedent_dryness.build(args.out)
+print(f"Antecedent dryness: {n_days - first:,} new/changed days computed")
+print(f"Peak RSS: {peak_rss_mb():.1f} MB")
+print("Done.")
@@ -0,0 +1,116 @@
+# scripts/check_harvest_weather_grid.py
+# Offline check of the Meteostat grid harvest with a fake meteostat module:
+# crash + resume, no duplicate days, date-range top-ups and the partitioned Parquet layout.
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import types
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+print("=== CHECK: METEOSTAT GRID HARVEST ===")
+
+
+# ================= FAKE METEOSTAT =================
+class FakeMeteostat:
+    """~One station per 4° box; daily() can be told to fail after N calls."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.daily_calls = []
+        self.fail_after = None
+
+    def stations(self):
+        class Query:
+            def nearby(self, lat, lon):
+                self.lat, self.lon = lat, lon
+                return self
+
+            def inventory(self, freq, since):
+                return self
+
+            def fetch(self, n):
+                if self.lat > 47:  # "no active station" up north
+                    return pd.DataFrame(columns=['name', 'latitude', 'longitude'])
+                box = (int(self.lat) // 4, int(-self.lon) // 4)
+                station_id = f"{box[0]:02d}{box[1]:03d}"
+                return pd.DataFrame({'name': [f"STATION {station_id}"], 'latitude': [box[0] * 4.0],
+                                     'longitude': [-box[1] * 4.0]}, index=[station_id])
+        return Query()
+
+    def daily(self, station_id, start, end):
+        fake = self
+
+        class Fetch:
+            def fetch(self):
+                with fake.lock:
+                    if fake.fail_after is not None and len(fake.daily_calls) >= fake.fail_after:
+                        raise ConnectionError("simulated outage")
+                    fake.daily_calls.append((station_id, start.date(), end.date()))
+                idx = pd.date_range(start, end, freq='D', name='time')
+                seed = int(station_id)
+                return pd.DataFrame({'tavg': (idx.dayofyear + seed) % 30, 'tmax': 1.0, 'tmin': 0.0,
+                                     'wspd': 5.0, 'prcp': 0.0, 'snow': np.nan}, index=idx)
+        return Fetch()
+
+
+fake = FakeMeteostat()
+sys.modules['meteostat'] = types.SimpleNamespace(stations=fake.stations, daily=fake.daily)
+import harvest_weather_grid as hwg  # noqa: E402 (needs the fake module first)
+
+work = tempfile.mkdtemp(prefix='harvest_check_')
+out = os.path.join(work, 'grid')
+csv = os.path.join(work, 'manifest.csv')
+
+
+def read_dataset():
+    files = [os.path.join(d, f) for d, _, fs in os.walk(out) for f in fs if f.endswith('.parquet')]
+    return pd.concat([pd.read_parquet(f) for f in files], ignore_index=True), files
+
+
+# ================= 1. CRASH PART-WAY =================
+fake.fail_after = 5
+r1 = hwg.run(out, date(2021, 1, 1), date(2022, 6, 30), workers=4, manifest_csv=csv)
+print(f"Run 1 (outage after 5 downloads): {r1}")
+assert r1['errors'] > 0 and r1['stations'] == 5
+
+# ================= 2. RESUME =================
+fake.fail_after = None
+calls_before = len(fake.daily_calls)
+r2 = hwg.run(out, date(2021, 1, 1), date(2022, 6, 30), workers=4, manifest_csv=csv)
+print(f"Run 2 (resume): {r2}")
+assert r2['errors'] == 0 and r2['jobs'] == r1['errors']  # only the failed stations
+assert len(fake.daily_calls) - calls_before == r1['errors']
+
+df, files = read_dataset()
+n_stations = df['station_id'].nunique()
+assert not df.duplicated(['station_id', 'date']).any()
+assert (df.groupby('station_id').size() == (date(2022, 6, 30) - date(2021, 1, 1)).days + 1).all()
+assert all(f"year={y}" in f for f, y in zip(files, [pd.read_parquet(f)['date'].dt.year.iloc[0] for f in files]))
+print(f"{n_stations} stations, {len(df):,} station-days in {len(files)} parquet files — no duplicates")
+
+# ================= 3. NOTHING TO DO =================
+r3 = hwg.run(out, date(2021, 1, 1), date(2022, 6, 30), workers=4, manifest_csv=csv)
+assert r3['jobs'] == 0 and r3['rows'] == 0
+print("Run 3 (same range): nothing fetched")
+
+# ================= 4. TOP-UP =================
+calls_before = len(fake.daily_calls)
+r4 = hwg.run(out, date(2020, 7, 1), date(2022, 12, 31), workers=4, manifest_csv=csv)
+new_calls = fake.daily_calls[calls_before:]
+print(f"Run 4 (extend both ends): {r4}, {len(new_calls)} fetches")
+assert {(s, e) for _, s, e in new_calls} == {(date(2020, 7, 1), date(2020, 12, 31)),
+                                             (date(2022, 7, 1), date(2022, 12, 31))}
+df, _ = read_dataset()
+assert not df.duplicated(['station_id', 'date']).any()
+assert r4['rows'] == n_stations * (184 + 184)
+manifest = pd.read_csv(csv, dtype={'station_id': str})
+assert (manifest['first_date'] == '2020-07-01').all() and (manifest['last_date'] == '2022-12-31').all()
+print(f"Manifest: {len(manifest)} stations, {manifest['first_date'].iloc[0]} .. {manifest['last_date'].iloc[0]}")
+
+shutil.rmtree(work)
+print("All harvest checks passed.")
@@ -0,0 +1,74 @@
+# scripts/check_nws_cache.py
+# Offline check of the NWS cache/client against the local api.weather.gov stub:
+# station reuse across nearby fires, request coalescing, rate limiting, 429 retries,
+# the observation TTL and incremental flushing.
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+
+import numpy as np
+
+from nws_cache import NwsCache, fetch_observations, snap
+from nws_stub import NwsStubHandler, start_stub
+
+print("=== CHECK: NWS OBSERVATION CACHE ===")
+
+work = tempfile.mkdtemp(prefix='nws_cache_check_')
+cache_path = os.path.join(work, 'nws.sqlite')
+rng = np.random.default_rng(0)
+# 400 fires clustered around 12 ignition areas
+centers = np.column_stack([rng.uniform(37.5, 41.5, 12), rng.uniform(-113.5, -109.5, 12)])
+points = [tuple(c + rng.normal(0, 0.02, 2)) for c in centers[rng.integers(0, 12, 400)]]
+n_snapped = len({snap(*p) for p in points})
+
+# ================= 1. COLD RUN =================
+server, base_url = start_stub(fail_every=25)
+rate = 40.0
+start = time.time()
+results, stats = fetch_observations(points, cache_path, base_url, concurrency=8, rate_per_s=rate)
+elapsed = time.time() - start
+counts = dict(NwsStubHandler.counts)
+print(f"Cold: {elapsed:.2f} s, {stats}, stub {counts}")
+assert all(isinstance(r, dict) for r in results)
+assert counts['points'] == counts['stations'] == n_snapped        # one lookup per snapped point
+assert counts['observations'] == len({r['station_id'] for r in results})  # one per station
+assert stats['requests'] == len(NwsStubHandler.started)           # 429 retries included
+
+# Rate limiter: request starts never beat the configured spacing
+gaps = np.diff(sorted(NwsStubHandler.started))
+assert len(NwsStubHandler.started) / (max(NwsStubHandler.started) - min(NwsStubHandler.started)) <= rate * 1.1
+print(f"Rate: {len(gaps) + 1} requests, median gap {np.median(gaps) * 1000:.0f} ms (limit {1000 / rate:.0f} ms)")
+
+# Cache was flushed to disk (readable from another connection)
+with sqlite3.connect(cache_path) as db:
+    assert db.execute("SELECT COUNT(*) FROM nws_point_station").fetchone()[0] == n_snapped
+
+# ================= 2. WARM RUN =================
+server.shutdown()
+server, base_url = start_stub()
+results2, stats2 = fetch_observations(points, cache_path, base_url)
+print(f"Warm: {stats2}")
+assert stats2['requests'] == 0 and sum(NwsStubHandler.counts.values()) == 0
+assert [r['tavg_c'] for r in results2] == [r['tavg_c'] for r in results]
+
+# ================= 3. OBSERVATIONS EXPIRE, STATIONS DON'T =================
+time.sleep(1.1)
+results3, stats3 = fetch_observations(points, cache_path, base_url, obs_ttl=1)
+print(f"Expired observations: {stats3}")
+assert stats3['point_fetches'] == 0 and stats3['obs_fetches'] == counts['observations']
+
+# ================= 4. INCREMENTAL FLUSH =================
+cache = NwsCache(os.path.join(work, 'flush.sqlite'), flush_every=3)
+for i in range(7):
+    cache.put_station(40.0 + i, -111.0, f"K{i}", f"{base_url}/stations/K{i}")
+with sqlite3.connect(os.path.join(work, 'flush.sqlite')) as other:
+    committed = other.execute("SELECT COUNT(*) FROM nws_point_station").fetchone()[0]
+assert committed == 6  # two flushes of 3; the 7th is pending until close()
+cache.close()
+print("Flush: commits every 3 writes, rest on close")
+
+server.shutdown()
+shutil.rmtree(work)
+print("All NWS cache checks passed.")
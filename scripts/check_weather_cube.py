@@ -0,0 +1,63 @@
+# scripts/check_weather_cube.py
+# Offline check of the weather-cube interpolation (weather_cube.py) on synthetic stations:
+# IDW renormalization over the stations that reported, the lapse-rate shift, and a
+# station with no ELEVATION (NaN after station_table's median) that still reports temperatures.
+import numpy as np
+import pandas as pd
+
+import weather_cube as wc
+from utah_grid import all_cell_ids, cell_latlon
+
+print("=== CHECK: NOAA WEATHER CUBE INTERPOLATION ===")
+
+rng = np.random.default_rng(0)
+n_stations, n_days = 40, 5
+station_days = pd.DataFrame({
+    'STATION': np.repeat([f"USC{i:08d}" for i in range(n_stations)], 2),
+    'LATITUDE': np.repeat(rng.uniform(37, 42, n_stations), 2),
+    'LONGITUDE': np.repeat(rng.uniform(-114, -109, n_stations), 2),
+    'ELEVATION': np.repeat(rng.uniform(800, 3000, n_stations), 2),
+})
+no_elev = [3, 17]
+station_days.loc[station_days['STATION'].isin([f"USC{i:08d}" for i in no_elev]), 'ELEVATION'] = np.nan
+stations = wc.station_table(station_days)
+station_elev = stations['ELEVATION'].values.astype(float)
+assert np.isnan(station_elev[no_elev]).all()
+print(f"Stations: {n_stations}, {np.isnan(station_elev).sum()} without an elevation")
+
+cell_lat, cell_lon = cell_latlon(all_cell_ids())
+cell_elev = rng.uniform(1000, 3500, len(cell_lat))
+W = wc.idw_weights(stations['LATITUDE'].values, stations['LONGITUDE'].values, cell_lat, cell_lon)
+covered = np.asarray(W.sum(axis=1)).ravel() > 0
+
+tavg = rng.uniform(-5, 30, (n_stations, n_days))
+tavg[rng.random(tavg.shape) < 0.2] = np.nan   # stations that didn't report that day
+tavg[no_elev, :] = 15.0                        # ... but the elevation-less ones always do
+
+out = wc.interpolate_days(W, tavg, station_elev, cell_elev)
+reported_cells = np.asarray(W @ ~np.isnan(tavg)).astype(bool) & covered[:, None]
+assert np.isfinite(out[reported_cells]).all(), "NaN station elevation leaked into cell temperatures"
+print(f"No NaN: {reported_cells.sum():,} cell-days with a reporting station are all finite")
+
+# Per-cell reference: stations without an elevation are shifted by 0 (z_s = z_cell)
+Wd = W.toarray()
+for cell in rng.choice(np.flatnonzero(covered), 200, replace=False):
+    for d in range(n_days):
+        ok = ~np.isnan(tavg[:, d]) & (Wd[cell] > 0)
+        if not ok.any():
+            continue
+        z = np.where(np.isnan(station_elev[ok]), cell_elev[cell], station_elev[ok])
+        shifted = tavg[ok, d] + wc.LAPSE_RATE_C_PER_M * (z - cell_elev[cell])
+        assert np.isclose(out[cell, d], np.average(shifted, weights=Wd[cell, ok]), atol=1e-4)
+print("Matches the per-cell lapse-rate formula (200 cells)")
+
+# With every elevation known it is the plain T_bar + lapse * (z_bar - z_cell)
+full_elev = np.where(np.isnan(station_elev), 1500.0, station_elev)
+reported = ~np.isnan(tavg)
+den = W @ reported.astype(float)
+with np.errstate(invalid='ignore', divide='ignore'):
+    expected = (W @ np.where(reported, tavg, 0)) / den + wc.LAPSE_RATE_C_PER_M * (
+        (W @ (reported * full_elev[:, None])) / den - cell_elev[:, None])
+np.testing.assert_allclose(wc.interpolate_days(W, tavg, full_elev, cell_elev), expected, atol=1e-4)
+print("All elevations known: unchanged from T_bar + lapse * (z_bar - z_cell)")
+print("Done.")
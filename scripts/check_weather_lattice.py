@@ -0,0 +1,56 @@
+# scripts/check_weather_lattice.py
+# Offline check of the Open-Meteo lattice provider against the local stub server:
+# chunked requests, bilinear interpolation, per-cell variation and the run-time disk cache.
+import tempfile
+
+import numpy as np
+
+from features import vpd_proxy
+from utah_grid import all_cell_ids, cell_latlon
+from weather_providers import OpenMeteoLatticeProvider, interpolate
+from open_meteo_stub import StubHandler, start_stub
+
+print("=== CHECK: OPEN-METEO LATTICE WEATHER ===")
+
+server, base_url = start_stub()
+cache_dir = tempfile.mkdtemp(prefix='open_meteo_cache_')
+lats, lons = cell_latlon(all_cell_ids())
+
+provider = OpenMeteoLatticeProvider(base_url=base_url, cache_dir=cache_dir)
+dates, weather = provider.forecast(lats, lons, 7)
+print(f"Lattice points: {len(provider.points):,} in {provider.requests_made} requests")
+print(f"Dates: {dates[0]} .. {dates[-1]}  shape {weather['tavg'].shape}")
+assert weather['tavg'].shape == (7, len(lats))
+assert all(not np.isnan(v).any() for v in weather.values())
+
+# Cells that sit on a lattice node must get that node's value exactly
+_, lattice = provider.lattice_forecast({'forecast_days': 7})
+on_node = np.isin(np.round(lats, 4), provider.axis_lat) & np.isin(np.round(lons, 4), provider.axis_lon)
+node_idx = [int(np.flatnonzero((provider.points == [la, lo]).all(axis=1))[0])
+            for la, lo in zip(np.round(lats[on_node], 4), np.round(lons[on_node], 4))]
+assert np.allclose(weather['tavg'][:, on_node], lattice['tavg'][:, node_idx], atol=1e-4)
+print(f"Exact at {on_node.sum():,} lattice-node cells")
+
+# Per-cell VPD now varies, so dryness = vpd / vpd.max() is no longer constant
+tavg, rh = weather['tavg'][0], weather['rh'][0]
+vpd = vpd_proxy(tavg, rh)
+print(f"Day-0 VPD range: {vpd.min():.3f} .. {vpd.max():.3f} kPa")
+assert vpd.std() > 0
+
+# Missing lattice values drop out of the weights instead of poisoning the cell
+values = lattice['tavg'].copy()
+values[:, 0] = np.nan
+idx, w = provider._weights_for(lats, lons)
+assert not np.isnan(interpolate(values, idx, w)).any()
+
+# Second provider in the same model run is served entirely from the disk cache
+served = StubHandler.requests_served
+cached = OpenMeteoLatticeProvider(base_url=base_url, cache_dir=cache_dir)
+_, weather_cached = cached.forecast(lats, lons, 7)
+assert cached.requests_made == 0 and StubHandler.requests_served == served
+assert np.array_equal(weather_cached['tavg'], weather['tavg'])
+print("Cache hit: 0 requests on rerun")
+
+server.shutdown()
+print("All lattice checks passed.")
+print("Done.")
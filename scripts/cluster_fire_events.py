@@ -0,0 +1,187 @@
+# scripts/cluster_fire_events.py
+# Group FIRMS detections into fire events: one large fire is hundreds of VIIRS
+# pixels over many days, not hundreds of ignitions.
+#
+# Two detections belong to the same event when they are within RADIUS_KM of each
+# other and at most MAX_GAP_DAYS apart, transitively (connected components).
+# Each day's detections go in a cKDTree on sphere xyz (km), queried against itself
+# and the previous MAX_GAP_DAYS days' trees; the pairs are merged with a vectorized
+# union-find (hook the larger root under the smaller, pointer-jump) in bounded batches.
+#
+# fire_event_clusters has one row per event: first day + the grid cell of the
+# first day's detections (cell -1 when it starts outside the Utah grid), last day,
+# detection count and FRP. scripts_create_utah_grid_labels.py --first-day-only
+# labels just those start cell-days.
+#
+#   python scripts/cluster_fire_events.py                        # fire_events_utah
+#   python scripts/cluster_fire_events.py --table fire_events    # western US
+import argparse
+import time
+from datetime import datetime
+
+import duckdb
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+
+from utah_grid import cell_id_from_latlon, date_from_day_id, register_grid_macros
+
+CLUSTERS_TABLE = 'fire_event_clusters'
+RADIUS_KM = 2.0          # ~5 VIIRS pixels
+MAX_GAP_DAYS = 3         # a fire can go undetected for a couple of overpasses (smoke, cloud)
+PAIR_BATCH = 5_000_000  # candidate pairs held before reducing them to a forest
+EARTH_RADIUS_KM = 6371.0
+
+
+def sphere_km(lat, lon):
+    """lat/lon -> xyz on a sphere of Earth radius (chord ~= great-circle at these distances)."""
+    lat, lon = np.radians(lat), np.radians(lon)
+    return EARTH_RADIUS_KM * np.column_stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)])
+
+
+# ================= UNION-FIND =================
+def find_roots(parent):
+    """Pointer-jump until every node points at its root."""
+    while True:
+        grand = parent[parent]
+        if np.array_equal(grand, parent):
+            return parent
+        parent = grand
+
+
+def union(parent, a, b):
+    """Merge the sets of each (a[i], b[i]) pair; roots are always the smallest index in their set."""
+    a, b = np.asarray(a, dtype=np.int64), np.asarray(b, dtype=np.int64)
+    while len(a):
+        parent = find_roots(parent)
+        ra, rb = parent[a], parent[b]
+        apart = ra != rb
+        a, b, ra, rb = a[apart], b[apart], ra[apart], rb[apart]
+        np.minimum.at(parent, np.maximum(ra, rb), np.minimum(ra, rb))
+    return find_roots(parent)
+
+
+# ================= LINKING =================
+def link_pairs(xyz, day, radius_km=RADIUS_KM, max_gap_days=MAX_GAP_DAYS):
+    """Yield (i, j) index arrays of detection pairs within radius_km and max_gap_days.
+
+    day must be sorted. Each day's detections get their own KD-tree, queried
+    against itself and the trees of the previous max_gap_days days.
+    """
+    bounds = np.searchsorted(day, np.arange(int(day[0]), int(day[-1]) + 2))
+    recent = []  # (day index, first row, tree) for the last max_gap_days days
+    for d in range(len(bounds) - 1):
+        lo, hi = bounds[d], bounds[d + 1]
+        if hi == lo:
+            continue
+        tree = cKDTree(xyz[lo:hi])
+        pairs = tree.query_pairs(radius_km, output_type='ndarray')
+        yield lo + pairs[:, 0], lo + pairs[:, 1]
+        recent = [r for r in recent if d - r[0] <= max_gap_days]
+        for _, prev_lo, prev_tree in recent:
+            m = tree.sparse_distance_matrix(prev_tree, radius_km, output_type='ndarray')
+            yield lo + m['i'], prev_lo + m['j']
+        recent.append((d, lo, tree))
+
+
+def cluster(lat, lon, day, radius_km=RADIUS_KM, max_gap_days=MAX_GAP_DAYS, pair_batch=PAIR_BATCH):
+    """Event id (0..n_events-1, numbered by first detection) for each detection."""
+    lat, lon, day = np.asarray(lat), np.asarray(lon), np.asarray(day, dtype=np.int64)
+    order = np.argsort(day, kind='stable')
+    xyz, day_sorted = sphere_km(lat[order], lon[order]), day[order]
+
+    # Pairs are collapsed to a forest (node -> root) every pair_batch pairs, so
+    # the global union only sees about one edge per detection
+    forest_a, forest_b, batch_a, batch_b, pending = [], [], [], [], 0
+
+    def reduce_batch():
+        a, b = np.concatenate(batch_a), np.concatenate(batch_b)
+        lo = min(a.min(), b.min())
+        n = max(a.max(), b.max()) - lo + 1
+        local = union(np.arange(n), a - lo, b - lo)
+        linked = np.flatnonzero(local != np.arange(n))
+        forest_a.append(lo + linked)
+        forest_b.append(lo + local[linked])
+        batch_a.clear()
+        batch_b.clear()
+
+    for a, b in link_pairs(xyz, day_sorted, radius_km, max_gap_days):
+        if len(a):
+            batch_a.append(a)
+            batch_b.append(b)
+            pending += len(a)
+        if pending >= pair_batch:
+            reduce_batch()
+            pending = 0
+    if batch_a:
+        reduce_batch()
+
+    parent = union(np.arange(len(day)), np.concatenate(forest_a or [[]]), np.concatenate(forest_b or [[]]))
+    # Roots are the smallest sorted index = the event's first detection, so this numbers events by start
+    _, event_sorted = np.unique(parent, return_inverse=True)
+
+    event = np.empty(len(day), dtype=np.int64)
+    event[order] = event_sorted
+    return event
+
+
+def summarize(lat, lon, day, frp, event):
+    """One row per event: start day + start cell (mean position of the first day's detections)."""
+    df = pd.DataFrame({'event_id': event, 'lat': lat, 'lon': lon, 'day_id': day, 'frp': frp})
+    events = df.groupby('event_id').agg(start_day_id=('day_id', 'min'), end_day_id=('day_id', 'max'),
+                                        n_detections=('day_id', 'size'), n_fire_days=('day_id', 'nunique'),
+                                        total_frp=('frp', 'sum'), max_frp=('frp', 'max'))
+    first = df[df['day_id'].to_numpy() == events['start_day_id'].to_numpy()[df['event_id'].to_numpy()]]
+    start = first.groupby('event_id')[['lat', 'lon']].mean()
+    events['start_lat'], events['start_lon'] = start['lat'], start['lon']
+    events['start_cell_id'] = cell_id_from_latlon(events['start_lat'], events['start_lon'])
+    events['start_date'] = date_from_day_id(events['start_day_id'])
+    events['end_date'] = date_from_day_id(events['end_day_id'])
+    return events.reset_index().astype({'event_id': 'int32', 'start_day_id': 'int16', 'end_day_id': 'int16',
+                                        'n_detections': 'int32', 'n_fire_days': 'int16'})[
+        ['event_id', 'start_day_id', 'start_cell_id', 'start_date', 'start_lat', 'start_lon',
+         'end_day_id', 'end_date', 'n_fire_days', 'n_detections', 'total_frp', 'max_frp']]
+
+
+def build(con, table='fire_events_utah', radius_km=RADIUS_KM, max_gap_days=MAX_GAP_DAYS):
+    """Cluster `table` into CLUSTERS_TABLE. Returns (n_detections, n_events)."""
+    register_grid_macros(con)
+    fires = con.execute(f"""
+    SELECT latitude, longitude, date_to_day(acq_date) AS day_id, COALESCE(frp, 0) AS frp
+    FROM {table}
+    WHERE latitude IS NOT NULL AND longitude IS NOT NULL AND acq_date IS NOT NULL
+    """).fetchnumpy()
+    event = cluster(fires['latitude'], fires['longitude'], fires['day_id'], radius_km, max_gap_days)
+    events = summarize(fires['latitude'], fires['longitude'], fires['day_id'], fires['frp'], event)
+
+    con.register('events_df', events)
+    con.execute(f"CREATE OR REPLACE TABLE {CLUSTERS_TABLE} AS SELECT * FROM events_df ORDER BY event_id")
+    con.unregister('events_df')
+    return len(event), len(events)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Cluster FIRMS detections into fire events")
+    parser.add_argument('--db', default='eco_pyric.duckdb')
+    parser.add_argument('--table', default='fire_events_utah')
+    parser.add_argument('--radius-km', type=float, default=RADIUS_KM)
+    parser.add_argument('--max-gap-days', type=int, default=MAX_GAP_DAYS)
+    args = parser.parse_args()
+
+    print("=== CLUSTERING FIRE DETECTIONS INTO EVENTS ===")
+    print(f"Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print(f"Source: {args.table} | link within {args.radius_km} km and {args.max_gap_days} days")
+    con = duckdb.connect(args.db)
+    t0 = time.time()
+    n_detections, n_events = build(con, args.table, args.radius_km, args.max_gap_days)
+    print(f"{n_detections:,} detections -> {n_events:,} fire events in {time.time() - t0:.2f} seconds")
+    print(con.execute(f"""
+    SELECT COUNT(*) FILTER (WHERE n_detections = 1) AS single_detection,
+           COUNT(*) FILTER (WHERE n_fire_days > 1) AS multi_day,
+           MAX(n_detections) AS largest_event,
+           COUNT(*) FILTER (WHERE start_cell_id >= 0) AS starting_in_grid
+    FROM {CLUSTERS_TABLE}
+    """).fetchdf().to_string(index=False))
+    print(f"Saved to table '{CLUSTERS_TABLE}'")
+    con.close()
+    print("Done.")
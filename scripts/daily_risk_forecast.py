@@ -1,5 +1,4 @@
 
-import requests
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
@@ -7,46 +6,39 @@ import duckdb
 import folium
 from folium.plugins import HeatMap
 
+import features
+from utah_grid import day_id_from_date
+from weather_providers import OpenMeteoLatticeProvider
+
 print("=== DAILY UTAH WILDFIRE RISK FORECAST V2 ===")
 print(f"Date: {datetime.now().strftime('%Y-%m-%d')}")
 
 con = duckdb.connect('eco_pyric.duckdb')
 
-# Load full Utah grid + proximity
+# Load Utah grid cells + static features (one row per cell)
 df_grid = con.execute("""
-SELECT grid_lat, grid_lon, dist_to_road_km
-FROM utah_grid_ignition_labels_proximity
+SELECT cell_id, grid_lat, grid_lon, dist_to_road_km, dust_exposure
+FROM utah_grid_cells
 """).fetchdf()
 
 print(f"Loaded {len(df_grid):,} grid cells")
 
-# Precompute dust exposure per grid cell (higher near lake center)
-lake_lat, lake_lon = 41.0, -112.5
-df_grid['dist_to_lake_km'] = np.sqrt((df_grid['grid_lat'] - lake_lat)**2 + (df_grid['grid_lon'] + lake_lon)**2) * 111
-df_grid['dust_exposure'] = 1 / (df_grid['dist_to_lake_km'] + 1)
-df_grid['dust_exposure'] = df_grid['dust_exposure'].clip(upper=1.0)
-
-# Get today's weather forecast (demo uses one point - expand later)
-url = "https://api.open-meteo.com/v1/forecast?latitude=40.5&longitude=-111.9&daily=temperature_2m_mean,relative_humidity_2m_mean,wind_speed_10m_max,precipitation_sum&timezone=auto"
-r = requests.get(url)
-data = r.json()['daily']
-
-tavg = data['temperature_2m_mean'][0]
-rh = data['relative_humidity_2m_mean'][0]
-wspd = data['wind_speed_10m_max'][0]
-prcp = data['precipitation_sum'][0]
-
-print(f"Today's forecast: Tavg {tavg}°C, RH {rh}%, Wind {wspd} km/h, Precip {prcp} mm")
+# Get today's weather forecast per cell (Open-Meteo lattice, interpolated)
+weather = OpenMeteoLatticeProvider().daily(datetime.now().date(), df_grid['grid_lat'].values, df_grid['grid_lon'].values)
 
-# Month for seasonal factor
-df_grid['month'] = datetime.now().month
+tavg = weather['tavg'].astype(float)
+rh = weather['rh'].astype(float)
+wspd = weather['wspd'].astype(float)
+prcp = weather['prcp'].astype(float)
 
-# Dryness proxies
-df_grid['vpd_proxy'] = 0.6108 * np.exp(17.27 * tavg / (tavg + 237.3)) * (1 - rh / 100)
-df_grid['vpd_proxy'] = df_grid['vpd_proxy'].clip(lower=0)
+print(f"Today's forecast (state mean): Tavg {tavg.mean():.1f}°C, RH {rh.mean():.0f}%, "
+      f"Wind {wspd.mean():.1f} km/h, Precip {prcp.mean():.1f} mm")
 
-df_grid['dryness_proxy'] = (tavg - (tavg - 10)) / 10
-df_grid['low_precip_dryness'] = np.where(prcp < 1, 1.0, 0.5)
+# Month + dryness proxies from the shared registry (scripts/features.py)
+X = features.compute(['month', 'vpd_proxy', 'dryness_proxy', 'low_precip_dryness'],
+                     {'day_id': day_id_from_date(datetime.now().date()), 'tavg': tavg, 'rh': rh, 'prcp': prcp},
+                     dtype=np.float64)
+df_grid[['month', 'vpd_proxy', 'dryness_proxy', 'low_precip_dryness']] = X
 
 # Risk score
 df_grid['dryness'] = df_grid['vpd_proxy'] / df_grid['vpd_proxy'].max()
@@ -1,5 +1,7 @@
 # eda_fires.py
 # EDA for cleaned Western US wildfire data (DuckDB)
+# fire_events is either the ingest table or the typed Parquet view (1_ingest_fires_duckdb.py
+# --mode parquet); CAST(acq_date AS DATE) is free on the view and lets the date filter reach the scan.
 
 import duckdb
 import pandas as pd
@@ -34,7 +36,7 @@ def save_plot(fig, name):
 # 1. Yearly Trend
 yearly = con.execute("""
 SELECT 
-    strftime('%Y', strptime(acq_date, '%Y-%m-%d')) AS year,
+    strftime(CAST(acq_date AS DATE), '%Y') AS year,
     COUNT(*) AS fire_count
 FROM fire_events
 GROUP BY year
@@ -55,7 +57,7 @@ print("\nYearly summary:\n", yearly)
 # 2. Monthly Pattern
 monthly = con.execute("""
 SELECT 
-    strftime('%m', strptime(acq_date, '%Y-%m-%d')) AS month,
+    strftime(CAST(acq_date AS DATE), '%m') AS month,
     COUNT(*) AS fire_count
 FROM fire_events
 GROUP BY month
@@ -75,7 +77,7 @@ print("\nMonthly summary:\n", monthly)
 # 3. Utah Area Yearly
 utah_yearly = con.execute("""
 SELECT 
-    strftime('%Y', strptime(acq_date, '%Y-%m-%d')) AS year,
+    strftime(CAST(acq_date AS DATE), '%Y') AS year,
     COUNT(*) AS fire_count
 FROM fire_events
 WHERE latitude BETWEEN 37 AND 42
@@ -101,7 +103,7 @@ SELECT
     acq_date,
     COUNT(*) AS daily_count
 FROM fire_events
-WHERE strptime(acq_date, '%Y-%m-%d') >= date '2025-01-01'
+WHERE CAST(acq_date AS DATE) >= DATE '2025-01-01'
 GROUP BY acq_date
 ORDER BY acq_date
 """).fetchdf()
@@ -0,0 +1,105 @@
+# scripts/feature_cache.py
+# On-disk cache of assembled training matrices (float32 X, int8 y) so reruns for
+# tuning / SHAP skip the table load, feature derivation and split.
+#
+# Entries live in cache/feature_matrices/<key>/ as plain .npy files plus meta.json,
+# and are opened with mmap. The key is a fingerprint of the source rows, the
+# feature list, the feature formulas (features.registry_fingerprint) and the split
+# settings. Least-recently-used entries are evicted
+# once the cache exceeds its disk budget.
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+
+from features import registry_fingerprint
+
+CACHE_DIR = os.path.join('cache', 'feature_matrices')
+DISK_BUDGET_GB = 20.0
+
+
+def source_fingerprint(con, query):
+    """Row count + order-independent hash of every column the query returns."""
+    cols = [d[0] for d in con.execute(f"SELECT * FROM ({query}\n) LIMIT 0").description]
+    n_rows, row_hash = con.execute(f"""
+    SELECT COUNT(*), bit_xor(hash({', '.join(cols)}))
+    FROM ({query}
+    )
+    """).fetchone()
+    return f"{n_rows}:{row_hash}"
+
+
+def cache_key(source_fp, features, split_seed, **params):
+    payload = json.dumps(
+        {'source': source_fp, 'features': list(features), 'registry': registry_fingerprint(),
+         'split_seed': split_seed, **params},
+        sort_keys=True, default=str
+    )
+    return hashlib.sha1(payload.encode()).hexdigest()[:16]
+
+
+def load_matrices(key, cache_dir=CACHE_DIR):
+    """Return ({name: memmapped array}, meta) for a cached entry, or (None, None)."""
+    entry = os.path.join(cache_dir, key)
+    meta_path = os.path.join(entry, 'meta.json')
+    if not os.path.exists(meta_path):
+        return None, None
+
+    with open(meta_path) as f:
+        meta = json.load(f)
+    arrays = {name: np.load(os.path.join(entry, f"{name}.npy"), mmap_mode='r')
+              for name in meta['arrays']}
+    os.utime(meta_path)  # mark as recently used for LRU eviction
+    return arrays, meta
+
+
+def save_matrices(key, arrays, meta=None, cache_dir=CACHE_DIR, budget_gb=DISK_BUDGET_GB):
+    """Persist {name: array} under key, then evict old entries beyond the disk budget."""
+    entry = os.path.join(cache_dir, key)
+    tmp = f"{entry}.tmp-{os.getpid()}"
+    os.makedirs(tmp, exist_ok=True)
+
+    for name, values in arrays.items():
+        np.save(os.path.join(tmp, f"{name}.npy"), np.ascontiguousarray(values))
+    with open(os.path.join(tmp, 'meta.json'), 'w') as f:
+        json.dump({**(meta or {}), 'arrays': list(arrays)}, f, indent=2, default=str)
+
+    # Swap the finished entry into place so readers never see a half-written one
+    if os.path.exists(entry):
+        shutil.rmtree(entry)
+    os.replace(tmp, entry)
+
+    evict(cache_dir, budget_gb * 1024**3, keep=key)
+    return entry
+
+
+def _entry_size(path):
+    return sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+
+
+def evict(cache_dir=CACHE_DIR, budget_bytes=DISK_BUDGET_GB * 1024**3, keep=None):
+    """Delete least-recently-used entries until the cache fits in budget_bytes."""
+    if not os.path.isdir(cache_dir):
+        return []
+
+    entries = []
+    for key in os.listdir(cache_dir):
+        path = os.path.join(cache_dir, key)
+        meta_path = os.path.join(path, 'meta.json')
+        if os.path.isdir(path) and os.path.exists(meta_path):
+            entries.append((os.path.getmtime(meta_path), _entry_size(path), key, path))
+
+    entries.sort()  # oldest use first
+    total = sum(size for _, size, _, _ in entries)
+    evicted = []
+    for _, size, key, path in entries:
+        if total <= budget_bytes:
+            break
+        if key == keep:
+            continue
+        shutil.rmtree(path, ignore_errors=True)
+        total -= size
+        evicted.append(key)
+    return evicted
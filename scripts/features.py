@@ -0,0 +1,137 @@
+# scripts/features.py
+# One registry for the engineered features, shared by training and every forecaster.
+#
+# Each feature is a pure NumPy function of named input columns, registered with
+# the names of those inputs. Inputs are raw columns (cell_id, day_id, tavg, rh,
+# prcp, dist_to_road_km, ...) or other registered features, and any shapes that
+# broadcast: training passes (rows,) arrays, the forecasters (days, cells) weather
+# with (cells,) static columns and a (days, 1) day_id. compute() builds the whole
+# block in one pass, so the training rows and the served cells get identical values.
+#
+#   X = compute(FEATURES, {'cell_id': ..., 'day_id': ..., 'dist_to_road_km': ...,
+#                          'tavg': ..., 'rh': ..., 'prcp': ...})
+import hashlib
+import inspect
+import sys
+
+import numpy as np
+
+import utah_grid
+from utah_grid import cell_lat, cell_lon, month_from_day_id
+
+# Model input columns, in order
+FEATURES = [
+    'dist_to_road_km',
+    'month',
+    'vpd_proxy',
+    'dryness_proxy',
+    'low_precip_dryness',
+    'grid_lat',
+    'grid_lon'
+]
+
+# The weather cube has no humidity: training rows use this RH, forecasts the forecast RH
+TRAINING_RH = 50.0
+
+# Great Salt Lake centre; degrees -> km as in the rest of the repo
+LAKE_LAT, LAKE_LON = 41.0, -112.5
+KM_PER_DEGREE = 111
+
+REGISTRY = {}  # name -> (function, input names)
+
+
+def registry_fingerprint():
+    """Hash of the feature formulas (this module and the grid decoding it uses) and TRAINING_RH.
+
+    Part of every feature-cache key, so editing a registered feature invalidates cached matrices.
+    """
+    payload = repr(TRAINING_RH).encode()
+    for module in (sys.modules[__name__], utah_grid):
+        try:
+            payload += inspect.getsource(module).encode()
+        except OSError:  # no .py source next to the bytecode
+            with open(module.__file__, 'rb') as f:
+                payload += f.read()
+    return hashlib.sha1(payload).hexdigest()[:16]
+
+
+def feature(*inputs):
+    """Register the decorated function under its name, computed from `inputs`."""
+    def register(fn):
+        REGISTRY[fn.__name__] = (fn, inputs)
+        return fn
+    return register
+
+
+# ================= CALENDAR / GRID =================
+# Month of every int16 day id, so month() is one gather instead of datetime64 arithmetic per row
+_MONTH_BY_DAY = month_from_day_id(np.arange(-2**15, 2**15))
+
+
+@feature('day_id')
+def month(day_id):
+    return _MONTH_BY_DAY[np.asarray(day_id).astype(np.int32) + 2**15]
+
+
+@feature('cell_id')
+def grid_lat(cell_id):
+    return cell_lat(cell_id)
+
+
+@feature('cell_id')
+def grid_lon(cell_id):
+    return cell_lon(cell_id)
+
+
+# ================= WEATHER =================
+@feature('tavg', 'rh')
+def vpd_proxy(tavg, rh):
+    """Vapour-pressure deficit (kPa) from the Tetens saturation pressure, floored at 0."""
+    return np.clip(0.6108 * np.exp(17.27 * tavg / (tavg + 237.3)) * (1 - rh / 100), 0, None)
+
+
+@feature('tavg')
+def dryness_proxy(tavg):
+    # 1.0 wherever tavg is known: kept as the model was trained on it
+    return (tavg - (tavg - 10)) / 10
+
+
+@feature('prcp')
+def low_precip_dryness(prcp):
+    return np.where(prcp < 1, 1.0, 0.5)
+
+
+# ================= STATIC =================
+@feature('grid_lat', 'grid_lon')
+def dist_to_lake_km(grid_lat, grid_lon):
+    return np.sqrt((grid_lat - LAKE_LAT) ** 2 + (grid_lon - LAKE_LON) ** 2) * KM_PER_DEGREE
+
+
+@feature('dist_to_lake_km')
+def dust_exposure(dist_to_lake_km):
+    """Great Salt Lake dust: inverse distance to the lake centre, capped at 1."""
+    return np.minimum(1 / (dist_to_lake_km + 1), 1.0)
+
+
+# ================= ASSEMBLY =================
+def resolve(name, columns, memo=None):
+    """Array for `name`: a given column if present, else the registered feature (inputs resolved recursively)."""
+    memo = {} if memo is None else memo
+    if name in columns:
+        return np.asarray(columns[name])
+    if name not in memo:
+        if name not in REGISTRY:
+            raise KeyError(f"'{name}' is neither a given column nor a registered feature")
+        fn, inputs = REGISTRY[name]
+        memo[name] = fn(*(resolve(i, columns, memo) for i in inputs))
+    return memo[name]
+
+
+def compute(names, columns, dtype=np.float32):
+    """Feature block (..., len(names)) for the broadcast shape of the inputs, in `names` order."""
+    memo = {}
+    values = [resolve(name, columns, memo) for name in names]
+    out = np.empty(np.broadcast_shapes(*(v.shape for v in values)) + (len(names),), dtype=dtype)
+    for i, v in enumerate(values):
+        out[..., i] = v
+    return out
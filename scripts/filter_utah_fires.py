@@ -24,7 +24,7 @@ print(f"Utah-only table created with {utah_count:,} fires")
 # Utah yearly summary
 print("\nUtah fires by year:")
 print(con.execute("""
-SELECT strftime('%Y', strptime(acq_date, '%Y-%m-%d')) AS year, COUNT(*) AS fire_count
+SELECT strftime(CAST(acq_date AS DATE), '%Y') AS year, COUNT(*) AS fire_count
 FROM fire_events_utah
 GROUP BY year
 ORDER BY year
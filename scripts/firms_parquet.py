@@ -0,0 +1,134 @@
+# scripts/firms_parquet.py
+# FIRMS CSVs -> a year/month-partitioned Parquet dataset read through a DuckDB view.
+#
+#   data/firms_parquet/year=2021/month=7/<csv stem>_<i>.parquet
+#
+# Columns are typed once at ingest (acq_date DATE, float32 coordinates and
+# measurements, confidence as a dictionary-encoded string column), so queries never
+# strptime a VARCHAR, and WHERE clauses on acq_year/acq_month (the partition keys
+# in the view) prune files while latitude/longitude/acq_date filters use the
+# row-group statistics.
+#
+# Files load in parallel, one DuckDB connection per file. manifest.json records
+# each CSV's size + mtime and the Parquet files it produced: unchanged CSVs are
+# skipped, changed ones have their old files replaced.
+import json
+import os
+import glob
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import duckdb
+
+PARQUET_DIR = os.path.join('data', 'firms_parquet')
+MANIFEST = 'manifest.json'
+WORKERS = 4
+
+MIN_LAT, MAX_LAT = 31.0, 49.0
+MIN_LON, MAX_LON = -125.0, -102.0
+CONFIDENCE_EXCLUDE = 'l'
+
+
+def file_signature(path):
+    st = os.stat(path)
+    return {'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+
+
+def load_manifest(out_dir=PARQUET_DIR):
+    path = os.path.join(out_dir, MANIFEST)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_manifest(manifest, out_dir=PARQUET_DIR):
+    path = os.path.join(out_dir, MANIFEST)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(path + '.tmp', path)
+
+
+def write_csv(csv_file, out_dir=PARQUET_DIR):
+    """One CSV -> Parquet files under out_dir/year=/month=/. Returns (rows, files written)."""
+    stem = os.path.splitext(os.path.basename(csv_file))[0]
+    con = duckdb.connect()
+    try:
+        rows, files = con.execute(f"""
+        COPY (
+            SELECT
+                '{os.path.basename(csv_file)}' AS source_file,
+                CAST(latitude AS FLOAT) AS latitude,
+                CAST(longitude AS FLOAT) AS longitude,
+                CAST(acq_date AS DATE) AS acq_date,
+                CAST(acq_time AS SMALLINT) AS acq_time,
+                CAST(brightness AS FLOAT) AS brightness,
+                CAST(frp AS FLOAT) AS frp,
+                confidence,
+                year(CAST(acq_date AS DATE)) AS year,
+                month(CAST(acq_date AS DATE)) AS month
+            FROM read_csv_auto('{csv_file}')
+            WHERE latitude BETWEEN {MIN_LAT} AND {MAX_LAT}
+              AND longitude BETWEEN {MIN_LON} AND {MAX_LON}
+              AND confidence != '{CONFIDENCE_EXCLUDE}'
+            ORDER BY acq_date, latitude, longitude
+        ) TO '{out_dir}' (FORMAT parquet, COMPRESSION zstd, PARTITION_BY (year, month),
+                          FILENAME_PATTERN '{stem}_{{i}}', OVERWRITE_OR_IGNORE true, RETURN_FILES true)
+        """).fetchone()
+    finally:
+        con.close()
+    return rows, sorted(os.path.relpath(f, out_dir) for f in files)
+
+
+def ingest(csv_files, out_dir=PARQUET_DIR, workers=WORKERS, force=False):
+    """Load new/changed CSVs in parallel. Returns {csv: (status, rows)} with status loaded/unchanged/missing."""
+    os.makedirs(out_dir, exist_ok=True)
+    manifest = load_manifest(out_dir)
+    results, todo = {}, []
+    for csv_file in csv_files:
+        if not os.path.exists(csv_file):
+            results[csv_file] = ('missing', 0)
+        elif not force and manifest.get(csv_file, {}).get('signature') == file_signature(csv_file):
+            results[csv_file] = ('unchanged', manifest[csv_file]['rows'])
+        else:
+            todo.append(csv_file)
+
+    # A changed CSV replaces everything it wrote last time
+    for csv_file in todo:
+        for rel in manifest.pop(csv_file, {}).get('files', []):
+            if os.path.exists(os.path.join(out_dir, rel)):
+                os.remove(os.path.join(out_dir, rel))
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        for csv_file, (rows, files) in zip(todo, pool.map(lambda f: write_csv(f, out_dir), todo)):
+            manifest[csv_file] = {'signature': file_signature(csv_file), 'rows': rows, 'files': files,
+                                  'ingested': datetime.now().isoformat(timespec='seconds')}
+            results[csv_file] = ('loaded', rows)
+    save_manifest(manifest, out_dir)
+    return results
+
+
+def create_view(con, name='fire_events', out_dir=PARQUET_DIR):
+    """(Re)point `name` at the Parquet dataset, replacing a table of the same name."""
+    kind = con.execute("SELECT table_type FROM information_schema.tables WHERE table_name = ?", [name]).fetchone()
+    if kind is not None and kind[0] == 'BASE TABLE':
+        con.execute(f"DROP TABLE {name}")
+    pattern = os.path.join(out_dir, '*', '*', '*.parquet')
+    # union_by_name: files written before acq_time was kept read it as NULL
+    # Partition keys renamed so they don't capture `... AS year ... GROUP BY year` in downstream queries
+    con.execute(f"""
+    CREATE OR REPLACE VIEW {name} AS
+    SELECT * EXCLUDE (year, month), year AS acq_year, month AS acq_month
+    FROM read_parquet('{pattern}', hive_partitioning = true, union_by_name = true)
+    """)
+
+
+def drop_view(con, name='fire_events'):
+    """Drop `name` if it is a view, so a table can take its place."""
+    kind = con.execute("SELECT table_type FROM information_schema.tables WHERE table_name = ?", [name]).fetchone()
+    if kind is not None and kind[0] == 'VIEW':
+        con.execute(f"DROP VIEW {name}")
+
+
+def parquet_files(out_dir=PARQUET_DIR):
+    return glob.glob(os.path.join(out_dir, '*', '*', '*.parquet'))
@@ -0,0 +1,310 @@
+# scripts/forecast_service.py
+# Long-running local forecast service.
+#
+# Loads risk_classifier_model.joblib and the static utah_grid_cells features
+# once, then answers HTTP requests without the per-run process start, model
+# load and DuckDB query of daily_risk_forecast_v3.py. Predictions for a date
+# are computed for all cells in one predict_proba call and kept in memory, with
+# the feature rows, so a cell's explanation is one TreeSHAP call (shap_engine.py).
+# A date not yet in memory is fetched and predicted outside the lock, once, however
+# many requests ask for it at the same time; other dates keep being served. Dates
+# from today on are refetched after --forecast-ttl seconds, since their forecasts change.
+#
+# Endpoints (date defaults to today):
+#   GET /risk?date=YYYY-MM-DD&bbox=min_lon,min_lat,max_lon,max_lat[&format=json|npy]
+#   GET /top?k=10&date=YYYY-MM-DD
+#   GET /explain?cell_id=1234&date=YYYY-MM-DD[&k=7]   per-feature SHAP contributions (log-odds)
+#   GET /stats    request count and p50/p99 latency per endpoint
+#   GET /health
+#
+# format=npy returns a .npy structured array (cell_id int16, grid_lat, grid_lon, prob float32).
+#
+# Example:
+#   python scripts/forecast_service.py --weather stub --port 8765
+#   curl "http://127.0.0.1:8765/top?k=5"
+import argparse
+import io
+import json
+import threading
+import time
+from collections import OrderedDict, defaultdict, deque
+from concurrent.futures import Future
+from datetime import date, datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import duckdb
+import numpy as np
+import pandas as pd
+from joblib import load
+
+from features import FEATURES, compute
+from shap_engine import CellExplainer
+from utah_grid import LAT_MIN, LAT_MAX, LON_MIN, LON_MAX, day_id_from_date
+from weather_providers import OPEN_METEO_URL, PROVIDERS, get_provider
+
+# ================= CONFIGURATION =================
+MODEL_PATH = 'risk_classifier_model.joblib'
+DB_PATH = 'eco_pyric.duckdb'
+CACHED_DATES = 32          # per-date prediction arrays kept in memory
+FORECAST_TTL_S = 3600      # dates >= today are refetched after this; past dates are kept
+LATENCY_WINDOW = 10000     # most recent requests per endpoint used for p50/p99
+
+RESULT_DTYPE = np.dtype([('cell_id', '<i2'), ('grid_lat', '<f4'), ('grid_lon', '<f4'), ('prob', '<f4')])
+
+
+def forecast_features(cells, day, weather):
+    """Feature frame for one date (shared registry in features.py, per-cell weather)."""
+    X = compute(FEATURES, {'cell_id': cells['cell_id'].values, 'day_id': day_id_from_date(day),
+                           'dist_to_road_km': cells['dist_to_road_km'].values,
+                           'tavg': weather['tavg'], 'rh': weather['rh'], 'prcp': weather['prcp']})
+    return pd.DataFrame(X, columns=FEATURES)
+
+
+class RiskForecaster:
+    """Model + per-cell features held in memory; one predict_proba per date."""
+
+    def __init__(self, model_path, db_path, provider, forecast_ttl=FORECAST_TTL_S):
+        self.model = load(model_path)
+        self.explainer = CellExplainer(self.model, model_path)
+        con = duckdb.connect(db_path, read_only=True)
+        self.cells = con.execute("""
+        SELECT cell_id, grid_lat, grid_lon, dist_to_road_km, dust_exposure
+        FROM utah_grid_cells
+        ORDER BY cell_id
+        """).fetchdf()
+        con.close()
+        self.provider = provider
+        self._lats = self.cells['grid_lat'].values
+        self._lons = self.cells['grid_lon'].values
+        self.forecast_ttl = forecast_ttl
+        self._by_date = OrderedDict()   # day -> (prob, X, monotonic time computed)
+        self._in_flight = {}            # day -> Future for a fetch + predict under way
+        self._lock = threading.Lock()
+
+    def _fresh(self, day, computed_at):
+        return day < date.today() or time.monotonic() - computed_at < self.forecast_ttl
+
+    def predicted(self, day):
+        """(float32 ignition probability, feature frame) for every cell (cell_id order) on one date."""
+        with self._lock:
+            entry = self._by_date.get(day)
+            if entry is not None and self._fresh(day, entry[2]):
+                self._by_date.move_to_end(day)
+                return entry[:2]
+            future = self._in_flight.get(day)
+            owner = future is None
+            if owner:
+                future = self._in_flight[day] = Future()
+        if not owner:
+            return future.result()
+
+        # The weather fetch (network, retries) and predict run without the lock
+        try:
+            weather = self.provider.daily(day, self._lats, self._lons)
+            X = forecast_features(self.cells, day, weather)
+            prob = self.model.predict_proba(X)[:, 1].astype(np.float32)
+        except BaseException as e:
+            with self._lock:
+                del self._in_flight[day]
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            self._by_date[day] = (prob, X, time.monotonic())
+            self._by_date.move_to_end(day)
+            if len(self._by_date) > CACHED_DATES:
+                self._by_date.popitem(last=False)
+            del self._in_flight[day]
+        future.set_result((prob, X))
+        return prob, X
+
+    def probabilities(self, day):
+        return self.predicted(day)[0]
+
+    def explain(self, day, cell_id, k=len(FEATURES)):
+        """Why one cell got its probability: the k largest SHAP contributions on that date."""
+        prob, X = self.predicted(day)
+        i = np.searchsorted(self.cells['cell_id'].values, cell_id)
+        if i >= len(prob) or self.cells['cell_id'].values[i] != cell_id:
+            raise ValueError(f"cell_id {cell_id} is not a grid cell")
+        drivers = self.explainer.top_drivers(X.iloc[[i]], k)[0]
+        return {'cell_id': int(cell_id), 'date': str(day), 'prob': float(prob[i]),
+                'base_value': self.explainer.base_value, 'contributions': drivers}
+
+    def risk(self, day, bbox=None):
+        prob = self.probabilities(day)
+        mask = np.ones(len(prob), dtype=bool)
+        if bbox is not None:
+            min_lon, min_lat, max_lon, max_lat = bbox
+            mask = ((self._lats >= min_lat) & (self._lats <= max_lat)
+                    & (self._lons >= min_lon) & (self._lons <= max_lon))
+        return self._records(np.flatnonzero(mask), prob)
+
+    def top(self, day, k):
+        if k < 1:
+            raise ValueError("k must be at least 1")
+        prob = self.probabilities(day)
+        k = min(k, len(prob))
+        idx = np.argpartition(-prob, k - 1)[:k]
+        return self._records(idx[np.argsort(-prob[idx], kind='stable')], prob)
+
+    def _records(self, idx, prob):
+        out = np.empty(len(idx), dtype=RESULT_DTYPE)
+        out['cell_id'] = self.cells['cell_id'].values[idx]
+        out['grid_lat'] = self._lats[idx]
+        out['grid_lon'] = self._lons[idx]
+        out['prob'] = prob[idx]
+        return out
+
+
+class LatencyStats:
+    def __init__(self, window=LATENCY_WINDOW):
+        self._samples = defaultdict(lambda: deque(maxlen=window))
+        self._counts = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def record(self, endpoint, seconds):
+        with self._lock:
+            self._samples[endpoint].append(seconds * 1000)
+            self._counts[endpoint] += 1
+
+    def summary(self):
+        with self._lock:
+            return {
+                endpoint: {
+                    'requests': self._counts[endpoint],
+                    'p50_ms': round(float(np.percentile(samples, 50)), 3),
+                    'p99_ms': round(float(np.percentile(samples, 99)), 3)
+                }
+                for endpoint, samples in self._samples.items() if samples
+            }
+
+
+def parse_date(value):
+    return datetime.strptime(value, '%Y-%m-%d').date() if value else date.today()
+
+
+def parse_k(value, default):
+    k = int(value) if value else default
+    if k < 1:
+        raise ValueError("k must be at least 1")
+    return k
+
+
+def parse_bbox(value):
+    if not value:
+        return None
+    parts = [float(v) for v in value.split(',')]
+    if len(parts) != 4:
+        raise ValueError("bbox must be min_lon,min_lat,max_lon,max_lat")
+    return parts
+
+
+class ForecastHandler(BaseHTTPRequestHandler):
+    forecaster = None
+    stats = None
+    quiet = False
+
+    def do_GET(self):
+        start = time.perf_counter()
+        url = urlparse(self.path)
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        endpoint = url.path.rstrip('/') or '/'
+
+        try:
+            if endpoint == '/risk':
+                records = self.forecaster.risk(parse_date(query.get('date')), parse_bbox(query.get('bbox')))
+                self._send_records(records, query.get('format', 'json'))
+            elif endpoint == '/top':
+                records = self.forecaster.top(parse_date(query.get('date')), parse_k(query.get('k'), 10))
+                self._send_records(records, query.get('format', 'json'))
+            elif endpoint == '/explain':
+                if 'cell_id' not in query:
+                    raise ValueError("cell_id is required")
+                self._send_json(self.forecaster.explain(parse_date(query.get('date')), int(query['cell_id']),
+                                                        parse_k(query.get('k'), len(FEATURES))))
+            elif endpoint == '/stats':
+                self._send_json(self.stats.summary())
+            elif endpoint == '/health':
+                self._send_json({'status': 'ok', 'cells': len(self.forecaster.cells),
+                                 'weather': self.forecaster.provider.name})
+            else:
+                self._send_json({'error': f"unknown endpoint {endpoint}"}, status=404)
+                return
+        except ValueError as e:
+            self._send_json({'error': str(e)}, status=400)
+            return
+        except Exception as e:
+            self._send_json({'error': f"{type(e).__name__}: {e}"}, status=500)
+            return
+
+        if endpoint in ('/risk', '/top', '/explain'):
+            self.stats.record(endpoint, time.perf_counter() - start)
+
+    def _send_records(self, records, fmt):
+        if fmt == 'npy':
+            buf = io.BytesIO()
+            np.save(buf, records)
+            self._send(buf.getvalue(), 'application/x-npy')
+        elif fmt == 'json':
+            self._send_json({
+                'count': len(records),
+                'cells': [{'cell_id': int(r['cell_id']), 'grid_lat': round(float(r['grid_lat']), 4),
+                           'grid_lon': round(float(r['grid_lon']), 4), 'prob': float(r['prob'])}
+                          for r in records]
+            })
+        else:
+            raise ValueError("format must be json or npy")
+
+    def _send_json(self, payload, status=200):
+        self._send(json.dumps(payload).encode(), 'application/json', status)
+
+    def _send(self, body, content_type, status=200):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if not self.quiet:
+            super().log_message(format, *args)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve daily Utah ignition risk over HTTP")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--model', default=MODEL_PATH)
+    parser.add_argument('--db', default=DB_PATH)
+    parser.add_argument('--weather', default='open-meteo-lattice', choices=sorted(PROVIDERS))
+    parser.add_argument('--weather-url', default=OPEN_METEO_URL, help="Open-Meteo endpoint (or scripts/open_meteo_stub.py)")
+    parser.add_argument('--weather-file', default=None, help="JSON of per-date values for --weather stub")
+    parser.add_argument('--forecast-ttl', type=int, default=FORECAST_TTL_S,
+                        help="seconds before a date >= today is refetched")
+    parser.add_argument('--quiet', action='store_true', help="don't log every request")
+    args = parser.parse_args()
+
+    print("=== UTAH WILDFIRE RISK FORECAST SERVICE ===")
+    print(f"Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+
+    provider_args = {'stub': {'path': args.weather_file}, 'noaa-cube': {}}
+    provider = get_provider(args.weather, **provider_args.get(args.weather, {'base_url': args.weather_url}))
+    start = time.time()
+    ForecastHandler.forecaster = RiskForecaster(args.model, args.db, provider, args.forecast_ttl)
+    ForecastHandler.stats = LatencyStats()
+    ForecastHandler.quiet = args.quiet
+    print(f"Loaded model and {len(ForecastHandler.forecaster.cells):,} grid cells in {time.time() - start:.1f} seconds")
+    print(f"Weather provider: {provider.name}")
+    print(f"Grid bbox: {LON_MIN},{LAT_MIN},{LON_MAX},{LAT_MAX}")
+
+    server = ThreadingHTTPServer((args.host, args.port), ForecastHandler)
+    print(f"Serving on http://{args.host}:{args.port}  (/risk, /top, /explain, /stats, /health)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    server.server_close()
+    print(f"Latency: {ForecastHandler.stats.summary()}")
+    print("Done.")
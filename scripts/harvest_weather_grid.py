@@ -1,9 +1,26 @@
-import pandas as pd
+# scripts/harvest_weather_grid.py
+# Meteostat daily weather for the closest active station to each point of a 2° western-US lattice.
+#
+#   python scripts/harvest_weather_grid.py [--workers 8] [--start 2020-01-01] [--end YYYY-MM-DD]
+#
+# Point lookups and station downloads run on a bounded thread pool. Progress is
+# checkpointed to <out>/manifest.json after every point / station, so a crashed or
+# interrupted run picks up where it stopped. Stations already downloaded are only
+# topped up with the dates outside their covered range.
+#
+# Output: <out>/station=<id>/year=<yyyy>/<first>_<last>.parquet (hive-partitioned;
+# read the station id from the station_id column, not the directory name).
+import argparse
+import json
 import os
-from datetime import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pandas as pd
 from meteostat import stations, daily  # FIXED: lowercase 'stations' and 'daily'
 from tqdm import tqdm
-import numpy as np  # For np.arange
 
 # ================= CONFIGURATION =================
 MIN_LAT, MAX_LAT = 31, 49
@@ -12,84 +29,172 @@ MIN_LON, MAX_LON = -125, -102
 LAT_STEP = 2.0
 LON_STEP = 2.0
 
-START_DATE = datetime(2020, 1, 1)
-END_DATE = datetime(2024, 12, 31)
+START_DATE = date(2020, 1, 1)
+ACTIVE_SINCE = datetime(2023, 1, 1)  # only stations with daily data from here on
 
 OUTPUT_DIR = "weather_grid_data"
-os.makedirs(OUTPUT_DIR, exist_ok=True)
-
-# ================= MAIN SCRIPT =================
-print(f"--- STARTING WESTERN US WEATHER GRID HARVEST ---")
-print(f"Scanning from {MIN_LAT}N to {MAX_LAT}N and {MIN_LON}W to {MAX_LON}W...")
-
-downloaded_stations = set()
-manifest_data = []
-
-# Progress bar setup
-lat_points = np.arange(MIN_LAT, MAX_LAT + LAT_STEP, LAT_STEP)
-lon_points = np.arange(MIN_LON, MAX_LON + LON_STEP, LON_STEP)
-total_points = len(lat_points) * len(lon_points)
-
-with tqdm(total=total_points, desc="Grid scan") as pbar:
-    current_lat = MIN_LAT
-    while current_lat <= MAX_LAT:
-        current_lon = MIN_LON
-        while current_lon <= MAX_LON:
-            
+MANIFEST_CSV = "weather_stations_manifest.csv"
+WEATHER_COLS = ['tavg', 'tmax', 'tmin', 'wspd', 'prcp']
+WORKERS = 8
+
+
+def grid_points():
+    lat_points = np.arange(MIN_LAT, MAX_LAT + LAT_STEP, LAT_STEP)
+    lon_points = np.arange(MIN_LON, MAX_LON + LON_STEP, LON_STEP)
+    return [(float(lat), float(lon)) for lat in lat_points for lon in lon_points]
+
+
+def point_key(lat, lon):
+    return f"{lat:.2f},{lon:.2f}"
+
+
+class Checkpoint:
+    """manifest.json: {'points': {key: station | None}, 'stations': {id: {..., 'covered': [first, last]}}}."""
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.data = {'points': {}, 'stations': {}}
+        if os.path.exists(path):
+            with open(path) as f:
+                self.data = json.load(f)
+
+    def update(self, section, key, value):
+        with self.lock:
+            self.data[section][key] = value
+            tmp = self.path + '.tmp'
+            with open(tmp, 'w') as f:
+                json.dump(self.data, f, indent=1, sort_keys=True)
+            os.replace(tmp, self.path)  # never leave a half-written manifest
+
+
+def find_station(lat, lon):
+    """Closest station with recent daily data, as a dict (or None)."""
+    nearby = stations().nearby(lat, lon).inventory('daily', ACTIVE_SINCE)
+    station = nearby.fetch(1)
+    if station.empty:
+        return None
+    row = station.iloc[0]
+    return {'station_id': str(station.index[0]), 'name': row['name'],
+            'latitude': float(row['latitude']), 'longitude': float(row['longitude'])}
+
+
+def missing_ranges(covered, start, end):
+    """Date ranges that extend the covered (first, last) to include [start, end], kept contiguous."""
+    if covered is None:
+        return [(start, end)]
+    first, last = (date.fromisoformat(d) for d in covered)
+    ranges = []
+    if start < first:
+        ranges.append((start, first - timedelta(days=1)))
+    if end > last:
+        ranges.append((last + timedelta(days=1), end))
+    return ranges
+
+
+def write_parts(out_dir, station_id, df, first, last):
+    """One parquet file per year of df; file names come from the fetched range, so a retry overwrites."""
+    rows = 0
+    for year, part in df.groupby(df['date'].dt.year):
+        part_dir = os.path.join(out_dir, f"station={station_id}", f"year={year}")
+        os.makedirs(part_dir, exist_ok=True)
+        path = os.path.join(part_dir, f"{first:%Y%m%d}_{last:%Y%m%d}.parquet")
+        part.to_parquet(path + '.tmp', index=False)
+        os.replace(path + '.tmp', path)
+        rows += len(part)
+    return rows
+
+
+def harvest_station(station, ranges, out_dir):
+    rows = 0
+    for first, last in ranges:
+        df = daily(station['station_id'], datetime.combine(first, datetime.min.time()),
+                   datetime.combine(last, datetime.min.time())).fetch()
+        if df.empty:
+            continue
+        df = df.reindex(columns=WEATHER_COLS).rename_axis('date').reset_index()
+        df['date'] = pd.to_datetime(df['date'])
+        df.insert(0, 'station_id', station['station_id'])
+        rows += write_parts(out_dir, station['station_id'], df, first, last)
+    return rows
+
+
+def run(out_dir=OUTPUT_DIR, start=START_DATE, end=None, workers=WORKERS, manifest_csv=MANIFEST_CSV):
+    end = end or date.today() - timedelta(days=1)
+    os.makedirs(out_dir, exist_ok=True)
+    checkpoint = Checkpoint(os.path.join(out_dir, 'manifest.json'))
+    points = checkpoint.data['points']
+    errors = 0
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        # ---- grid point -> closest station (skipping points resolved on an earlier run)
+        todo = [p for p in grid_points() if point_key(*p) not in points]
+        print(f"Grid points: {len(grid_points())} ({len(grid_points()) - len(todo)} resolved earlier)")
+        futures = {pool.submit(find_station, *p): p for p in todo}
+        for fut in tqdm(as_completed(futures), total=len(futures), desc="Grid scan"):
+            lat, lon = futures[fut]
             try:
-                # Create Stations instance
-                nearby = stations()
-                # Find stations near this grid point
-                nearby = nearby.nearby(current_lat, current_lon)
-                # Filter for stations with daily data in 2023 (to ensure active)
-                nearby = nearby.inventory('daily', (datetime(2023, 1, 1)))
-                
-                # Fetch the closest one
-                station = nearby.fetch(1)
-                
-                if not station.empty:
-                    station_id = station.index[0]
-                    station_name = station.iloc[0]['name']
-                    
-                    if station_id not in downloaded_stations:
-                        
-                        print(f"   Grid ({current_lat}, {current_lon}) -> Found: {station_name} ({station_id})")
-                        
-                        # Download data
-                        data = daily(station_id, START_DATE, END_DATE)
-                        df = data.fetch()
-                        
-                        if not df.empty:
-                            clean_df = df[['tavg', 'tmax', 'tmin', 'wspd', 'prcp']]
-                            
-                            filename = f"{station_id}.csv"
-                            filepath = os.path.join(OUTPUT_DIR, filename)
-                            clean_df.to_csv(filepath)
-                            
-                            manifest_data.append({
-                                'station_id': station_id,
-                                'name': station_name,
-                                'latitude': station.iloc[0]['latitude'],
-                                'longitude': station.iloc[0]['longitude'],
-                                'filename': filename
-                            })
-                            
-                            downloaded_stations.add(station_id)
-                    
+                station = fut.result()
             except Exception as e:
-                print(f"Error at {current_lat}, {current_lon}: {e}")
-            
-            current_lon += LON_STEP
-            pbar.update(1)
-        current_lat += LAT_STEP
-
-# Save manifest
-manifest_df = pd.DataFrame(manifest_data)
-manifest_df.to_csv("weather_stations_manifest.csv", index=False)
-
-print("\n" + "="*30)
-print(f"HARVEST COMPLETE.")
-print(f"Total Stations Downloaded: {len(downloaded_stations)}")
-print(f"Data saved in folder: {OUTPUT_DIR}/")
-print(f"Index file created: weather_stations_manifest.csv")
-print("="*30)
\ No newline at end of file
+                print(f"Error at {lat}, {lon}: {e}")  # not checkpointed -> retried next run
+                errors += 1
+                continue
+            checkpoint.update('points', point_key(lat, lon), station)
+
+        # ---- download / top up each station (including ones a crashed run resolved but never fetched)
+        known = checkpoint.data['stations']
+        found = {s['station_id']: s for s in points.values() if s is not None}
+        jobs = {}
+        for station_id, station in found.items():
+            covered = known.get(station_id, {}).get('covered')
+            ranges = missing_ranges(covered, start, end)
+            if ranges:
+                jobs[pool.submit(harvest_station, station, ranges, out_dir)] = (station, covered, ranges)
+        print(f"Stations: {len(found)} ({len(jobs)} to download or top up)")
+
+        new_rows = 0
+        for fut in tqdm(as_completed(jobs), total=len(jobs), desc="Stations"):
+            station, covered, ranges = jobs[fut]
+            try:
+                rows = fut.result()
+            except Exception as e:
+                print(f"Error downloading {station['name']} ({station['station_id']}): {e}")
+                errors += 1
+                continue
+            new_rows += rows
+            bounds = [d for r in ranges for d in r] + [date.fromisoformat(d) for d in (covered or [])]
+            checkpoint.update('stations', station['station_id'], {
+                **{k: station[k] for k in ('station_id', 'name', 'latitude', 'longitude')},
+                'covered': [min(bounds).isoformat(), max(bounds).isoformat()],
+                'rows': known.get(station['station_id'], {}).get('rows', 0) + rows,
+                'updated': datetime.now().isoformat(timespec='seconds')
+            })
+
+    stations_df = pd.DataFrame([
+        {**{k: v for k, v in s.items() if k != 'covered'}, 'first_date': s['covered'][0],
+         'last_date': s['covered'][1], 'filename': f"station={s['station_id']}"}
+        for s in checkpoint.data['stations'].values()
+    ])
+    stations_df.to_csv(manifest_csv, index=False)
+    return {'stations': len(stations_df), 'jobs': len(jobs), 'rows': new_rows, 'errors': errors}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Harvest Meteostat daily weather on a western-US lattice")
+    parser.add_argument('--out', default=OUTPUT_DIR)
+    parser.add_argument('--start', type=date.fromisoformat, default=START_DATE)
+    parser.add_argument('--end', type=date.fromisoformat, default=None, help="last day (default: yesterday)")
+    parser.add_argument('--workers', type=int, default=WORKERS, help="concurrent Meteostat requests")
+    args = parser.parse_args()
+
+    print(f"--- STARTING WESTERN US WEATHER GRID HARVEST ---")
+    print(f"Scanning from {MIN_LAT}N to {MAX_LAT}N and {MIN_LON}W to {MAX_LON}W...")
+    result = run(args.out, args.start, args.end, args.workers)
+
+    print("\n" + "="*30)
+    print(f"HARVEST COMPLETE." if not result['errors'] else f"HARVEST INCOMPLETE — {result['errors']} errors, re-run to resume.")
+    print(f"Total Stations Downloaded: {result['stations']}")
+    print(f"New rows this run: {result['rows']:,} ({result['jobs']} stations downloaded or topped up)")
+    print(f"Data saved in folder: {args.out}/ (partitioned Parquet)")
+    print(f"Index file created: {MANIFEST_CSV}")
+    print("="*30)
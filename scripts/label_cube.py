@@ -0,0 +1,249 @@
+# scripts/label_cube.py
+# Bit-packed ignition labels: the whole grid history in ~1.7 MB instead of a
+# 13.5M-row table. Row d of the packed array is day first_day + d, bit c of a row
+# is cell_id c (np.packbits over the 2,601 cells -> 326 bytes per day).
+#
+# Stored as data/label_cube/labels.npy (memory-mapped on open) + labels.json.
+# Slicing by date range is a row slice of the packed array; a bbox is cut out of
+# the unpacked days. to_long() gives the utah_grid_ignition_labels layout back.
+#
+# Labels come in two modes: every detection's cell-day, or only each fire event's
+# start cell-day (scripts_create_utah_grid_labels.py --first-day-only). The mode is
+# recorded as a comment on the labels table and in labels.json, so rebuilds and
+# incremental updates (update_nrt.py) keep to the table's definition.
+#
+#   python scripts/label_cube.py             # rebuild from fire_events_utah, in the table's mode
+#   python scripts/label_cube.py --check     # ... and compare with utah_grid_ignition_labels
+#   python scripts/label_cube.py --set-mode every-detection   # record the mode of an older table
+import argparse
+import json
+import os
+import time
+from datetime import datetime
+
+import duckdb
+import numpy as np
+import pandas as pd
+
+from utah_grid import (GRID_STEP, IN_GRID_SQL, LAT_MIN, LON_MIN, N_CELLS, N_LAT, N_LON,
+                       date_from_day_id, day_id_from_date, register_grid_macros)
+
+LABEL_CUBE_DIR = os.path.join('data', 'label_cube')
+LABELS_TABLE = 'utah_grid_ignition_labels'
+
+EVERY_DETECTION = 'every-detection'
+FIRST_DAY_ONLY = 'first-day-only'
+LABEL_MODES = [EVERY_DETECTION, FIRST_DAY_ONLY]
+
+# Event start cell-days (cluster_fire_events.py); events starting outside the grid have start_cell_id -1
+EVENT_STARTS_SQL = """
+SELECT DISTINCT start_cell_id AS cell_id, start_day_id AS day_id
+FROM {clusters}
+WHERE start_cell_id >= 0
+"""
+
+
+# ================= LABEL MODE =================
+def set_label_mode(con, table, mode):
+    """Record how the table's ignitions were defined (a table comment; CREATE OR REPLACE clears it)."""
+    if mode not in LABEL_MODES:
+        raise ValueError(f"label mode must be one of {LABEL_MODES}")
+    con.execute(f"COMMENT ON TABLE {table} IS 'label_mode={mode}'")
+
+
+def get_label_mode(con, table=LABELS_TABLE):
+    """The table's recorded label mode, or None for a table built before modes were recorded."""
+    row = con.execute("SELECT comment FROM duckdb_tables() WHERE table_name = ?", [table]).fetchone()
+    comment = (row[0] or '') if row else ''
+    return comment[len('label_mode='):] if comment.startswith('label_mode=') else None
+
+
+def _day_id(day):
+    """day_id from an int day id or anything date-like."""
+    if isinstance(day, (int, np.integer)):
+        return int(day)
+    return int(day_id_from_date(day))
+
+
+class LabelCube:
+    """Daily ignition labels on the grid as packed bits; all day bounds are inclusive."""
+
+    def __init__(self, bits, first_day):
+        self.bits = bits                # (n_days, ceil(N_CELLS / 8)) uint8, possibly a memmap
+        self.first_day = int(first_day)
+        self.n_days = len(bits)
+        self.last_day = self.first_day + self.n_days - 1
+
+    # ================= BUILDING =================
+    @classmethod
+    def from_pairs(cls, cell_id, day_id, first_day=None, last_day=None):
+        """Cube from the (cell_id, day_id) of every ignition; the range defaults to the ignitions'."""
+        day_id = np.asarray(day_id, dtype=np.int64)
+        first_day = int(day_id.min()) if first_day is None else first_day
+        last_day = int(day_id.max()) if last_day is None else last_day
+        dense = np.zeros((last_day - first_day + 1, N_CELLS), dtype=np.uint8)
+        dense[day_id - first_day, np.asarray(cell_id, dtype=np.int64)] = 1
+        return cls(np.packbits(dense, axis=1), first_day)
+
+    @classmethod
+    def from_fires(cls, con, table='fire_events_utah'):
+        """Rebuild from the raw detections, snapped to cells the same way as the labels table."""
+        register_grid_macros(con)
+        fires = con.execute(f"""
+        SELECT DISTINCT latlon_to_cell(latitude, longitude) AS cell_id, date_to_day(acq_date) AS day_id
+        FROM {table}
+        WHERE {IN_GRID_SQL}
+        """).fetchnumpy()
+        return cls.from_pairs(fires['cell_id'], fires['day_id'])
+
+    @classmethod
+    def from_event_starts(cls, con, table='fire_events_utah', clusters='fire_event_clusters'):
+        """First-day-only labels: event start cell-days, over the detections' day range like the table."""
+        register_grid_macros(con)
+        first_day, last_day = con.execute(f"""
+        SELECT MIN(date_to_day(acq_date)), MAX(date_to_day(acq_date)) FROM {table} WHERE {IN_GRID_SQL}
+        """).fetchone()
+        starts = con.execute(f"""
+        SELECT * FROM ({EVENT_STARTS_SQL.format(clusters=clusters)}) WHERE day_id BETWEEN {first_day} AND {last_day}
+        """).fetchnumpy()
+        return cls.from_pairs(starts['cell_id'], starts['day_id'], first_day, last_day)
+
+    @classmethod
+    def from_table(cls, con, table=LABELS_TABLE):
+        """Pack an existing long labels table (keeps its day range, ignition-free days included)."""
+        first_day, last_day = con.execute(f"SELECT MIN(day_id), MAX(day_id) FROM {table}").fetchone()
+        fires = con.execute(f"SELECT cell_id, day_id FROM {table} WHERE ignition = 1").fetchnumpy()
+        return cls.from_pairs(fires['cell_id'], fires['day_id'], first_day, last_day)
+
+    # ================= STORAGE =================
+    def save(self, cube_dir=LABEL_CUBE_DIR, source=None, label_mode=None):
+        os.makedirs(cube_dir, exist_ok=True)
+        path = os.path.join(cube_dir, 'labels.npy')
+        with open(path + '.tmp', 'wb') as f:
+            np.save(f, np.ascontiguousarray(self.bits))
+        os.replace(path + '.tmp', path)
+        with open(os.path.join(cube_dir, 'labels.json'), 'w') as f:
+            json.dump({'first_day': self.first_day, 'n_days': self.n_days, 'n_cells': N_CELLS,
+                       'first_date': str(date_from_day_id(self.first_day)),
+                       'last_date': str(date_from_day_id(self.last_day)),
+                       'n_ignitions': self.n_ignitions(), 'source': source, 'label_mode': label_mode,
+                       'built': datetime.now().isoformat(timespec='seconds')}, f, indent=2)
+
+    @classmethod
+    def open(cls, cube_dir=LABEL_CUBE_DIR):
+        with open(os.path.join(cube_dir, 'labels.json')) as f:
+            meta = json.load(f)
+        return cls(np.load(os.path.join(cube_dir, 'labels.npy'), mmap_mode='r'), meta['first_day'])
+
+    # ================= SLICING =================
+    def day_range(self, start=None, end=None):
+        """Inclusive (first, last) day ids clipped to the cube."""
+        first = self.first_day if start is None else max(_day_id(start), self.first_day)
+        last = self.last_day if end is None else min(_day_id(end), self.last_day)
+        return first, last
+
+    def dense(self, start=None, end=None, bbox=None):
+        """(days, lat, lon) uint8 labels for start..end; bbox = (lat_min, lat_max, lon_min, lon_max) in degrees."""
+        first, last = self.day_range(start, end)
+        rows = self.bits[max(first - self.first_day, 0):max(last - self.first_day + 1, 0)]
+        cube = np.unpackbits(rows, axis=1, count=N_CELLS).reshape(len(rows), N_LAT, N_LON)
+        if bbox is not None:
+            lat_idx, lon_idx = self.bbox_index(bbox)
+            cube = cube[:, lat_idx, lon_idx]
+        return cube
+
+    @staticmethod
+    def bbox_index(bbox):
+        """(lat slice, lon slice) of the cells whose centres fall inside the bbox."""
+        lat_min, lat_max, lon_min, lon_max = bbox
+        to_idx = lambda v, origin, n, fn: int(np.clip(fn(round((v - origin) / GRID_STEP, 6)), 0, n))
+        return (slice(to_idx(lat_min, LAT_MIN, N_LAT, np.ceil), to_idx(lat_max, LAT_MIN, N_LAT, np.floor) + 1),
+                slice(to_idx(lon_min, LON_MIN, N_LON, np.ceil), to_idx(lon_max, LON_MIN, N_LON, np.floor) + 1))
+
+    def cell_ids(self, bbox=None):
+        """cell_ids covered by dense(bbox=...), row-major."""
+        ids = np.arange(N_CELLS, dtype=np.int16).reshape(N_LAT, N_LON)
+        return (ids if bbox is None else ids[self.bbox_index(bbox)]).ravel()
+
+    def ignitions(self, start=None, end=None, bbox=None):
+        """(cell_id, day_id) int16 arrays of the ignitions in the slice, in day order."""
+        first, _ = self.day_range(start, end)
+        cube = self.dense(start, end, bbox)
+        d, i = np.nonzero(cube.reshape(len(cube), -1))
+        return self.cell_ids(bbox)[i], (d + first).astype(np.int16)
+
+    def to_long(self, start=None, end=None, bbox=None):
+        """utah_grid_ignition_labels-style frame (cell_id, day_id, ignition), ordered by cell_id, day_id."""
+        first, _ = self.day_range(start, end)
+        cube = self.dense(start, end, bbox)
+        n_days = len(cube)
+        cells = self.cell_ids(bbox)
+        return pd.DataFrame({
+            'cell_id': np.repeat(cells, n_days),
+            'day_id': np.tile(np.arange(first, first + n_days, dtype=np.int16), len(cells)),
+            'ignition': cube.reshape(n_days, -1).T.ravel().astype(np.int8)
+        })
+
+    def n_ignitions(self):
+        return int(np.unpackbits(self.bits, axis=1, count=N_CELLS).sum(dtype=np.int64))
+
+    def daily_counts(self, start=None, end=None, bbox=None):
+        """Ignition cells per day for start..end."""
+        return self.dense(start, end, bbox).sum(axis=(1, 2), dtype=np.int32)
+
+
+def open_label_cube(cube_dir=LABEL_CUBE_DIR):
+    """The saved cube, or None if label_cube.py hasn't been run."""
+    if not os.path.exists(os.path.join(cube_dir, 'labels.json')):
+        return None
+    return LabelCube.open(cube_dir)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Rebuild the bit-packed ignition label cube")
+    parser.add_argument('--db', default='eco_pyric.duckdb')
+    parser.add_argument('--out', default=LABEL_CUBE_DIR)
+    parser.add_argument('--table', default=LABELS_TABLE, help="labels table whose mode the rebuild follows")
+    parser.add_argument('--first-day-only', action='store_true',
+                        help="label only event start cell-days (default: the table's recorded mode)")
+    parser.add_argument('--check', action='store_true', help="verify against the long labels table")
+    parser.add_argument('--set-mode', choices=LABEL_MODES, default=None,
+                        help="record the label mode of an existing table and exit")
+    args = parser.parse_args()
+
+    print("=== BUILDING BIT-PACKED LABEL CUBE ===")
+    print(f"Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    con = duckdb.connect(args.db, read_only=args.set_mode is None)
+    if args.set_mode:
+        set_label_mode(con, args.table, args.set_mode)
+        con.close()
+        print(f"Recorded label mode '{args.set_mode}' on {args.table}")
+        raise SystemExit(0)
+
+    has_table = con.execute("SELECT COUNT(*) FROM duckdb_tables() WHERE table_name = ?", [args.table]).fetchone()[0]
+    mode = FIRST_DAY_ONLY if args.first_day_only else (get_label_mode(con, args.table) if has_table else None)
+    mode = mode or EVERY_DETECTION
+    print(f"Ignitions: {mode}")
+
+    t0 = time.time()
+    if mode == FIRST_DAY_ONLY:
+        from cluster_fire_events import CLUSTERS_TABLE
+        cube = LabelCube.from_event_starts(con, clusters=CLUSTERS_TABLE)
+        cube.save(args.out, source=CLUSTERS_TABLE, label_mode=mode)
+    else:
+        cube = LabelCube.from_fires(con)
+        cube.save(args.out, source='fire_events_utah', label_mode=mode)
+    print(f"{cube.n_days:,} days x {N_CELLS:,} cells, {cube.n_ignitions():,} ignition cell-days "
+          f"({date_from_day_id(cube.first_day)} to {date_from_day_id(cube.last_day)})")
+    print(f"Saved {cube.bits.nbytes / 1024**2:.2f} MB to {args.out}/ in {time.time() - t0:.2f} seconds")
+
+    if args.check:
+        table = con.execute(f"""
+        SELECT cell_id, day_id, ignition FROM {args.table} ORDER BY cell_id, day_id
+        """).fetchdf()
+        long = LabelCube.open(args.out).to_long()
+        for col in ['cell_id', 'day_id', 'ignition']:
+            assert np.array_equal(table[col].to_numpy(), long[col].to_numpy()), col
+        print(f"Check: matches {args.table} ({len(table):,} rows)")
+    con.close()
+    print("Done.")
@@ -1,10 +1,9 @@
 import duckdb
 import pandas as pd
-import numpy as np
-import os
 from datetime import datetime
-from tqdm import tqdm
-from scipy.spatial.distance import cdist
+
+from noaa_station_days import load_station_days, refresh_station_days
+from station_lookup import K_NEAREST, lookup_weather
 
 print("=== FINAL NOAA WEATHER MERGE – UTAH-FOCUSED ===")
 print(f"Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
@@ -18,39 +17,22 @@ OUTPUT_TABLE = 'fire_events_with_noaa_weather'
 con = duckdb.connect(DB_FILE)
 print("Connected to DuckDB.")
 
-# ================= LOAD & CLEAN NOAA WEATHER =================
+# ================= LOAD NOAA WEATHER =================
+# CSVs -> noaa_station_days (typed DuckDB read_csv, one row per station-day);
+# only files not loaded before are read
 print("Loading NOAA weather files...")
-weather_dfs = []
-
-for filename in os.listdir(WEATHER_DIR):
-    if filename.startswith('weather') or filename.endswith('.csv'):
-        filepath = os.path.join(WEATHER_DIR, filename)
-        try:
-            df = pd.read_csv(filepath, parse_dates=['DATE'])
-            print(f"  Loaded {filename} ({len(df):,} rows)")
-            weather_dfs.append(df)
-        except Exception as e:
-            print(f"  Error loading {filename}: {e}")
-
-if not weather_dfs:
+try:
+    refresh = refresh_station_days(con, WEATHER_DIR)
+except FileNotFoundError:
     print("No files loaded — check 'data/weather_noaa/' folder.")
     exit(1)
+for filename in refresh['files']:
+    print(f"  Loaded {filename}")
+print(f"noaa_station_days: {refresh['mode']}")
 
-df_weather = pd.concat(weather_dfs, ignore_index=True)
-print(f"Total raw weather records: {len(df_weather):,}")
-
-# Deduplicate: keep row with most non-null values per STATION + DATE
-df_weather['DATE'] = pd.to_datetime(df_weather['DATE']).dt.date
-df_weather['non_null_count'] = df_weather.notna().sum(axis=1)
-
-df_weather_clean = df_weather.loc[df_weather.groupby(['STATION', 'DATE'])['non_null_count'].idxmax()]
-df_weather_clean = df_weather_clean.drop(columns=['non_null_count'])
-
-print(f"After deduplication: {len(df_weather_clean):,} unique station-days")
-
-# Keep useful columns
 keep_cols = ['STATION', 'NAME', 'LATITUDE', 'LONGITUDE', 'ELEVATION', 'DATE', 'TAVG', 'TMAX', 'TMIN', 'AWND', 'PRCP', 'SNOW', 'SNWD', 'WSF2', 'WSF5']
-df_weather_clean = df_weather_clean[[col for col in keep_cols if col in df_weather_clean.columns]]
+df_weather_clean = load_station_days(con, keep_cols, WEATHER_DIR, refresh=False)
+print(f"Unique station-days: {len(df_weather_clean):,}")
 
 # ================= LOAD UTAH FIRE DATA (FAST & FOCUSED) =================
 print("Loading Utah fire data...")
@@ -61,26 +43,25 @@ FROM fire_events_utah
 
 print(f"Loaded {len(df_fires):,} Utah fire events")
 
-# ================= NEAREST STATION FOR EACH FIRE =================
-print("Mapping nearest stations...")
-fire_coords = df_fires[['latitude', 'longitude']].values
-station_coords = df_weather_clean[['LATITUDE', 'LONGITUDE']].drop_duplicates().values
-
-distances = cdist(fire_coords, station_coords, metric='euclidean')
-nearest_idx = distances.argmin(axis=1)
+# ================= NEAREST REPORTING STATION =================
+# KD-tree over stations; per variable, the closest of the K nearest stations that reported it that day
+print(f"Looking up nearest reporting stations (k={K_NEAREST})...")
+weather_vars = [col for col in keep_cols if col in df_weather_clean.columns
+                and col not in ('STATION', 'NAME', 'LATITUDE', 'LONGITUDE', 'ELEVATION', 'DATE')]
+df_weather_clean['DATE'] = pd.to_datetime(df_weather_clean['DATE']).dt.date
+df_fires['acq_date'] = pd.to_datetime(df_fires['acq_date']).dt.date
 
-df_fires['nearest_station'] = df_weather_clean.iloc[nearest_idx]['STATION'].values
+df_station_weather, hit_rate = lookup_weather(df_fires, df_weather_clean, weather_vars)
+station_names = df_weather_clean.drop_duplicates('STATION').set_index('STATION')['NAME']
 
-# ================= MERGE WEATHER =================
-df_fires['acq_date'] = pd.to_datetime(df_fires['acq_date']).dt.date
-df_weather_clean['DATE'] = pd.to_datetime(df_weather_clean['DATE']).dt.date
+df_merged = df_fires.join(df_station_weather)
+df_merged['NAME'] = df_merged['STATION'].map(station_names)
+station_cols = df_merged.select_dtypes('category').columns
+df_merged[station_cols] = df_merged[station_cols].astype(object)  # plain VARCHAR in DuckDB, not ENUM
 
-df_merged = df_fires.merge(
-    df_weather_clean,
-    left_on=['nearest_station', 'acq_date'],
-    right_on=['STATION', 'DATE'],
-    how='left'
-)
+print("Hit rate by variable (fires with a reporting station that day):")
+for var, rate in hit_rate.items():
+    print(f"  {var:<5} {rate:.1%}")
 
 print("\nSample merged rows (first 10):")
 print(df_merged[['acq_date', 'latitude', 'longitude', 'dust_exposure', 'TAVG', 'TMAX', 'TMIN', 'AWND', 'PRCP', 'SNOW']].head(10))
@@ -1,4 +1,9 @@
+import argparse
+import os
+import time
+
 import duckdb
+import numpy as np
 import pandas as pd
 from sklearn.model_selection import train_test_split
 from xgboost import XGBRegressor
@@ -8,6 +13,22 @@ import matplotlib.pyplot as plt
 from datetime import datetime
 from math import sqrt
 
+import physics
+from features import compute
+from shap_engine import explain_sample, top_interactions
+from utah_grid import N_CELLS, all_cell_ids, cell_latlon, date_from_day_id
+from weather_cube import open_cube, to_standard
+
+GRID_OUT = os.path.join('data', 'hybrid_brightness_grid.npy')
+GRID_CHUNK_DAYS = 366      # grid-days scored per predict call (~950k rows)
+FILL = {'TAVG': 10, 'TMAX': 15, 'TMIN': 5, 'AWND': 5, 'PRCP': 0, 'SNOW': 0, 'SNWD': 0}
+
+parser = argparse.ArgumentParser(description="Hybrid brightness model: XGBoost + tuned physics boost (Utah)")
+parser.add_argument('--grid', action='store_true',
+                    help="also score the hybrid on every grid-day of the weather cube (~13.4M rows)")
+parser.add_argument('--grid-out', default=GRID_OUT, help="(days, cells) float32 .npy of hybrid predictions")
+args = parser.parse_args()
+
 print("=== HYBRID MODEL V3: TUNED PHYSICS ADJUSTMENT (UTAH) ===")
 print(f"Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
 
@@ -21,7 +42,7 @@ FROM fire_events_utah_with_weather
 print(f"Loaded {len(df):,} Utah rows with weather")
 
 # Fill NaN
-df = df.fillna({'TAVG': 10, 'TMAX': 15, 'TMIN': 5, 'AWND': 5, 'PRCP': 0, 'SNOW': 0, 'SNWD': 0})
+df = df.fillna(FILL)
 
 df['month'] = pd.to_datetime(df['acq_date']).dt.month
 df['year'] = pd.to_datetime(df['acq_date']).dt.year
@@ -39,41 +60,66 @@ y_pred_ml = model.predict(X_test)
 rmse_ml = sqrt(mean_squared_error(y_test, y_pred_ml))
 print(f"ML RMSE: {rmse_ml:.2f}")
 
-# Tuned physics adjustment (conditional boost)
-def fwi_proxy(row):
-    dryness = max(0, (row['TMAX'] - row['TMIN']) / 20)  # Diurnal range
-    precip_factor = max(0, 1 - row['PRCP'] / 5)  # Low precip boosts
-    wind_factor = min(row['AWND'] / 15, 1.5)  # Cap wind boost
-    dust_factor = row['dust_exposure'] * 2.0
-    fwi = dryness + precip_factor + wind_factor + dust_factor
-    
-    # Only boost if FWI > threshold (dangerous conditions)
-    if fwi > 5:
-        boost = 1.0 + min(fwi * 0.1, 0.3)  # Cap boost at +30%
-    else:
-        boost = 1.0  # No boost for low-risk conditions
-    return boost
+# Tuned physics adjustment (conditional boost above FWI 5, capped at +30%), on whole columns (physics.py)
+fwi = physics.fwi_proxy(X_test['TMAX'].values, X_test['TMIN'].values, X_test['PRCP'].values,
+                        X_test['AWND'].values, X_test['dust_exposure'].values)
 
 df_test = X_test.copy()
 df_test['ml_pred'] = y_pred_ml
-df_test['physics_boost'] = df_test.apply(fwi_proxy, axis=1)
+df_test['physics_boost'] = physics.physics_boost(fwi)
 df_test['hybrid_pred'] = df_test['ml_pred'] * df_test['physics_boost']
 
 rmse_hybrid = sqrt(mean_squared_error(y_test, df_test['hybrid_pred']))
 print(f"Hybrid RMSE: {rmse_hybrid:.2f}")
 print(f"Improvement: {rmse_ml - rmse_hybrid:.2f} lower error")
 
-# SHAP
-explainer = shap.Explainer(model)
-shap_values = explainer(X_test)
+# SHAP + interaction values on a month-stratified test sample, stored per model version (shap_engine.py)
+shap_arrays, shap_meta = explain_sample(model, X_test, strata=X_test['month'])
+X_shap = pd.DataFrame(shap_arrays['X'], columns=features)
+print(f"SHAP values for {len(X_shap):,} of {len(X_test):,} test rows")
+print(f"Strongest interactions:\n{top_interactions(shap_arrays, shap_meta).round(3).to_string()}")
 
-shap.summary_plot(shap_values, X_test, show=False)
+shap.summary_plot(np.asarray(shap_arrays['shap_values']), X_shap, show=False)
 plt.savefig("plots/shap_summary_utah_v3.png", dpi=150, bbox_inches='tight')
 print("Saved SHAP summary V3: plots/shap_summary_utah_v3.png")
 
-shap.dependence_plot("dust_exposure", shap_values.values, X_test, interaction_index="PRCP", show=False)
+# Dust x precip interaction term from the stored interaction values
+shap.dependence_plot(("dust_exposure", "PRCP"), np.asarray(shap_arrays['interaction_values']),
+                     X_shap.iloc[shap_arrays['interaction_rows']], show=False)
 plt.savefig("plots/shap_interaction_dust_prcp_v3.png", dpi=150, bbox_inches='tight')
 print("Saved interaction plot (dust vs precip) V3: plots/shap_interaction_dust_prcp_v3.png")
 
+# ================= HYBRID ON EVERY GRID-DAY =================
+# Weather-cube days x grid cells, a year of days per block: the cube is metric, the model and
+# the boost were fit on NOAA standard units, so values are converted back; gaps get FILL as above
+cube = open_cube() if args.grid else None
+if args.grid and cube is None:
+    print("--grid needs the weather cube: run scripts/build_weather_cube.py first")
+elif args.grid:
+    print(f"Scoring the hybrid on {cube.n_days:,} days x {N_CELLS:,} cells...")
+    grid_start = time.time()
+    dust = con.execute("SELECT dust_exposure FROM utah_grid_cells ORDER BY cell_id").fetchnumpy()['dust_exposure']
+    lat, lon = cell_latlon(all_cell_ids())
+    os.makedirs(os.path.dirname(args.grid_out) or '.', exist_ok=True)
+    out = np.lib.format.open_memmap(args.grid_out, mode='w+', dtype=np.float32, shape=(cube.n_days, N_CELLS))
+    n_boosted = 0
+    for start in range(0, cube.n_days, GRID_CHUNK_DAYS):
+        day_id = np.arange(start, min(start + GRID_CHUNK_DAYS, cube.n_days))[:, None]
+        w = {}
+        for var in ['TAVG', 'TMAX', 'TMIN', 'AWND', 'PRCP']:
+            values = to_standard(var, np.asarray(cube[var][day_id[:, 0]], dtype=np.float64))
+            w[var] = np.where(np.isnan(values), FILL[var], values)
+        year = date_from_day_id(day_id).astype('datetime64[Y]').astype(np.int64) + 1970
+        block = compute(features, {**w, 'SNOW': FILL['SNOW'], 'SNWD': FILL['SNWD'], 'day_id': day_id,
+                                   'year': year, 'dust_exposure': dust, 'latitude': lat, 'longitude': lon})
+        ml = model.predict(pd.DataFrame(block.reshape(-1, len(features)), columns=features)).reshape(block.shape[:2])
+        boost = physics.physics_boost(physics.fwi_proxy(w['TMAX'], w['TMIN'], w['PRCP'], w['AWND'], dust))
+        out[day_id[:, 0]] = ml * boost
+        n_boosted += int((boost > 1).sum())
+    out.flush()
+    n_grid = cube.n_days * N_CELLS
+    print(f"Hybrid for {n_grid:,} grid-days in {time.time() - grid_start:.1f} seconds "
+          f"({n_boosted / n_grid:.1%} boosted): {args.grid_out}")
+
 con.close()
 print("Modeling V3 complete!")
\ No newline at end of file
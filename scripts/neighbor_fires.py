@@ -0,0 +1,144 @@
+# scripts/neighbor_fires.py
+# Spatial-lag fire features: did the cell or its neighbours burn recently?
+#
+#   own_fires_7d          ignition days in the cell itself over the previous 7 days
+#   nbr_fires_7d_r1       ignitions in the 3x3 neighbourhood (centre excluded), previous 7 days
+#   nbr_fires_30d_r1      same, previous 30 days
+#   nbr_fires_30d_r3      7x7 neighbourhood (~35 km), previous 30 days
+#   nbr_fire_density_30d  Gaussian-weighted (sigma 2 cells) neighbour ignitions, previous 30 days
+#
+# Strictly lagged: the window for day t is [t-N, t-1], never day t itself, so the
+# features can sit next to the day-t label without leaking it.
+#
+# utah_grid_ignition_labels -> LabelCube -> a (days, N_LAT, N_LON) uint8 array, trailing-window
+# counts by cumulative-sum differencing along time, then scipy.ndimage box/Gaussian
+# filters over lat/lon. One vectorized pass over every cell-day instead of a
+# self-join over the label rows. Written to utah_grid_neighbor_fires, keyed and
+# ordered like the labels (cell_id, day_id).
+#
+#   python scripts/neighbor_fires.py [--db eco_pyric.duckdb]
+import argparse
+import time
+from datetime import datetime
+
+import duckdb
+import numpy as np
+import pandas as pd
+from scipy.ndimage import gaussian_filter, uniform_filter
+
+from label_cube import LabelCube
+from utah_grid import N_CELLS
+
+LABELS_TABLE = 'utah_grid_ignition_labels'
+NEIGHBOR_TABLE = 'utah_grid_neighbor_fires'
+
+# name -> (window days, kernel, size): 'own' = the cell only, 'box' = radius in cells, 'gauss' = sigma in cells
+NEIGHBOR_FEATURES = {
+    'own_fires_7d': (7, 'own', 0),
+    'nbr_fires_7d_r1': (7, 'box', 1),
+    'nbr_fires_30d_r1': (30, 'box', 1),
+    'nbr_fires_30d_r3': (30, 'box', 3),
+    'nbr_fire_density_30d': (30, 'gauss', 2.0),
+}
+
+
+def lagged_window_sums(cube, window):
+    """Per-cell ignition count over days [t-window, t-1] (day t excluded) via cumsum differencing."""
+    csum = np.zeros((len(cube) + 1,) + cube.shape[1:], dtype=np.int32)
+    np.cumsum(cube, axis=0, out=csum[1:])
+    end = np.arange(len(cube))                     # csum[t] = days < t
+    begin = np.maximum(end - window, 0)
+    return (csum[end] - csum[begin]).astype(np.float32)
+
+
+def neighborhood(counts, kernel, size):
+    """Spatial filter over lat/lon of per-cell counts, centre cell excluded. Grid edges pad with zeros."""
+    if kernel == 'own':
+        return counts
+    if kernel == 'box':
+        k = 2 * size + 1
+        total = uniform_filter(counts, size=(1, k, k), mode='constant') * (k * k)
+        return np.rint(total) - counts
+    if kernel == 'gauss':
+        centre = np.zeros((1, 2 * int(4 * size) + 1, 2 * int(4 * size) + 1), dtype=np.float32)
+        centre[0, centre.shape[1] // 2, centre.shape[2] // 2] = 1
+        w0 = gaussian_filter(centre, sigma=(0, size, size), mode='constant').max()
+        return gaussian_filter(counts, sigma=(0, size, size), mode='constant') - w0 * counts
+    raise ValueError(f"unknown kernel {kernel!r}")
+
+
+def compute(cube, features=NEIGHBOR_FEATURES):
+    """All features for the cube -> {name: (n_days, N_CELLS) array}; counts int16, densities float32."""
+    out, windows = {}, {}
+    for name, (window, kernel, size) in features.items():
+        if window not in windows:
+            windows[window] = lagged_window_sums(cube, window)
+        values = neighborhood(windows[window], kernel, size)
+        dtype = np.float32 if kernel == 'gauss' else np.int16
+        out[name] = np.maximum(values, 0).astype(dtype).reshape(len(cube), N_CELLS)  # clip float noise
+    return out
+
+
+def _frame(values, first_day, n_days):
+    """(day, cell) feature arrays -> rows in (cell_id, day_id) order like the labels table."""
+    return pd.DataFrame({
+        'cell_id': np.repeat(np.arange(N_CELLS, dtype=np.int16), n_days),
+        'day_id': np.tile(np.arange(first_day, first_day + n_days, dtype=np.int16), N_CELLS),
+        **{name: arr.T.ravel() for name, arr in values.items()}
+    })
+
+
+def build(con, features=NEIGHBOR_FEATURES):
+    """Recreate NEIGHBOR_TABLE from LABELS_TABLE. Returns the number of cell-days written."""
+    labels = LabelCube.from_table(con, LABELS_TABLE)
+    values = compute(labels.dense(), features)
+    con.register('neighbor_df', _frame(values, labels.first_day, labels.n_days))
+    con.execute(f"""
+    CREATE OR REPLACE TABLE {NEIGHBOR_TABLE} AS
+    SELECT * FROM neighbor_df
+    """)
+    con.unregister('neighbor_df')
+    return con.execute(f"SELECT COUNT(*) FROM {NEIGHBOR_TABLE}").fetchone()[0]
+
+
+def update(con, first_day, features=NEIGHBOR_FEATURES):
+    """Recompute NEIGHBOR_TABLE for days >= first_day only (update_nrt.py). Returns cell-days written.
+
+    The cube is cut at first_day minus the longest window, so the recomputed days
+    see the same history as a full build.
+    """
+    labels = LabelCube.from_table(con, LABELS_TABLE)
+    first_day = max(int(first_day), labels.first_day)
+    context = max(window for window, _, _ in features.values())
+    start = max(first_day - context, labels.first_day)
+    values = compute(labels.dense(start), features)
+    skip = first_day - start
+    values = {name: arr[skip:] for name, arr in values.items()}
+    n_days = labels.last_day - first_day + 1
+
+    con.register('neighbor_df', _frame(values, first_day, n_days))
+    con.execute("BEGIN TRANSACTION")
+    con.execute(f"DELETE FROM {NEIGHBOR_TABLE} WHERE day_id >= {first_day}")
+    con.execute(f"INSERT INTO {NEIGHBOR_TABLE} BY NAME SELECT * FROM neighbor_df")
+    con.execute("COMMIT")
+    con.unregister('neighbor_df')
+    return n_days * N_CELLS
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Add strictly lagged neighbour-fire features to the grid labels")
+    parser.add_argument('--db', default='eco_pyric.duckdb')
+    args = parser.parse_args()
+
+    print("=== NEIGHBOR FIRE FEATURES ===")
+    print(f"Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    con = duckdb.connect(args.db)
+    t0 = time.time()
+    rows = build(con)
+    print(f"Saved {rows:,} cell-days to '{NEIGHBOR_TABLE}' in {time.time() - t0:.2f} seconds")
+    print(con.execute(f"""
+    SELECT {', '.join(f"ROUND(AVG(({name} > 0)::INTEGER), 4) AS {name}" for name in NEIGHBOR_FEATURES)}
+    FROM {NEIGHBOR_TABLE}
+    """).fetchdf().T.rename(columns={0: 'share > 0'}))
+    con.close()
+    print("Done.")
@@ -0,0 +1,160 @@
+# scripts/noaa_station_days.py
+# NOAA GHCN-Daily CSVs (data/weather_noaa/*.csv) -> persistent DuckDB table noaa_station_days.
+#
+# Files are read with DuckDB read_csv: explicit types, only the columns we use, and
+# one row per (STATION, DATE) picked with QUALIFY row_number() on the non-null count.
+# Loaded files are recorded in noaa_station_files (name, size, mtime), so a new
+# yearly file is merged in on its own. A changed or removed file triggers a full rebuild.
+#
+#   python scripts/noaa_station_days.py [--rebuild]
+import argparse
+import os
+from datetime import datetime
+
+import duckdb
+
+STATION_DAYS_TABLE = 'noaa_station_days'
+FILES_TABLE = 'noaa_station_files'
+WEATHER_DIR = os.path.join('data', 'weather_noaa')
+
+# Kept columns and their types; the rest of the 23 GHCN columns are never parsed
+META_COLUMNS = {'STATION': 'VARCHAR', 'NAME': 'VARCHAR', 'LATITUDE': 'DOUBLE',
+                'LONGITUDE': 'DOUBLE', 'ELEVATION': 'DOUBLE', 'DATE': 'VARCHAR'}
+NOAA_VARS = ['TAVG', 'TMAX', 'TMIN', 'AWND', 'PRCP', 'SNOW', 'SNWD', 'WSF2', 'WSF5']
+DATE_FORMATS = ['%m/%d/%Y', '%Y-%m-%d']  # NOAA CDO web export / GHCN bulk
+
+
+def _csv_header(path):
+    with open(path, newline='') as f:
+        return [c.strip().strip('"') for c in f.readline().split(',')]
+
+
+def _select_file(path, source_file, file_seq):
+    """SELECT over one CSV with our column set; vars missing from the file become NULL."""
+    header = _csv_header(path)
+    # auto_detect off: every column is declared, unused ones as VARCHAR and never projected
+    types = {c: META_COLUMNS.get(c, 'DOUBLE' if c in NOAA_VARS else 'VARCHAR') for c in header}
+    columns_sql = ', '.join(f"'{c}': '{t}'" for c, t in types.items())
+
+    date_sql = ', '.join(f"try_strptime(DATE, '{fmt}')" for fmt in DATE_FORMATS)
+    values = [v if v in types else f"CAST(NULL AS DOUBLE) AS {v}" for v in NOAA_VARS]
+    n_obs = ' + '.join(f"CAST({v} IS NOT NULL AS INTEGER)" for v in NOAA_VARS if v in types) or '0'
+    path_sql = path.replace("'", "''")
+    return f"""
+    SELECT STATION, NAME, LATITUDE, LONGITUDE, ELEVATION,
+           CAST(COALESCE({date_sql}) AS DATE) AS DATE,
+           {', '.join(values)},
+           CAST({n_obs} AS TINYINT) AS n_obs,
+           '{source_file.replace("'", "''")}' AS source_file,
+           {file_seq} AS file_seq
+    FROM read_csv('{path_sql}', header=true, auto_detect=false, columns={{{columns_sql}}})
+    """
+
+
+def _dedup(select_sql):
+    # Most complete duplicate wins, the later file (by name) on ties. One integer sort
+    # key: ordering the window by the file name string costs more than the CSV scan.
+    return f"""
+    SELECT * EXCLUDE (file_seq) FROM ({select_sql})
+    WHERE DATE IS NOT NULL
+    QUALIFY row_number() OVER (PARTITION BY STATION, DATE ORDER BY n_obs * 1000 + file_seq DESC) = 1
+    """
+
+
+def _csv_files(weather_dir):
+    files = {}
+    for filename in sorted(os.listdir(weather_dir)):
+        if filename.endswith('.csv'):
+            st = os.stat(os.path.join(weather_dir, filename))
+            files[filename] = (st.st_size, int(st.st_mtime))
+    return files
+
+
+def refresh_station_days(con, weather_dir=WEATHER_DIR, rebuild=False):
+    """Bring noaa_station_days up to date with weather_dir. Returns {'mode', 'files', 'rows'}."""
+    on_disk = _csv_files(weather_dir)
+    tables = {t[0] for t in con.execute("SHOW TABLES").fetchall()}
+    loaded = {}
+    if not rebuild and {STATION_DAYS_TABLE, FILES_TABLE} <= tables:
+        loaded = {f: (size, mtime) for f, size, mtime in
+                  con.execute(f"SELECT file, bytes, mtime FROM {FILES_TABLE}").fetchall()}
+
+    new = [f for f in on_disk if f not in loaded]
+    stale = [f for f in loaded if on_disk.get(f) != loaded[f]]  # changed or removed
+    if not new and not stale and loaded:
+        return {'mode': 'up to date', 'files': [], 'rows': 0}
+
+    full = rebuild or stale or not loaded
+    todo = list(on_disk) if full else new
+    if not todo:
+        raise FileNotFoundError(f"No NOAA CSV files in {weather_dir}")
+    file_seq = {f: i for i, f in enumerate(on_disk)}
+    union = ' UNION ALL '.join(_select_file(os.path.join(weather_dir, f), f, file_seq[f]) for f in todo)
+
+    con.execute("BEGIN TRANSACTION")
+    try:
+        rows = _load(con, union, full, file_seq)
+        now = datetime.now()
+        con.executemany(f"INSERT INTO {FILES_TABLE} VALUES (?, ?, ?, ?)",
+                        [(f, *on_disk[f], now) for f in todo])
+        con.execute("COMMIT")
+    except Exception:
+        con.execute("ROLLBACK")
+        raise
+    return {'mode': 'rebuilt' if full else 'incremental', 'files': todo, 'rows': rows}
+
+
+def _load(con, union, full, file_seq):
+    if full:
+        con.execute(f"CREATE OR REPLACE TABLE {STATION_DAYS_TABLE} AS {_dedup(union)} ORDER BY STATION, DATE")
+        con.execute(f"CREATE OR REPLACE TABLE {FILES_TABLE} "
+                    f"(file VARCHAR, bytes BIGINT, mtime BIGINT, loaded_at TIMESTAMP)")
+        rows = con.execute(f"SELECT COUNT(*) FROM {STATION_DAYS_TABLE}").fetchone()[0]
+    else:
+        # Re-dedup only the station-days the new files touch
+        seq_sql = ' '.join(f"WHEN '{f}' THEN {i}" for f, i in file_seq.items())
+        con.execute(f"CREATE OR REPLACE TEMP TABLE noaa_staged AS {union}")
+        con.execute(f"""
+        CREATE OR REPLACE TEMP TABLE noaa_merged AS {_dedup(f'''
+            SELECT d.*, CASE d.source_file {seq_sql} END AS file_seq FROM {STATION_DAYS_TABLE} d
+            SEMI JOIN noaa_staged s ON d.STATION = s.STATION AND d.DATE = s.DATE
+            UNION ALL SELECT * FROM noaa_staged''')}
+        """)
+        con.execute(f"""
+        DELETE FROM {STATION_DAYS_TABLE} d USING noaa_merged m
+        WHERE d.STATION = m.STATION AND d.DATE = m.DATE
+        """)
+        con.execute(f"INSERT INTO {STATION_DAYS_TABLE} SELECT * FROM noaa_merged")
+        rows = con.execute("SELECT COUNT(*) FROM noaa_staged").fetchone()[0]
+        con.execute("DROP TABLE noaa_staged")
+        con.execute("DROP TABLE noaa_merged")
+    return rows
+
+
+def load_station_days(con, columns=None, weather_dir=WEATHER_DIR, refresh=True):
+    """noaa_station_days (DATE as datetime64) as a DataFrame, refreshed from weather_dir first."""
+    if refresh:
+        refresh_station_days(con, weather_dir)
+    cols = ', '.join(columns) if columns else '* EXCLUDE (n_obs, source_file)'
+    return con.execute(f"SELECT {cols} FROM {STATION_DAYS_TABLE} ORDER BY STATION, DATE").fetchdf()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Load NOAA station CSVs into noaa_station_days")
+    parser.add_argument('--db', default='eco_pyric.duckdb')
+    parser.add_argument('--weather-dir', default=WEATHER_DIR)
+    parser.add_argument('--rebuild', action='store_true', help="reload every file from scratch")
+    args = parser.parse_args()
+
+    print("=== LOADING NOAA STATION-DAYS ===")
+    print(f"Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    con = duckdb.connect(args.db)
+    result = refresh_station_days(con, args.weather_dir, rebuild=args.rebuild)
+    print(f"Files ({result['mode']}): {', '.join(result['files']) or 'none'}")
+    print(con.execute(f"""
+    SELECT COUNT(*) AS station_days, COUNT(DISTINCT STATION) AS stations,
+           MIN(DATE) AS first_day, MAX(DATE) AS last_day
+    FROM {STATION_DAYS_TABLE}
+    """).fetchdf())
+    con.close()
+    print("Done.")
@@ -0,0 +1,243 @@
+# scripts/nws_cache.py
+# Cached, rate-limited access to api.weather.gov latest observations.
+#
+# Two SQLite tables:
+#   nws_point_station  gridpoint -> observation station, keyed on lat/lon snapped to
+#                      SNAP_DEG (NWS points resolve to the same station over ~10 km).
+#                      Kept for POINT_TTL_S; the mapping almost never changes.
+#   nws_observation    latest observation per station, reused for OBS_TTL_S.
+# Writes are committed every FLUSH_EVERY rows (and on close), so an interrupted
+# run keeps what it fetched.
+#
+# Requests go through one pooled requests.Session, run on worker threads from an
+# asyncio loop: a semaphore bounds in-flight requests, a limiter spaces them out,
+# and identical in-flight lookups (same snapped point / station) are shared.
+import asyncio
+import os
+import sqlite3
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+NWS_URL = "https://api.weather.gov"
+USER_AGENT = '(WildfireRiskCapstone, jared@example.com)'  # Required by NWS - change email
+CACHE_PATH = os.path.join('cache', 'nws_cache.sqlite')
+
+SNAP_DEG = 0.1
+POINT_TTL_S = 30 * 24 * 3600
+OBS_TTL_S = 3600           # NWS stations report about hourly
+FLUSH_EVERY = 50
+CONCURRENCY = 8
+RATE_PER_S = 5.0           # stay well under NWS's (unpublished) per-client limit
+MAX_RETRIES = 3
+
+OBS_FIELDS = ['tavg_c', 'rh_pct', 'wspd_kmh', 'prcp_mm']
+
+
+def snap(lat, lon, step=SNAP_DEG):
+    return round(round(lat / step) * step, 4), round(round(lon / step) * step, 4)
+
+
+def parse_observation(props):
+    """NWS observation properties -> {tavg_c, rh_pct, wspd_kmh, prcp_mm, observed_at}."""
+    def value(name):
+        return (props.get(name) or {}).get('value')
+    return {
+        'tavg_c': value('temperature'),
+        'rh_pct': value('relativeHumidity'),
+        'wspd_kmh': value('windSpeed'),
+        'prcp_mm': value('precipitationLast3Hours') or value('precipitationLastHour'),
+        'observed_at': props.get('timestamp')
+    }
+
+
+class NwsCache:
+    def __init__(self, path=CACHE_PATH, point_ttl=POINT_TTL_S, obs_ttl=OBS_TTL_S, flush_every=FLUSH_EVERY):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("""
+        CREATE TABLE IF NOT EXISTS nws_point_station (
+            lat REAL, lon REAL, station_id TEXT, station_url TEXT, fetched_at REAL,
+            PRIMARY KEY (lat, lon))
+        """)
+        self.db.execute(f"""
+        CREATE TABLE IF NOT EXISTS nws_observation (
+            station_id TEXT PRIMARY KEY, {', '.join(f'{f} REAL' for f in OBS_FIELDS)},
+            observed_at TEXT, fetched_at REAL)
+        """)
+        self.point_ttl, self.obs_ttl, self.flush_every = point_ttl, obs_ttl, flush_every
+        self.pending = 0
+
+    def station(self, lat, lon):
+        """(station_id, station_url), (None, None) if the point has no station, None on a miss."""
+        row = self.db.execute("SELECT station_id, station_url, fetched_at FROM nws_point_station "
+                              "WHERE lat = ? AND lon = ?", (lat, lon)).fetchone()
+        if row and time.time() - row[2] < self.point_ttl:
+            return row[0], row[1]
+        return None
+
+    def put_station(self, lat, lon, station_id, station_url):
+        self.db.execute("INSERT OR REPLACE INTO nws_point_station VALUES (?, ?, ?, ?, ?)",
+                        (lat, lon, station_id, station_url, time.time()))
+        self._wrote()
+
+    def observation(self, station_id):
+        row = self.db.execute(f"SELECT {', '.join(OBS_FIELDS)}, observed_at, fetched_at FROM nws_observation "
+                              f"WHERE station_id = ?", (station_id,)).fetchone()
+        if row and time.time() - row[-1] < self.obs_ttl:
+            return dict(zip(OBS_FIELDS + ['observed_at'], row[:-1]))
+        return None
+
+    def put_observation(self, station_id, obs):
+        self.db.execute(f"INSERT OR REPLACE INTO nws_observation VALUES ({', '.join('?' * (len(OBS_FIELDS) + 3))})",
+                        (station_id, *[obs[f] for f in OBS_FIELDS], obs['observed_at'], time.time()))
+        self._wrote()
+
+    def _wrote(self):
+        self.pending += 1
+        if self.pending >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        self.db.commit()
+        self.pending = 0
+
+    def counts(self):
+        return {table: self.db.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                for table in ('nws_point_station', 'nws_observation')}
+
+    def close(self):
+        self.flush()
+        self.db.close()
+
+
+class RateLimiter:
+    """At most rate_per_s request starts per second, evenly spaced."""
+
+    def __init__(self, rate_per_s):
+        self.interval = 1.0 / rate_per_s if rate_per_s else 0.0
+        self.next_at = 0.0
+        self.lock = asyncio.Lock()
+
+    async def wait(self):
+        async with self.lock:
+            now = time.monotonic()
+            delay = self.next_at - now
+            self.next_at = max(now, self.next_at) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class NwsClient:
+    def __init__(self, base_url=NWS_URL, concurrency=CONCURRENCY, rate_per_s=RATE_PER_S,
+                 user_agent=USER_AGENT, timeout=15):
+        self.base_url = base_url.rstrip('/')
+        self.session = requests.Session()
+        self.session.mount('http://', HTTPAdapter(pool_connections=1, pool_maxsize=concurrency))
+        self.session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=concurrency))
+        self.session.headers.update({'User-Agent': user_agent, 'Accept': 'application/geo+json'})
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.limiter = RateLimiter(rate_per_s)
+        self.timeout = timeout
+        self.requests_made = 0
+
+    async def get_json(self, url):
+        for attempt in range(MAX_RETRIES + 1):
+            async with self.semaphore:
+                await self.limiter.wait()
+                self.requests_made += 1
+                r = await asyncio.to_thread(self.session.get, url, timeout=self.timeout)
+            if r.status_code in (429, 500, 502, 503) and attempt < MAX_RETRIES:
+                await asyncio.sleep(float(r.headers.get('Retry-After', 2 ** attempt)))
+                continue
+            r.raise_for_status()
+            return r.json()
+
+    def close(self):
+        self.session.close()
+
+
+class NwsWeather:
+    """Latest observation for many points, sharing cache entries and in-flight requests."""
+
+    def __init__(self, cache, client):
+        self.cache, self.client = cache, client
+        self.inflight = {}
+        self.stats = {'point_hits': 0, 'point_fetches': 0, 'obs_hits': 0, 'obs_fetches': 0}
+
+    def _shared(self, key, make):
+        # One task per key; later callers await the same task
+        if key not in self.inflight:
+            self.inflight[key] = asyncio.ensure_future(make())
+        return self.inflight[key]
+
+    async def station_for(self, lat, lon):
+        key = snap(lat, lon)
+        cached = self.cache.station(*key)
+        if cached is not None:
+            self.stats['point_hits'] += 1
+            return cached if cached[0] else None
+        return await self._shared(('point',) + key, lambda: self._fetch_station(*key))
+
+    async def _fetch_station(self, lat, lon):
+        self.stats['point_fetches'] += 1
+        point = await self.client.get_json(f"{self.client.base_url}/points/{lat},{lon}")
+        stations = await self.client.get_json(point['properties']['observationStations'])
+        urls = stations.get('observationStations') or []
+        if not urls:
+            self.cache.put_station(lat, lon, None, None)
+            return None
+        # Entries are station URLs (.../stations/KSLC); the id is the last path segment
+        station_url = urls[0].rstrip('/')
+        self.cache.put_station(lat, lon, station_url.rsplit('/', 1)[-1], station_url)
+        return station_url.rsplit('/', 1)[-1], station_url
+
+    async def observation(self, lat, lon):
+        station = await self.station_for(lat, lon)
+        if station is None:
+            return None
+        station_id, station_url = station
+        cached = self.cache.observation(station_id)
+        if cached:
+            self.stats['obs_hits'] += 1
+            return {**cached, 'station_id': station_id}
+        obs = await self._shared(('obs', station_id), lambda: self._fetch_observation(station_id, station_url))
+        return {**obs, 'station_id': station_id}
+
+    async def _fetch_observation(self, station_id, station_url):
+        self.stats['obs_fetches'] += 1
+        data = await self.client.get_json(f"{station_url}/observations/latest")
+        obs = parse_observation(data['properties'])
+        self.cache.put_observation(station_id, obs)
+        return obs
+
+    async def many(self, points):
+        """[(lat, lon)] -> list of observation dicts / None / Exception, in order."""
+        results = await asyncio.gather(*(self.observation(lat, lon) for lat, lon in points),
+                                       return_exceptions=True)
+        self.inflight.clear()
+        self.cache.flush()
+        return results
+
+
+def fetch_observations(points, cache_path=CACHE_PATH, base_url=NWS_URL, concurrency=CONCURRENCY,
+                       rate_per_s=RATE_PER_S, obs_ttl=OBS_TTL_S):
+    """Blocking wrapper: (results, stats) for [(lat, lon)]."""
+    cache = NwsCache(cache_path, obs_ttl=obs_ttl)
+
+    async def run():
+        client = NwsClient(base_url, concurrency, rate_per_s)
+        try:
+            weather = NwsWeather(cache, client)
+            results = await weather.many(points)
+            return results, {**weather.stats, 'requests': client.requests_made}
+        finally:
+            client.close()
+
+    try:
+        return asyncio.run(run())
+    finally:
+        cache.close()
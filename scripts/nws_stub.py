@@ -0,0 +1,119 @@
+# scripts/nws_stub.py
+# Local stand-in for the three api.weather.gov endpoints add_weather_nws.py uses:
+#   /points/{lat},{lon}                       -> gridpoint with an observationStations URL
+#   /gridpoints/{wfo}/{x},{y}/stations        -> station URLs, closest first
+#   /stations/{id}/observations/latest        -> synthetic latest observation
+# Gridpoints are 0.025° (~2.5 km) and each 0.5° box has one station, so many fires
+# share a station like they do on the real API. Set fail_every=N to answer every
+# Nth request with 429 + Retry-After (exercises the client's retries).
+#
+#   python scripts/nws_stub.py --port 8767
+#   python scripts/add_weather_nws.py --base-url http://127.0.0.1:8767
+import argparse
+import json
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+GRID_DEG = 0.025
+STATION_DEG = 0.5
+
+
+def station_id_for(lat, lon):
+    return f"K{int((lat + 90) / STATION_DEG):03d}{int((lon + 180) / STATION_DEG):03d}"
+
+
+class NwsStubHandler(BaseHTTPRequestHandler):
+    lock = threading.Lock()
+    counts = Counter()       # endpoint kind -> requests
+    started = []             # request arrival times (monotonic)
+    fail_every = 0
+    delay_s = 0.0
+    quiet = True
+
+    def do_GET(self):
+        parts = urlparse(self.path).path.strip('/').split('/')
+        base = f"http://{self.headers['Host']}"
+        with self.lock:
+            self.started.append(time.monotonic())
+            n = len(self.started)
+        if self.fail_every and n % self.fail_every == 0:
+            self._send({'title': 'Too Many Requests'}, 429, {'Retry-After': '0.05'})
+            return
+        if self.delay_s:
+            time.sleep(self.delay_s)
+
+        if parts[0] == 'points' and len(parts) == 2:
+            self._count('points')
+            lat, lon = (float(v) for v in parts[1].split(','))
+            x, y = int((lon + 180) / GRID_DEG), int((lat + 90) / GRID_DEG)
+            self._send({'properties': {'gridId': 'SLC', 'gridX': x, 'gridY': y,
+                                       'observationStations': f"{base}/gridpoints/SLC/{x},{y}/stations"}})
+        elif parts[0] == 'gridpoints' and parts[-1] == 'stations':
+            self._count('stations')
+            x, y = (int(v) for v in parts[2].split(','))
+            lat, lon = y * GRID_DEG - 90, x * GRID_DEG - 180
+            station = station_id_for(lat, lon)
+            self._send({'observationStations': [f"{base}/stations/{station}",
+                                                f"{base}/stations/{station_id_for(lat + STATION_DEG, lon)}"]})
+        elif parts[0] == 'stations' and parts[-2:] == ['observations', 'latest']:
+            self._count('observations')
+            seed = sum(map(ord, parts[1]))
+            value = lambda v, unit: {'value': v, 'unitCode': f"wmoUnit:{unit}"}
+            self._send({'properties': {
+                'timestamp': datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0).isoformat(),
+                'temperature': value(round(5 + seed % 25 + 0.5, 1), 'degC'),
+                'relativeHumidity': value(float(10 + seed % 60), 'percent'),
+                'windSpeed': value(float(seed % 30), 'km_h-1'),
+                'precipitationLastHour': value(0.0 if seed % 4 else 1.2, 'mm'),
+                'precipitationLast3Hours': value(None, 'mm')
+            }})
+        else:
+            self._send({'title': 'Not Found', 'detail': self.path}, 404)
+
+    def _count(self, kind):
+        with self.lock:
+            self.counts[kind] += 1
+
+    def _send(self, payload, status=200, headers=None):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/geo+json')
+        self.send_header('Content-Length', str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if not self.quiet:
+            super().log_message(format, *args)
+
+
+def start_stub(port=0, fail_every=0, delay_s=0.0):
+    """Start the stub in a background thread; returns (server, base_url)."""
+    NwsStubHandler.counts = Counter()
+    NwsStubHandler.started = []
+    NwsStubHandler.fail_every = fail_every
+    NwsStubHandler.delay_s = delay_s
+    server = ThreadingHTTPServer(('127.0.0.1', port), NwsStubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline api.weather.gov stub")
+    parser.add_argument('--port', type=int, default=8767)
+    parser.add_argument('--fail-every', type=int, default=0, help="answer every Nth request with 429")
+    args = parser.parse_args()
+
+    NwsStubHandler.quiet = False
+    server, base_url = start_stub(args.port, args.fail_every)
+    print(f"NWS stub serving at {base_url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
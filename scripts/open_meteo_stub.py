@@ -0,0 +1,140 @@
+# scripts/open_meteo_stub.py
+# Local stand-in for api.open-meteo.com/v1/forecast, so the weather providers
+# and forecasters can run offline.
+#
+# Replays responses from a recording file ({"<lat>,<lon>": {"daily": {...}}}).
+# Coordinates missing from the recording get a deterministic synthetic field
+# (warmer/drier to the south-west) so lattice interpolation has real gradients.
+# With --record, misses are fetched from the real API and added to the recording.
+#
+#   python scripts/open_meteo_stub.py --port 8766 --recording open_meteo_recording.json
+#   python scripts/daily_risk_forecast_v3.py ... with --weather-url http://127.0.0.1:8766/v1/forecast
+import argparse
+import json
+import os
+import threading
+from datetime import date, datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import requests
+
+from weather_providers import OPEN_METEO_URL
+
+
+def synthetic_daily(lat, lon, dates):
+    """Smooth, deterministic weather for one coordinate."""
+    days = np.arange(len(dates))
+    doy = np.array([d.timetuple().tm_yday for d in dates])
+    season = np.sin(2 * np.pi * (doy - 105) / 365)
+    tavg = 12 + 14 * season - 1.8 * (lat - 37) - 0.6 * (lon + 114) + 1.5 * np.sin(days / 2)
+    rh = np.clip(35 + 4 * (lat - 37) - 10 * season + 2 * np.cos(days / 3), 5, 100)
+    wspd = 12 + 1.5 * (lon + 114) + 3 * np.sin(days + lat)
+    prcp = np.where((np.round(lat * 10 + lon * 10 + days) % 7) == 0, 3.0, 0.0)
+    return {
+        'time': [d.isoformat() for d in dates],
+        'temperature_2m_mean': np.round(tavg, 1).tolist(),
+        'relative_humidity_2m_mean': np.round(rh).tolist(),
+        'wind_speed_10m_max': np.round(wspd, 1).tolist(),
+        'precipitation_sum': prcp.tolist()
+    }
+
+
+def requested_dates(query):
+    if 'start_date' in query:
+        start = datetime.strptime(query['start_date'], '%Y-%m-%d').date()
+        end = datetime.strptime(query.get('end_date', query['start_date']), '%Y-%m-%d').date()
+        return [start + timedelta(days=d) for d in range((end - start).days + 1)]
+    return [date.today() + timedelta(days=d) for d in range(int(query.get('forecast_days', 7)))]
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    recording = {}
+    recording_path = None
+    record = False
+    lock = threading.Lock()
+    requests_served = 0
+    quiet = True
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path != '/v1/forecast':
+            self._send({'error': True, 'reason': f"unknown path {url.path}"}, 404)
+            return
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        lats = [float(v) for v in query['latitude'].split(',')]
+        lons = [float(v) for v in query['longitude'].split(',')]
+        dates = requested_dates(query)
+
+        results = [self._one(lat, lon, dates, query) for lat, lon in zip(lats, lons)]
+        with self.lock:
+            type(self).requests_served += 1
+        self._send(results if len(results) > 1 else results[0])
+
+    def _one(self, lat, lon, dates, query):
+        key = f"{lat:g},{lon:g}"
+        daily = self.recording.get(key, {}).get('daily')
+        if daily is not None:
+            # Replay the recorded days that were asked for
+            pos = {t: i for i, t in enumerate(daily['time'])}
+            rows = [pos.get(d.isoformat()) for d in dates]
+            if all(r is not None for r in rows):
+                return {'latitude': lat, 'longitude': lon,
+                        'daily': {k: [v[r] for r in rows] for k, v in daily.items()}}
+
+        if self.record:
+            r = requests.get(OPEN_METEO_URL, params={**query, 'latitude': lat, 'longitude': lon}, timeout=30)
+            r.raise_for_status()
+            result = r.json()
+            with self.lock:
+                self.recording[key] = result
+                with open(self.recording_path, 'w') as f:
+                    json.dump(self.recording, f)
+            return result
+
+        return {'latitude': lat, 'longitude': lon, 'daily': synthetic_daily(lat, lon, dates)}
+
+    def _send(self, payload, status=200):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if not self.quiet:
+            super().log_message(format, *args)
+
+
+def start_stub(port=0, recording_path=None, record=False):
+    """Start the stub in a background thread; returns (server, base_url)."""
+    StubHandler.recording = {}
+    StubHandler.recording_path = recording_path
+    StubHandler.record = record
+    if recording_path and os.path.exists(recording_path):
+        with open(recording_path) as f:
+            StubHandler.recording = json.load(f)
+    server = ThreadingHTTPServer(('127.0.0.1', port), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1/forecast"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline Open-Meteo forecast stub")
+    parser.add_argument('--port', type=int, default=8766)
+    parser.add_argument('--recording', default=None, help="JSON of recorded responses to replay")
+    parser.add_argument('--record', action='store_true', help="fetch misses from the real API and save them")
+    args = parser.parse_args()
+
+    if args.record and not args.recording:
+        parser.error("--record needs --recording")
+
+    StubHandler.quiet = False
+    server, base_url = start_stub(args.port, args.recording, args.record)
+    print(f"Open-Meteo stub serving {len(StubHandler.recording):,} recorded coordinates at {base_url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,68 @@
+# scripts/perf_utils.py
+# Small timing / memory helpers shared by the pipeline and benchmark scripts
+import subprocess
+import sys
+import time
+
+import psutil
+
+
+def _vm_hwm_kb():
+    """This process's own RSS high-water mark from /proc (Linux), or None."""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def peak_rss_mb():
+    """Peak resident set size of the current process, in MB.
+
+    On Linux this is VmHWM: it belongs to this process alone (ru_maxrss is
+    inherited from the parent across fork/exec, so pool workers would report
+    the parent's peak) and reset_peak_rss() can restart it.
+    """
+    hwm = _vm_hwm_kb()
+    if hwm is not None:
+        return hwm / 1024
+    try:
+        import resource
+    except ImportError:  # Windows has no resource module
+        return psutil.Process().memory_info().peak_wset / 1024**2
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS, KB on Linux
+    return peak / 1024**2 if sys.platform == 'darwin' else peak / 1024
+
+
+def reset_peak_rss():
+    """Restart the peak-RSS high-water mark at the current RSS (Linux), so
+    peak_rss_mb() covers only what runs after. Returns False where unsupported."""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def run_with_peak_rss(cmd, poll_interval=0.05):
+    """Run `cmd` as a child process and sample its RSS until it exits.
+
+    Returns (returncode, wall_seconds, peak_rss_mb).
+    """
+    start = time.time()
+    proc = subprocess.Popen(cmd)
+    child = psutil.Process(proc.pid)
+    peak = 0
+    while proc.poll() is None:
+        try:
+            peak = max(peak, child.memory_info().rss)
+        except psutil.NoSuchProcess:
+            break
+        time.sleep(poll_interval)
+    proc.wait()
+    return proc.returncode, time.time() - start, peak / 1024**2
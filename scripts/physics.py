@@ -0,0 +1,72 @@
+# scripts/physics.py
+# Vectorized physics / heuristic kernels over column arrays.
+#
+# The hybrid model's fire-weather boost, the v2 heuristic risk score and the
+# great-circle distances behind dist_to_city_km, written as NumPy expressions on
+# whole columns instead of per-row Python (DataFrame.apply with a haversine
+# generator, a row-wise fwi_proxy). Inputs are arrays of any shapes that
+# broadcast: (rows,) for tables, (days, cells) weather with (cells,) static
+# columns for the forecast and grid blocks. Outputs equal the row-wise versions.
+import numpy as np
+
+EARTH_RADIUS_KM = 6371
+
+# Hybrid boost (model_shap_hybrid_utah.py), tuned on NOAA standard units: °F, inches, mph
+FWI_THRESHOLD = 5          # boost only above this fire-weather proxy
+BOOST_PER_FWI = 0.1
+MAX_BOOST = 0.3            # at most +30%
+
+
+# ================= DISTANCES =================
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance (km) between points given in degrees."""
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype=float)) for v in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2)**2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2)**2
+    return EARTH_RADIUS_KM * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+
+def nearest_km(lat, lon, point_lat, point_lon):
+    """Distance (km) from each (lat, lon) to the nearest of the points: one (rows, points) block."""
+    return haversine_km(np.asarray(lat)[:, None], np.asarray(lon)[:, None],
+                        np.asarray(point_lat)[None, :], np.asarray(point_lon)[None, :]).min(axis=1)
+
+
+# ================= HYBRID PHYSICS BOOST =================
+def fwi_proxy(tmax, tmin, prcp, awnd, dust_exposure):
+    """Fire-weather proxy: diurnal range + low precip + wind (capped) + 2 x dust exposure.
+
+    NaN inputs propagate (the hybrid script fills them first).
+    """
+    dryness = np.maximum(0, (tmax - tmin) / 20)
+    precip_factor = np.maximum(0, 1 - prcp / 5)
+    wind_factor = np.minimum(awnd / 15, 1.5)
+    dust_factor = dust_exposure * 2.0
+    return dryness + precip_factor + wind_factor + dust_factor
+
+
+def physics_boost(fwi):
+    """Multiplier on the ML prediction: 1 + 0.1 x fwi (capped at +30%) above the threshold, else 1."""
+    return np.where(fwi > FWI_THRESHOLD, 1.0 + np.minimum(fwi * BOOST_PER_FWI, MAX_BOOST), 1.0)
+
+
+# ================= V2 HEURISTIC RISK SCORE =================
+def risk_score(vpd_proxy, prcp, wspd, dust_exposure, dist_to_road_km, dist_to_city_km, low_precip_dryness):
+    """daily_risk_forecast_v2.py score in [0, ~1]: mean of six factors.
+
+    Dryness is VPD normalised by the day's maximum over cells (last axis), so pass
+    (days, cells) weather, or (cells,) for a single day.
+    """
+    with np.errstate(invalid='ignore', divide='ignore'):
+        dryness = vpd_proxy / np.nanmax(vpd_proxy, axis=-1, keepdims=True)
+    precip_factor = np.maximum(0, 1 - prcp / 5)
+    wind_factor = np.minimum(wspd / 20, 1.0)
+    dust_factor = dust_exposure * 2.0
+    human_factor = np.maximum(0, 1 - (dist_to_road_km + dist_to_city_km) / 20)
+    return (
+        dryness +
+        precip_factor +
+        wind_factor +
+        dust_factor +
+        human_factor +
+        low_precip_dryness
+    ) / 6
@@ -0,0 +1,114 @@
+# scripts/sampling.py
+# Case-control negative downsampling for the ~1:3300 ignition imbalance.
+#
+# Every ignition row is kept. Non-ignition rows are kept when an independent
+# hash of (cell_id, day_id) falls below neg_fraction; the lowest-hash negative
+# of each (month, cell) stratum is always kept so no stratum loses its mass,
+# and the realized keep rate is counted per stratum. Each kept negative is then weighted by
+# 1 / (its stratum's realized rate), so the weighted sample has the same
+# negative mass per month and cell as the full table. Training on it
+# optimizes the same objective as the full data, and predict_proba keeps the
+# full-data base rate.
+import json
+
+import numpy as np
+
+from utah_grid import N_CELLS, month_from_day_id
+from training_data import is_test_row, split_hash
+
+SAMPLING_SEED = 7  # independent of the train/test split hash
+N_STRATA = 12 * N_CELLS
+
+
+def stratum_ids(cell_id, day_id):
+    """(month, cell) stratum index for each row."""
+    month = month_from_day_id(day_id).astype(np.int32)
+    return (month - 1) * N_CELLS + np.asarray(cell_id, dtype=np.int32)
+
+
+class NegativeSampler:
+    """Stratified negative downsampling with inverse-rate instance weights.
+
+    Call count() over every training batch first, then apply() to each batch.
+    """
+
+    def __init__(self, neg_fraction, seed=SAMPLING_SEED):
+        self.neg_fraction = float(neg_fraction)
+        self.seed = seed
+        self.n_pos = 0
+        self.n_neg = np.zeros(N_STRATA, dtype=np.int64)
+        self.n_below = np.zeros(N_STRATA, dtype=np.int64)
+        self.min_u = np.ones(N_STRATA)
+
+    @property
+    def n_kept(self):
+        # hash-selected negatives, plus the stratum minimum when nothing fell below the fraction
+        return self.n_below + ((self.n_neg > 0) & (self.min_u >= self.neg_fraction))
+
+    def count(self, y, cell_id, day_id):
+        neg = np.asarray(y) == 0
+        self.n_pos += int((~neg).sum())
+        cell_neg, day_neg = np.asarray(cell_id)[neg], np.asarray(day_id)[neg]
+        strata = stratum_ids(cell_neg, day_neg)
+        u = split_hash(cell_neg, day_neg, self.seed)
+        self.n_neg += np.bincount(strata, minlength=N_STRATA)
+        self.n_below += np.bincount(strata[u < self.neg_fraction], minlength=N_STRATA)
+        np.minimum.at(self.min_u, strata, u)
+
+    def count_cube(self, labels, subset='train', chunk_days=366):
+        """count() over every cell-day of a LabelCube, for one side of the hash split."""
+        for first in range(labels.first_day, labels.last_day + 1, chunk_days):
+            rows = labels.to_long(first, first + chunk_days - 1)
+            cell_id, day_id = rows['cell_id'].to_numpy(), rows['day_id'].to_numpy()
+            test = is_test_row(cell_id, day_id)
+            keep = test if subset == 'test' else ~test
+            self.count(rows['ignition'].to_numpy()[keep], cell_id[keep], day_id[keep])
+
+    def rates(self):
+        """Realized negative keep rate per stratum (nan where a stratum has no negatives)."""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return self.n_kept / self.n_neg
+
+    def apply(self, y, cell_id, day_id):
+        """Return (keep_mask, weights) for one batch; weights line up with the kept rows."""
+        y = np.asarray(y)
+        strata = stratum_ids(cell_id, day_id)
+        u = split_hash(cell_id, day_id, self.seed)
+        keep = (y == 1) | (u < self.neg_fraction) | (u <= self.min_u[strata])
+
+        weights = np.ones(int(keep.sum()), dtype=np.float32)
+        neg_kept = y[keep] == 0
+        strata_kept = strata[keep][neg_kept]
+        weights[neg_kept] = self.n_neg[strata_kept] / self.n_kept[strata_kept]
+        return keep, weights
+
+    def summary(self):
+        n_neg, n_kept = int(self.n_neg.sum()), int(self.n_kept.sum())
+        return {
+            'neg_fraction': self.neg_fraction,
+            'seed': self.seed,
+            'positives': self.n_pos,
+            'negatives': n_neg,
+            'negatives_kept': n_kept,
+            'realized_neg_rate': n_kept / n_neg if n_neg else None,
+            'strata': int((self.n_neg > 0).sum())
+        }
+
+    def save(self, path):
+        """Record the sampling settings and per-(month, cell) rates next to the model."""
+        record = self.summary()
+        record['stratum_index'] = '(month - 1) * N_CELLS + cell_id'
+        record['stratum_neg_rates'] = [None if np.isnan(r) else round(float(r), 6) for r in self.rates()]
+        with open(path, 'w') as f:
+            json.dump(record, f)
+
+
+def sample_training_rows(X, y, cell_id, day_id, neg_fraction, seed=SAMPLING_SEED):
+    """In-memory helper: downsample one training split.
+
+    Returns (X_sampled, y_sampled, weights, sampler).
+    """
+    sampler = NegativeSampler(neg_fraction, seed)
+    sampler.count(y, cell_id, day_id)
+    keep, weights = sampler.apply(y, cell_id, day_id)
+    return X[keep], y[keep], weights, sampler
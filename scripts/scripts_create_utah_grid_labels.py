@@ -1,86 +1,170 @@
+import argparse
 import duckdb
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
+from datetime import datetime
 
-print("=== CREATING UTAH GRID + BINARY IGNITION LABELS ===")
-print(f"Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-
-con = duckdb.connect('eco_pyric.duckdb')
-
-# Load Utah fire events
-df_fires = con.execute("""
-SELECT latitude, longitude, acq_date
-FROM fire_events_utah
-""").fetchdf()
-
-print(f"Loaded {len(df_fires):,} Utah fire events")
-
-# Step 1: Define Utah grid (0.1 degree resolution)
-lat_min, lat_max = 37.0, 42.0
-lon_min, lon_max = -114.0, -109.0
-lat_step, lon_step = 0.1, 0.1
-
-lats = np.round(np.arange(lat_min, lat_max + lat_step, lat_step), 1)
-lons = np.round(np.arange(lon_min, lon_max + lon_step, lon_step), 1)
-
-grid = [(lat, lon) for lat in lats for lon in lons]
-print(f"Created {len(grid):,} grid cells")
-
-# Step 2: Create date range
-min_date = pd.to_datetime(df_fires['acq_date']).min().date()
-max_date = pd.to_datetime(df_fires['acq_date']).max().date()
-date_range = pd.date_range(min_date, max_date).date
-
-print(f"Date range: {min_date} to {max_date} ({len(date_range)} days)")
-
-# Step 3: Generate grid-date combinations (no ignition column yet)
-df_grid_dates = pd.DataFrame(
-    [(lat, lon, date) for lat, lon in grid for date in date_range],
-    columns=['grid_lat', 'grid_lon', 'date']
+from cluster_fire_events import CLUSTERS_TABLE
+from label_cube import EVENT_STARTS_SQL, EVERY_DETECTION, FIRST_DAY_ONLY, LABEL_CUBE_DIR, LabelCube, set_label_mode
+from utah_grid import (
+    IN_GRID_SQL, N_CELLS, all_cell_ids, cell_id_from_latlon, day_id_from_date, date_from_day_id, register_grid_macros
 )
-print(f"Total grid-date combinations: {len(df_grid_dates):,}")
 
-# Step 4: Label ignition (1 if any fire in cell on that day)
-df_fires['acq_date'] = pd.to_datetime(df_fires['acq_date']).dt.date
+parser = argparse.ArgumentParser(description="Build Utah grid-date ignition labels")
+parser.add_argument('--mode', choices=['sql', 'pandas'], default='sql',
+                    help="sql = build inside DuckDB (default), pandas = original Python cross-product")
+parser.add_argument('--db', default='eco_pyric.duckdb')
+parser.add_argument('--table', default='utah_grid_ignition_labels')
+parser.add_argument('--first-day-only', action='store_true',
+                    help=f"label only each fire event's start cell-day (from {CLUSTERS_TABLE}, "
+                         "built by cluster_fire_events.py) instead of every detection")
+args = parser.parse_args()
 
-# Round fire locations to grid resolution (use round to nearest 0.1)
-df_fires['grid_lat'] = np.round(df_fires['latitude'] / lat_step) * lat_step
-df_fires['grid_lon'] = np.round(df_fires['longitude'] / lon_step) * lon_step
-
-# Group fires by grid + date
-df_fires_grouped = (
-    df_fires
-    .groupby(['grid_lat', 'grid_lon', 'acq_date'])
-    .size()
-    .reset_index(name='fire_count')
-)
-df_fires_grouped['ignition'] = 1
-
-print("Labeling ignition days...")
-
-# Merge to set ignition = 1 where fires occurred
-df_grid_dates = df_grid_dates.merge(
-    df_fires_grouped[['grid_lat', 'grid_lon', 'acq_date', 'ignition']],
-    left_on=['grid_lat', 'grid_lon', 'date'],
-    right_on=['grid_lat', 'grid_lon', 'acq_date'],
-    how='left'
-)
-
-# Fill missing ignition values with 0 and ensure int type
-df_grid_dates['ignition'] = df_grid_dates['ignition'].fillna(0).astype(int)
-
-# Clean up extra column from merge
-df_grid_dates = df_grid_dates.drop(columns=['acq_date'], errors='ignore')
-
-print(f"Grid-date dataset created: {len(df_grid_dates):,} rows")
-print("Ignition class balance:")
-print(df_grid_dates['ignition'].value_counts(normalize=True))
-
-# Save to DuckDB
-con.register('grid_labels', df_grid_dates)
-con.execute("CREATE OR REPLACE TABLE utah_grid_ignition_labels AS SELECT * FROM grid_labels")
+print("=== CREATING UTAH GRID + BINARY IGNITION LABELS ===")
+print(f"Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+print(f"Mode: {args.mode} -> table '{args.table}'")
+print(f"Ignitions: {'first detection day of each fire event' if args.first_day_only else 'every detection'}")
+
+con = duckdb.connect(args.db)
+register_grid_macros(con)
+if args.first_day_only and CLUSTERS_TABLE not in con.execute("SHOW TABLES").fetchdf()['name'].tolist():
+    raise SystemExit(f"--first-day-only needs '{CLUSTERS_TABLE}': run scripts/cluster_fire_events.py first")
+
+# Event start cell-days; events starting outside the grid have start_cell_id -1
+EVENT_STARTS = EVENT_STARTS_SQL.format(clusters=CLUSTERS_TABLE)
+label_mode = FIRST_DAY_ONLY if args.first_day_only else EVERY_DETECTION
+
+# Fires are snapped to cells with integer math; anything outside the 0.1° grid is dropped
+IN_GRID = IN_GRID_SQL
+
+
+def build_labels_pandas(con, table):
+    # Load Utah fire events
+    df_fires = con.execute(f"""
+    SELECT latitude, longitude, acq_date
+    FROM fire_events_utah
+    WHERE {IN_GRID}
+    """).fetchdf()
+
+    print(f"Loaded {len(df_fires):,} Utah fire events")
+
+    # Step 1: Define Utah grid (0.1 degree resolution)
+    grid = all_cell_ids()
+    print(f"Created {len(grid):,} grid cells")
+
+    # Step 2: Create date range
+    min_date = pd.to_datetime(df_fires['acq_date']).min().date()
+    max_date = pd.to_datetime(df_fires['acq_date']).max().date()
+    day_range = np.arange(day_id_from_date(min_date), day_id_from_date(max_date) + 1, dtype=np.int16)
+
+    print(f"Date range: {min_date} to {max_date} ({len(day_range)} days)")
+
+    # Step 3: Generate grid-date combinations (no ignition column yet)
+    df_grid_dates = pd.DataFrame(
+        [(cell, day) for cell in grid for day in day_range],
+        columns=['cell_id', 'day_id']
+    ).astype({'cell_id': 'int16', 'day_id': 'int16'})
+    print(f"Total grid-date combinations: {len(df_grid_dates):,}")
+
+    # Step 4: Label ignition (1 if any fire in cell on that day)
+    df_fires['cell_id'] = cell_id_from_latlon(df_fires['latitude'], df_fires['longitude'])
+    df_fires['day_id'] = day_id_from_date(pd.to_datetime(df_fires['acq_date']).dt.date)
+    if args.first_day_only:
+        df_fires = con.execute(EVENT_STARTS).fetchdf()
+        df_fires = df_fires[df_fires['day_id'].between(day_range[0], day_range[-1])]
+
+    # Group fires by cell + day
+    df_fires_grouped = (
+        df_fires
+        .groupby(['cell_id', 'day_id'])
+        .size()
+        .reset_index(name='fire_count')
+    )
+    df_fires_grouped['ignition'] = 1
+
+    print("Labeling ignition days...")
+
+    # Merge to set ignition = 1 where fires occurred
+    df_grid_dates = df_grid_dates.merge(
+        df_fires_grouped[['cell_id', 'day_id', 'ignition']],
+        on=['cell_id', 'day_id'],
+        how='left'
+    )
+
+    # Fill missing ignition values with 0 and ensure compact int type
+    df_grid_dates['ignition'] = df_grid_dates['ignition'].fillna(0).astype('int8')
+
+    print(f"Grid-date dataset created: {len(df_grid_dates):,} rows")
+    print("Ignition class balance:")
+    print(df_grid_dates['ignition'].value_counts(normalize=True))
+
+    # Save to DuckDB
+    con.register('grid_labels', df_grid_dates)
+    con.execute(f"""
+    CREATE OR REPLACE TABLE {table} AS
+    SELECT CAST(cell_id AS SMALLINT) AS cell_id,
+           CAST(day_id AS SMALLINT) AS day_id,
+           CAST(ignition AS TINYINT) AS ignition
+    FROM grid_labels
+    """)
+
+
+def build_labels_sql(con, table):
+    # The cell x day spine is generated by DuckDB instead of Python tuples
+    min_day, max_day, n_fires = con.execute(f"""
+    SELECT MIN(date_to_day(acq_date)), MAX(date_to_day(acq_date)), COUNT(*)
+    FROM fire_events_utah
+    WHERE {IN_GRID}
+    """).fetchone()
+
+    min_date, max_date = date_from_day_id([min_day, max_day])
+    print(f"Loaded {n_fires:,} Utah fire events")
+    print(f"Created {N_CELLS:,} grid cells")
+    print(f"Date range: {min_date} to {max_date} ({max_day - min_day + 1} days)")
+    print("Labeling ignition days inside DuckDB...")
+
+    con.execute(f"""
+    CREATE OR REPLACE TABLE {table} AS
+    WITH fires AS ({EVENT_STARTS if args.first_day_only else f'''
+        SELECT DISTINCT
+            latlon_to_cell(latitude, longitude) AS cell_id,
+            date_to_day(acq_date) AS day_id
+        FROM fire_events_utah
+        WHERE {IN_GRID}
+    '''}),
+    spine AS (
+        SELECT CAST(c AS SMALLINT) AS cell_id, CAST(d AS SMALLINT) AS day_id
+        FROM range({N_CELLS}) AS cells(c),
+             range({min_day}, {max_day + 1}) AS days(d)
+    )
+    SELECT
+        s.cell_id,
+        s.day_id,
+        CAST(f.cell_id IS NOT NULL AS TINYINT) AS ignition
+    FROM spine s
+    LEFT JOIN fires f USING (cell_id, day_id)
+    ORDER BY s.cell_id, s.day_id
+    """)
+
+    n_rows, n_ignitions = con.execute(f"SELECT COUNT(*), SUM(ignition) FROM {table}").fetchone()
+    print(f"Grid-date dataset created: {n_rows:,} rows")
+    print("Ignition class balance:")
+    print(f"  0: {1 - n_ignitions / n_rows:.6f}")
+    print(f"  1: {n_ignitions / n_rows:.6f}")
+
+
+if args.mode == 'sql':
+    build_labels_sql(con, args.table)
+else:
+    build_labels_pandas(con, args.table)
+
+# Record the label definition on the table, so update_nrt.py / label_cube.py keep to it
+set_label_mode(con, args.table, label_mode)
+
+# Bit-packed copy of the same labels for in-memory consumers (label_cube.py)
+LabelCube.from_table(con, args.table).save(LABEL_CUBE_DIR, source=args.table, label_mode=label_mode)
 
 con.close()
-print("Saved Utah grid + binary ignition labels to table 'utah_grid_ignition_labels'")
-print("Done — ready for training a daily risk classifier!")
\ No newline at end of file
+print(f"Saved Utah grid + binary ignition labels to table '{args.table}'")
+print(f"Saved bit-packed label cube to {LABEL_CUBE_DIR}/")
+print("Done — ready for training a daily risk classifier!")
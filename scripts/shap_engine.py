@@ -0,0 +1,265 @@
+# scripts/shap_engine.py
+# TreeSHAP for the trained tree models, computed once per model version and kept on disk.
+#
+# A model version is a hash of the booster bytes. Its store holds the pickled
+# TreeExplainer, a stratified sample of the evaluation rows (water-filled across
+# (label, stratum) groups, so ignitions and every month are represented), the
+# sample's SHAP values and the SHAP interaction values of a smaller sub-sample.
+# The store lives next to the model (risk_classifier_model.joblib ->
+# risk_classifier_model.shap/), or in cache/shap/<version>/ for models that are
+# not saved. Reruns with the same model and rows load it instead of explaining again.
+#
+# The sample is explained in chunks across a process pool; each worker loads the
+# pickled explainer once. CellExplainer gives the per-cell contributions behind
+# single predictions (map popups, dashboard, forecast service) in milliseconds.
+#
+#   arrays, meta = explain_sample(model, X_test, y_test, strata=X_test['month'],
+#                                 model_path='risk_classifier_model.joblib')
+#   shap.summary_plot(arrays['shap_values'], pd.DataFrame(arrays['X'], columns=meta['features']))
+import hashlib
+import json
+import os
+import pickle
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import shap
+from joblib import dump, load
+
+CACHE_DIR = os.path.join('cache', 'shap')
+SAMPLE_ROWS = 10000        # rows explained per model version
+INTERACTION_ROWS = 1000    # of those, rows with interaction values (F x F each, ~10x the cost of a row)
+CHUNK_ROWS = 1000          # rows per pool task
+WORKERS = os.cpu_count() or 1
+SAMPLE_SEED = 42
+
+
+# ================= MODEL VERSION / STORE =================
+def model_version(model):
+    """Hash of the booster bytes: the same trees give the same version, whatever the file name."""
+    booster = model.get_booster() if hasattr(model, 'get_booster') else model
+    raw = booster.save_raw() if hasattr(booster, 'save_raw') else pickle.dumps(booster)
+    return hashlib.sha1(bytes(raw)).hexdigest()[:16]
+
+
+def store_dir(model, model_path=None):
+    if model_path is not None:
+        return f"{os.path.splitext(model_path)[0]}.shap"
+    return os.path.join(CACHE_DIR, model_version(model))
+
+
+def base_value(model, explainer):
+    """Output the SHAP values add up from (log-odds for the classifier).
+
+    For XGBoost this is the booster's own bias term: TreeExplainer's expected_value
+    is a cover-weighted mean of the leaf values and is off from it by part of the base_score.
+    """
+    if hasattr(model, 'get_booster'):
+        import xgboost as xgb
+        booster = model.get_booster()
+        row = xgb.DMatrix(np.zeros((1, booster.num_features()), dtype=np.float32),
+                          feature_names=booster.feature_names)
+        return float(booster.predict(row, pred_contribs=True)[0, -1])
+    return float(np.ravel(explainer.expected_value)[0])
+
+
+def load_store(path):
+    """Return ({name: memmapped array}, meta) for a SHAP store, or (None, None)."""
+    meta_path = os.path.join(path, 'meta.json')
+    if not os.path.exists(meta_path):
+        return None, None
+    with open(meta_path) as f:
+        meta = json.load(f)
+    arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode='r') for name in meta['arrays']}
+    return arrays, meta
+
+
+# ================= STRATIFIED SAMPLE =================
+def _water_fill(sizes, n):
+    """Per-group counts summing to min(n, sizes.sum()): equal shares, small groups taken whole."""
+    take = np.zeros(len(sizes), dtype=np.int64)
+    remaining = min(n, int(sizes.sum()))
+    while remaining > 0:
+        open_groups = np.flatnonzero(take < sizes)
+        share = max(1, remaining // len(open_groups))
+        for g in open_groups:
+            add = min(share, sizes[g] - take[g], remaining)
+            take[g] += add
+            remaining -= add
+            if remaining == 0:
+                break
+    return take
+
+
+def stratified_sample(n, y=None, strata=None, seed=SAMPLE_SEED):
+    """Sorted row indices of a sample balanced across (y, strata) groups, plus each row's weight.
+
+    The weight (group rows / sampled rows) turns sample means back into population means.
+    """
+    n_rows = len(y) if y is not None else len(strata)
+    keys = [np.asarray(k) for k in (y, strata) if k is not None]
+    if keys:
+        _, group = np.unique(np.column_stack(keys), axis=0, return_inverse=True)
+        group = group.ravel()
+    else:
+        group = np.zeros(n_rows, dtype=np.int64)
+
+    u = np.random.default_rng(seed).random(n_rows)
+    order = np.lexsort((u, group))  # by group, random within group
+    sizes = np.bincount(group)
+    take = _water_fill(sizes, n)
+    starts = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+    idx = np.concatenate([order[s:s + t] for s, t in zip(starts, take)])
+    weights = (sizes / np.maximum(take, 1))[group[idx]]
+    keep = np.argsort(idx)
+    return idx[keep], weights[keep].astype(np.float32)
+
+
+# ================= POOL WORKERS =================
+_EXPLAINER = None
+
+
+def _init_worker(explainer_path, threads):
+    global _EXPLAINER
+    _EXPLAINER = load(explainer_path)
+    # XGBoost models are explained by the booster's own multithreaded TreeSHAP: split the cores
+    booster = getattr(_EXPLAINER.model, 'original_model', None)
+    if hasattr(booster, 'set_param'):
+        booster.set_param({'nthread': threads})
+
+
+def _explain_chunk(task):
+    kind, X = task
+    if kind == 'interactions':
+        return np.asarray(_EXPLAINER.shap_interaction_values(X), dtype=np.float32)
+    return np.asarray(_EXPLAINER.shap_values(X), dtype=np.float32)
+
+
+def _run(tasks, explainer, explainer_path, workers):
+    """Explain every (kind, X) task, in-process for one worker, else across a process pool."""
+    if workers <= 1 or len(tasks) <= 1:
+        global _EXPLAINER
+        _EXPLAINER = explainer
+        return [_explain_chunk(t) for t in tasks]
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(explainer_path, threads)) as pool:
+        return list(pool.map(_explain_chunk, tasks))
+
+
+# ================= SAMPLE EXPLANATION =================
+def explain_sample(model, X, y=None, strata=None, model_path=None, n=SAMPLE_ROWS,
+                   n_interactions=INTERACTION_ROWS, workers=WORKERS, chunk_rows=CHUNK_ROWS, force=False):
+    """SHAP values (+ interaction values) of a stratified sample of X, from the model's store.
+
+    Explains and persists only when the store is missing or was built for another
+    model version or other rows. Returns (arrays, meta) as load_store does.
+    """
+    features = list(X.columns) if hasattr(X, 'columns') else [f"f{i}" for i in range(X.shape[1])]
+    values = np.asarray(X, dtype=np.float32)
+    y = None if y is None else np.asarray(y)
+    strata = None if strata is None else np.asarray(strata)
+
+    idx, weights = stratified_sample(n, y, strata)
+    X_sample = np.ascontiguousarray(values[idx])
+    sub, _ = stratified_sample(n_interactions, None if y is None else y[idx],
+                               None if strata is None else strata[idx], seed=SAMPLE_SEED + 1)
+    version = model_version(model)
+    rows_fp = hashlib.sha1(X_sample.tobytes()).hexdigest()[:16]
+
+    path = store_dir(model, model_path)
+    arrays, meta = load_store(path)
+    if (not force and meta is not None and meta['model_version'] == version
+            and meta['rows'] == rows_fp and meta['features'] == features):
+        return arrays, meta
+
+    explainer = shap.TreeExplainer(model)
+    tmp = f"{path}.tmp-{os.getpid()}"
+    os.makedirs(tmp, exist_ok=True)
+    explainer_path = os.path.join(tmp, 'explainer.joblib')
+    dump(explainer, explainer_path)
+
+    # Interaction rows cost ~10x a SHAP row: smaller chunks keep the pool tasks even
+    frame = pd.DataFrame(X_sample, columns=features)
+    inter_rows = max(1, chunk_rows // len(features))
+    tasks = [('values', frame.iloc[s:s + chunk_rows]) for s in range(0, len(frame), chunk_rows)]
+    n_value_tasks = len(tasks)
+    tasks += [('interactions', frame.iloc[sub[s:s + inter_rows]]) for s in range(0, len(sub), inter_rows)]
+    results = _run(tasks, explainer, explainer_path, workers)
+    n_features = len(features)
+
+    arrays = {
+        'X': X_sample,
+        'rows': idx.astype(np.int64),
+        'weights': weights,
+        'shap_values': np.concatenate(results[:n_value_tasks]).reshape(-1, n_features),
+        'interaction_rows': sub.astype(np.int64),
+        'interaction_values': np.concatenate(results[n_value_tasks:] or [np.empty((0, n_features, n_features))])
+                                .reshape(-1, n_features, n_features).astype(np.float32),
+    }
+    if y is not None:
+        arrays['y'] = y[idx]
+    for name, a in arrays.items():
+        np.save(os.path.join(tmp, f"{name}.npy"), np.ascontiguousarray(a))
+    meta = {'model_version': version, 'rows': rows_fp, 'features': features,
+            'expected_value': base_value(model, explainer),
+            'population_rows': len(values), 'arrays': list(arrays)}
+    with open(os.path.join(tmp, 'meta.json'), 'w') as f:
+        json.dump(meta, f, indent=2)
+
+    # Swap the finished store into place so readers never see a half-written one
+    if os.path.exists(path):
+        shutil.rmtree(path)
+    os.replace(tmp, path)
+    return load_store(path)
+
+
+def importance(arrays, meta):
+    """Population-weighted mean |SHAP| per feature, largest first."""
+    w = np.asarray(arrays['weights'])
+    mean_abs = (np.abs(arrays['shap_values']) * w[:, None]).sum(axis=0) / w.sum()
+    return pd.Series(mean_abs, index=meta['features']).sort_values(ascending=False)
+
+
+def top_interactions(arrays, meta, k=5):
+    """Mean |interaction| of the k strongest feature pairs (off-diagonal, each pair once)."""
+    mean_abs = np.abs(arrays['interaction_values']).mean(axis=0)
+    i, j = np.triu_indices(len(meta['features']), k=1)
+    pairs = pd.Series(2 * mean_abs[i, j], index=[f"{meta['features'][a]} x {meta['features'][b]}"
+                                                  for a, b in zip(i, j)])
+    return pairs.sort_values(ascending=False).head(k)
+
+
+# ================= PER-CELL EXPLANATIONS =================
+class CellExplainer:
+    """Explainer for one model version, for a few rows at a time (popups, dashboard, service).
+
+    Reuses the explainer pickled in the model's SHAP store when it matches the
+    model version, so callers skip building it.
+    """
+
+    def __init__(self, model, model_path=None):
+        self.version = model_version(model)
+        path = store_dir(model, model_path)
+        _, meta = load_store(path)
+        explainer_path = os.path.join(path, 'explainer.joblib')
+        if meta is not None and meta['model_version'] == self.version and os.path.exists(explainer_path):
+            self.explainer = load(explainer_path)
+        else:
+            self.explainer = shap.TreeExplainer(model)
+        self.base_value = base_value(model, self.explainer)
+
+    def contributions(self, X):
+        """(rows, features) SHAP values, in the model's output units (log-odds for the classifier)."""
+        return np.asarray(self.explainer.shap_values(X), dtype=np.float32).reshape(len(X), -1)
+
+    def top_drivers(self, X, k=3):
+        """Per row, the k features pushing its prediction furthest: [{feature, value, shap}, ...]."""
+        features = list(X.columns)
+        values = np.asarray(X)
+        contrib = self.contributions(X)
+        order = np.argsort(-np.abs(contrib), axis=1, kind='stable')[:, :k]
+        return [[{'feature': features[j], 'value': float(values[r, j]), 'shap': float(contrib[r, j])}
+                 for j in order[r]] for r in range(len(values))]
@@ -0,0 +1,108 @@
+# scripts/station_lookup.py
+# Nearest *reporting* NOAA station for each fire, per weather variable.
+#
+# Stations go in a cKDTree in projected km. Each fire queries its K nearest
+# stations once, and each variable then takes the closest of those K that
+# actually reported that variable on the fire's date. Everything is vectorized
+# over fires (in chunks), so memory is O(chunk * K) instead of O(fires * stations).
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+
+from weather_cube import project_km
+
+K_NEAREST = 8
+MAX_DIST_KM = 100.0
+CHUNK_ROWS = 1_000_000
+
+
+def _day_numbers(dates):
+    return pd.to_datetime(dates).values.astype('datetime64[D]').astype(np.int64)
+
+
+class StationIndex:
+    """KD-tree over stations + dense (station, day) value tables for 'did it report that day' lookups."""
+
+    def __init__(self, station_days):
+        self.stations = (station_days.groupby('STATION')[['LATITUDE', 'LONGITUDE']]
+                         .median().reset_index().sort_values('STATION').reset_index(drop=True))
+        self.tree = cKDTree(project_km(self.stations['LATITUDE'].values, self.stations['LONGITUDE'].values))
+
+        days = _day_numbers(station_days['DATE'])
+        self.day0 = days.min()
+        self.span = int(days.max() - self.day0 + 1)
+        self._station_pos = np.searchsorted(self.stations['STATION'].values, station_days['STATION'].values)
+        self._day_off = days - self.day0
+        self._station_days = station_days
+        self._tables = {}
+
+    def table(self, var):
+        """(stations + 1, days) float32 of var; the extra all-NaN row stands for 'no neighbour found'."""
+        if var not in self._tables:
+            t = np.full((len(self.stations) + 1, self.span), np.nan, dtype=np.float32)
+            t[self._station_pos, self._day_off] = self._station_days[var].to_numpy(dtype=np.float32, na_value=np.nan)
+            self._tables[var] = t
+        return self._tables[var]
+
+    def nearest(self, lat, lon, k=K_NEAREST, max_dist_km=MAX_DIST_KM):
+        """(dist_km, station_pos), each (n, k); missing neighbours have inf / len(stations)."""
+        k = min(k, len(self.stations))
+        dist, idx = self.tree.query(project_km(lat, lon), k=k, distance_upper_bound=max_dist_km)
+        return dist.reshape(len(lat), k), idx.reshape(len(lat), k)
+
+
+def lookup_weather(fires, station_days, variables, k=K_NEAREST, max_dist_km=MAX_DIST_KM,
+                   chunk_rows=CHUNK_ROWS, lat_col='latitude', lon_col='longitude', date_col='acq_date'):
+    """Per-variable weather from the closest station that reported it on the fire's date.
+
+    Returns (weather DataFrame aligned with fires, {var: hit rate}). For each var the frame
+    has the value, the source station id ({var}_STATION) and its distance ({var}_KM);
+    STATION / STATION_KM is the closest station regardless of what it reported.
+    """
+    index = StationIndex(station_days)
+    n_stations = len(index.stations)
+
+    lat = fires[lat_col].to_numpy(dtype=float)
+    lon = fires[lon_col].to_numpy(dtype=float)
+    day_off = _day_numbers(fires[date_col]) - index.day0
+    outside = (day_off < 0) | (day_off >= index.span)
+
+    n = len(fires)
+    codes = {'STATION': np.full(n, -1, dtype=np.int32)}
+    out = {'STATION_KM': np.full(n, np.nan, dtype=np.float32)}
+    for var in variables:
+        out[var] = np.full(n, np.nan, dtype=np.float32)
+        codes[var] = np.full(n, -1, dtype=np.int32)
+        out[f'{var}_KM'] = np.full(n, np.nan, dtype=np.float32)
+
+    for start in range(0, n, chunk_rows):
+        sl = slice(start, min(start + chunk_rows, n))
+        dist, station_pos = index.nearest(lat[sl], lon[sl], k, max_dist_km)
+        station_pos[outside[sl]] = n_stations  # dates the station files don't cover
+        day = np.clip(day_off[sl], 0, index.span - 1)[:, None]
+        pick = np.arange(len(day))
+
+        found = station_pos[:, 0] < n_stations
+        codes['STATION'][sl] = np.where(found, station_pos[:, 0], -1)
+        out['STATION_KM'][sl] = np.where(found, dist[:, 0], np.nan)
+
+        for var in variables:
+            # Candidate values (chunk, k); the first non-NaN column is the closest reporting station
+            candidates = index.table(var)[station_pos, day]
+            reported = ~np.isnan(candidates)
+            hit = reported.any(axis=1)
+            first = reported.argmax(axis=1)
+
+            out[var][sl] = candidates[pick, first]
+            codes[var][sl] = np.where(hit, station_pos[pick, first], -1)
+            out[f'{var}_KM'][sl] = np.where(hit, dist[pick, first], np.nan)
+
+    station_ids = index.stations['STATION'].values
+    weather = pd.DataFrame(out, index=fires.index)
+    weather['STATION'] = pd.Categorical.from_codes(codes['STATION'], categories=station_ids)
+    for var in variables:
+        weather[f'{var}_STATION'] = pd.Categorical.from_codes(codes[var], categories=station_ids)
+    columns = ['STATION', 'STATION_KM'] + [c for var in variables for c in (var, f'{var}_STATION', f'{var}_KM')]
+
+    hit_rate = {var: float(weather[var].notna().mean()) if n else 0.0 for var in variables}
+    return weather[columns], hit_rate
@@ -0,0 +1,106 @@
+# scripts/training_data.py
+# Out-of-core training data for the daily ignition classifier:
+# DuckDB query -> Arrow record batches -> per-batch features -> xgboost DataIter.
+# Only one batch of rows is ever held in memory.
+import numpy as np
+import xgboost as xgb
+
+from features import FEATURES, TRAINING_RH, compute
+
+TRAIN_QUERY = """
+SELECT cell_id, day_id, ignition, dist_to_road_km
+FROM utah_grid_ignition_labels_proximity
+"""
+
+TEST_FRACTION = 0.2
+SPLIT_SEED = 42
+BATCH_ROWS = 1_000_000
+
+
+# ================= DETERMINISTIC SPLIT =================
+def split_hash(cell_id, day_id, seed=SPLIT_SEED):
+    """Uniform [0, 1) value per (cell_id, day_id), stable across runs and batch boundaries."""
+    # splitmix64 finalizer over the packed (cell, day) key
+    x = (np.asarray(cell_id).astype(np.uint64) << np.uint64(32)) | np.asarray(day_id).astype(np.uint64)
+    with np.errstate(over='ignore'):
+        x = x + np.uint64(0x9E3779B97F4A7C15) * np.uint64(seed + 1)
+        x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        x = x ^ (x >> np.uint64(31))
+    return (x >> np.uint64(11)).astype(np.float64) / float(1 << 53)
+
+
+def is_test_row(cell_id, day_id, test_fraction=TEST_FRACTION, seed=SPLIT_SEED):
+    return split_hash(cell_id, day_id, seed) < test_fraction
+
+
+# ================= FEATURES =================
+def derive_features(cell_id, day_id, dist_to_road_km, cube=None):
+    """Build the float32 feature block for a batch of grid-day rows (columns in FEATURES order).
+
+    With a WeatherCube, tavg / prcp come from the NOAA cube at (day_id, cell_id);
+    without one they fall back to the constant placeholders.
+    """
+    n = len(cell_id)
+    if cube is not None:
+        tavg, prcp = cube.training_weather(day_id, cell_id)
+    else:
+        tavg = np.full(n, 10.0)  # Placeholder — replace with real forecast avg if available
+        prcp = np.zeros(n)       # Placeholder
+    return compute(FEATURES, {'cell_id': cell_id, 'day_id': day_id, 'dist_to_road_km': dist_to_road_km,
+                              'tavg': tavg, 'rh': TRAINING_RH, 'prcp': prcp})
+
+
+def iter_batches(con, query=TRAIN_QUERY, subset='train', batch_rows=BATCH_ROWS,
+                 test_fraction=TEST_FRACTION, seed=SPLIT_SEED, sampler=None, with_features=True, cube=None):
+    """Yield (X, y, cell_id, day_id, weight) numpy batches for one side of the hash split.
+
+    subset is 'train', 'test' or 'all'. With a NegativeSampler the negatives are
+    downsampled before features are derived and weight holds the instance
+    weights (otherwise None). with_features=False skips X (for counting passes).
+    cube is an optional WeatherCube for the weather features.
+    """
+    reader = con.execute(query).fetch_record_batch(batch_rows)
+    for batch in reader:
+        cols = {name: batch.column(i).to_numpy(zero_copy_only=False)
+                for i, name in enumerate(batch.schema.names)}
+
+        if subset != 'all':
+            test = is_test_row(cols['cell_id'], cols['day_id'], test_fraction, seed)
+            keep = test if subset == 'test' else ~test
+            cols = {name: values[keep] for name, values in cols.items()}
+
+        weight = None
+        if sampler is not None:
+            keep, weight = sampler.apply(cols['ignition'], cols['cell_id'], cols['day_id'])
+            cols = {name: values[keep] for name, values in cols.items()}
+
+        cell_id, day_id = cols['cell_id'], cols['day_id']
+        if len(cell_id) == 0:
+            continue
+        X = derive_features(cell_id, day_id, cols['dist_to_road_km'], cube) if with_features else None
+        yield X, cols['ignition'].astype(np.float32), cell_id, day_id, weight
+
+
+class GridBatchIter(xgb.DataIter):
+    """xgboost DataIter over iter_batches(); feed it to xgb.QuantileDMatrix."""
+
+    def __init__(self, con, subset='train', query=TRAIN_QUERY, batch_rows=BATCH_ROWS,
+                 test_fraction=TEST_FRACTION, seed=SPLIT_SEED, sampler=None, cube=None):
+        self._make_batches = lambda: iter_batches(con, query, subset, batch_rows, test_fraction, seed, sampler,
+                                                  cube=cube)
+        self._batches = None
+        super().__init__()
+
+    def reset(self):
+        self._batches = None
+
+    def next(self, input_data):
+        if self._batches is None:
+            self._batches = self._make_batches()
+        try:
+            X, y, _, _, weight = next(self._batches)
+        except StopIteration:
+            return False
+        input_data(data=X, label=y, weight=weight, feature_names=FEATURES)
+        return True
@@ -0,0 +1,282 @@
+# scripts/tune_classifier.py
+# Budgeted hyperparameter search for the daily ignition classifier by successive halving.
+#
+# A full fit on the 13.5M-row grid table takes 20-90 minutes, so configurations
+# start on small samples and only the best 1/eta of each rung move up:
+#
+#   rung 0  --configs random configurations, negatives sampled at --min-fraction
+#   rung r  the best 1/eta of rung r-1, negatives at --min-fraction x eta^r
+#   last    negatives at --max-fraction
+#
+# Samples come from sampling.py: every ignition is kept, negatives are
+# hash-sampled per (month, cell) and weighted back to the full data. The hash
+# makes the samples nested, so a promoted configuration sees a superset of its
+# previous rung's rows. Validation is time-held-out: the last --val-fraction of
+# days, never trained on. Each fit uses XGBoost early stopping on that
+# validation set, so a trial's tree count is found rather than tuned.
+#
+# Trials run concurrently in a process pool inside a fixed core budget
+# (--cores / --parallel threads each). Every finished trial is appended to
+# cache/tuning/<search>/trials.jsonl. Re-running the same command resumes:
+# finished trials are read back and skipped. Best parameters go to tuned_params.json.
+#
+#   python scripts/tune_classifier.py --configs 27 --eta 3 --cores 8 --parallel 4
+import argparse
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+import duckdb
+import numpy as np
+
+import feature_cache
+from blocked_cv import build_matrix
+from perf_utils import peak_rss_mb, reset_peak_rss
+from sampling import SAMPLING_SEED, NegativeSampler
+from weather_cube import open_cube
+
+DB_PATH = 'eco_pyric.duckdb'
+TUNING_DIR = os.path.join('cache', 'tuning')
+OUTPUT_PATH = 'tuned_params.json'
+
+N_CONFIGS = 27
+ETA = 3
+MIN_FRACTION = 0.01        # negatives kept at rung 0
+MAX_FRACTION = 0.3         # negatives kept at the last rung
+VAL_FRACTION = 0.2         # last 20% of days held out
+VAL_NEG_FRACTION = 0.1     # validation negatives, weighted back like the training rows
+MAX_TREES = 2000
+EARLY_STOPPING_ROUNDS = 50
+METRIC = 'aucpr'           # rare positives: rank by PR-AUC
+SEARCH_SEED = 42
+
+# The training scripts' hand-picked values, always tried as configuration 0
+BASELINE = {'max_depth': 7, 'learning_rate': 0.05, 'min_child_weight': 1.0, 'subsample': 1.0,
+            'colsample_bytree': 1.0, 'reg_lambda': 1.0, 'gamma': 0.0}
+
+
+# ================= SEARCH SPACE =================
+def sample_configs(n, seed=SEARCH_SEED):
+    """Configuration 0 is the baseline; the rest are drawn from the search space."""
+    rng = np.random.default_rng(seed)
+    log_uniform = lambda lo, hi: float(np.exp(rng.uniform(np.log(lo), np.log(hi))))
+    configs = [dict(BASELINE)]
+    for _ in range(n - 1):
+        configs.append({
+            'max_depth': int(rng.integers(3, 11)),
+            'learning_rate': round(log_uniform(0.01, 0.3), 5),
+            'min_child_weight': round(log_uniform(1, 100), 3),
+            'subsample': round(float(rng.uniform(0.5, 1.0)), 3),
+            'colsample_bytree': round(float(rng.uniform(0.5, 1.0)), 3),
+            'reg_lambda': round(log_uniform(0.1, 10), 3),
+            'gamma': round(float(rng.choice([0.0, log_uniform(0.01, 5)])), 3),
+        })
+    return configs[:n]
+
+
+def rung_fractions(min_fraction, max_fraction, eta):
+    """Negative fractions per rung, growing by eta and ending at max_fraction."""
+    n_rungs = int(math.floor(math.log(max_fraction / min_fraction, eta) + 1e-9)) + 1
+    return [max_fraction / eta ** (n_rungs - 1 - r) for r in range(n_rungs)]
+
+
+# ================= SAMPLES (shared with the workers via mmap) =================
+def _save_index(search_dir, name, idx, weights):
+    for suffix, values in (('idx', idx), ('w', weights)):
+        tmp = os.path.join(search_dir, f"{name}_{suffix}.tmp-{os.getpid()}.npy")
+        np.save(tmp, values)
+        os.replace(tmp, os.path.join(search_dir, f"{name}_{suffix}.npy"))
+
+
+def build_samples(search_dir, arrays, cutoff_day, fractions, val_neg_fraction):
+    """Row indices + weights for the validation set and each rung, written once per search."""
+    y, cell_id, day_id = np.asarray(arrays['y']), np.asarray(arrays['cell_id']), np.asarray(arrays['day_id'])
+    parts = {'val': (day_id >= cutoff_day, val_neg_fraction)}
+    parts.update({f"rung{r}": (day_id < cutoff_day, frac) for r, frac in enumerate(fractions)})
+    for name, (rows, frac) in parts.items():
+        if os.path.exists(os.path.join(search_dir, f"{name}_w.npy")):
+            continue
+        rows = np.flatnonzero(rows)
+        sampler = NegativeSampler(frac, SAMPLING_SEED)
+        sampler.count(y[rows], cell_id[rows], day_id[rows])
+        keep, weights = sampler.apply(y[rows], cell_id[rows], day_id[rows])
+        _save_index(search_dir, name, rows[keep], weights)
+
+
+def load_sample(search_dir, name):
+    return (np.load(os.path.join(search_dir, f"{name}_idx.npy"), mmap_mode='r'),
+            np.load(os.path.join(search_dir, f"{name}_w.npy"), mmap_mode='r'))
+
+
+# ================= ONE TRIAL (pool worker) =================
+_worker = {}
+
+
+def _init_worker(key, cache_dir, search_dir):
+    arrays, _ = feature_cache.load_matrices(key, cache_dir)
+    val_idx, val_w = load_sample(search_dir, 'val')
+    _worker.update(arrays=arrays, search_dir=search_dir,
+                   val=(arrays['X'][val_idx], np.asarray(arrays['y'][val_idx]), np.asarray(val_w)))
+
+
+def run_trial(config_id, rung, params, nthread, scale_pos_weight, max_trees, early_stopping_rounds, metric):
+    """Fit one configuration on one rung's sample with early stopping; returns the trial record."""
+    from sklearn.metrics import average_precision_score, roc_auc_score
+    from xgboost import XGBClassifier
+
+    # Workers are reused across trials: restart the high-water mark so it is this trial's
+    reset_peak_rss()
+    arrays = _worker['arrays']
+    idx, weights = load_sample(_worker['search_dir'], f"rung{rung}")
+    X_train, y_train = arrays['X'][idx], np.asarray(arrays['y'][idx])
+    X_val, y_val, w_val = _worker['val']
+
+    model = XGBClassifier(**params, n_estimators=max_trees, scale_pos_weight=scale_pos_weight, random_state=42,
+                          tree_method='hist', n_jobs=nthread, eval_metric=metric,
+                          early_stopping_rounds=early_stopping_rounds)
+    start = time.time()
+    model.fit(X_train, y_train, sample_weight=np.asarray(weights), eval_set=[(X_val, y_val)],
+              sample_weight_eval_set=[w_val], verbose=False)
+    fit_s = time.time() - start
+
+    proba = model.predict_proba(X_val, iteration_range=(0, model.best_iteration + 1))[:, 1]
+    return {'config': config_id, 'rung': rung, 'params': params, 'train_rows': len(idx),
+            'score': float(model.best_score), 'auc': float(roc_auc_score(y_val, proba, sample_weight=w_val)),
+            'pr_auc': float(average_precision_score(y_val, proba, sample_weight=w_val)),
+            'n_estimators': int(model.best_iteration) + 1, 'fit_s': fit_s, 'peak_rss_mb': peak_rss_mb()}
+
+
+# ================= PERSISTENCE =================
+def load_trials(path):
+    """Finished trials keyed by (config, rung). A half-written last line from a crash is cut off."""
+    trials = {}
+    if not os.path.exists(path):
+        return trials
+    with open(path, 'rb') as f:
+        data = f.read()
+    complete = data[:data.rfind(b'\n') + 1]
+    if len(complete) < len(data):
+        with open(path, 'wb') as f:
+            f.write(complete)
+    for line in complete.decode().splitlines():
+        record = json.loads(line)
+        trials[(record['config'], record['rung'])] = record
+    return trials
+
+
+def append_trial(path, record):
+    with open(path, 'a') as f:
+        f.write(json.dumps(record) + '\n')
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Successive-halving hyperparameter search for the ignition classifier")
+    parser.add_argument('--db', default=DB_PATH)
+    parser.add_argument('--configs', type=int, default=N_CONFIGS, help="configurations at rung 0")
+    parser.add_argument('--eta', type=int, default=ETA, help="keep the best 1/eta per rung")
+    parser.add_argument('--min-fraction', type=float, default=MIN_FRACTION, help="negatives kept at rung 0")
+    parser.add_argument('--max-fraction', type=float, default=MAX_FRACTION, help="negatives kept at the last rung")
+    parser.add_argument('--val-fraction', type=float, default=VAL_FRACTION, help="latest share of days held out")
+    parser.add_argument('--val-neg-fraction', type=float, default=VAL_NEG_FRACTION)
+    parser.add_argument('--max-trees', type=int, default=MAX_TREES)
+    parser.add_argument('--early-stopping', type=int, default=EARLY_STOPPING_ROUNDS)
+    parser.add_argument('--metric', default=METRIC, choices=['aucpr', 'auc', 'logloss'])
+    parser.add_argument('--cores', type=int, default=os.cpu_count() or 1, help="total core budget")
+    parser.add_argument('--parallel', type=int, default=None, help="concurrent trials (default: cores, max 4)")
+    parser.add_argument('--seed', type=int, default=SEARCH_SEED)
+    parser.add_argument('--output', default=OUTPUT_PATH)
+    args = parser.parse_args()
+
+    print("=== HYPERPARAMETER SEARCH: SUCCESSIVE HALVING ===")
+    print(f"Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+
+    con = duckdb.connect(args.db, read_only=True)
+    cube = open_cube()
+    key = build_matrix(con, cube)
+    con.close()
+    arrays, _ = feature_cache.load_matrices(key)
+
+    # Time holdout: the last val_fraction of the table's days
+    day_id = np.asarray(arrays['day_id'])
+    first_day, last_day = int(day_id.min()), int(day_id.max())
+    cutoff_day = first_day + int((last_day - first_day + 1) * (1 - args.val_fraction))
+    y = np.asarray(arrays['y'])
+    n_pos = int(y[day_id < cutoff_day].sum())
+    scale_pos_weight = (int((day_id < cutoff_day).sum()) - n_pos) / n_pos
+
+    fractions = rung_fractions(args.min_fraction, args.max_fraction, args.eta)
+    settings = {'matrix': key, 'configs': args.configs, 'eta': args.eta, 'fractions': fractions,
+                'cutoff_day': cutoff_day, 'val_neg_fraction': args.val_neg_fraction, 'max_trees': args.max_trees,
+                'early_stopping': args.early_stopping, 'metric': args.metric, 'seed': args.seed}
+    search_key = feature_cache.cache_key(key, [], args.seed, **settings)
+    search_dir = os.path.join(TUNING_DIR, search_key)
+    os.makedirs(search_dir, exist_ok=True)
+    with open(os.path.join(search_dir, 'search.json'), 'w') as f:
+        json.dump(settings, f, indent=2)
+    trials_path = os.path.join(search_dir, 'trials.jsonl')
+    trials = load_trials(trials_path)
+
+    build_samples(search_dir, arrays, cutoff_day, fractions, args.val_neg_fraction)
+    configs = sample_configs(args.configs, args.seed)
+    parallel = max(1, min(args.parallel or min(args.cores, 4), args.cores, args.configs))
+    nthread = max(1, args.cores // parallel)
+    print(f"Search {search_key}: {args.configs} configs, eta {args.eta}, "
+          f"rungs at {', '.join(f'{f:.1%}' for f in fractions)} of negatives")
+    print(f"Validation: days >= {cutoff_day} ({len(load_sample(search_dir, 'val')[0]):,} sampled rows); "
+          f"{parallel} trials at a time x {nthread} thread(s)")
+    if trials:
+        print(f"Resuming: {len(trials)} finished trial(s) in {trials_path}")
+
+    start = time.time()
+    alive = list(range(len(configs)))
+    with ProcessPoolExecutor(max_workers=parallel, initializer=_init_worker,
+                             initargs=(key, feature_cache.CACHE_DIR, search_dir)) as pool:
+        for rung, frac in enumerate(fractions):
+            todo = [c for c in alive if (c, rung) not in trials]
+            rows = len(load_sample(search_dir, f"rung{rung}")[0])
+            print(f"\n--- Rung {rung}: {len(alive)} configs on {rows:,} rows ({frac:.1%} of negatives), "
+                  f"{len(alive) - len(todo)} already done ---")
+            futures = [pool.submit(run_trial, c, rung, configs[c], nthread, scale_pos_weight, args.max_trees,
+                                   args.early_stopping, args.metric) for c in todo]
+            for future in as_completed(futures):
+                record = future.result()
+                append_trial(trials_path, record)
+                trials[(record['config'], rung)] = record
+                print(f"  config {record['config']:>3}: {args.metric} {record['score']:.4f}, "
+                      f"{record['n_estimators']} trees, {record['fit_s']:.1f} s, "
+                      f"peak {record['peak_rss_mb']:.0f} MB")
+
+            # logloss is minimized, the AUCs maximized
+            sign = 1 if args.metric == 'logloss' else -1
+            alive.sort(key=lambda c: sign * trials[(c, rung)]['score'])
+            if rung < len(fractions) - 1:
+                alive = alive[:max(1, len(alive) // args.eta)]
+                print(f"  promoted: {alive}")
+
+    best = trials[(alive[0], len(fractions) - 1)]
+    fits = list(trials.values())
+    baseline = max((t for t in fits if t['config'] == 0), key=lambda t: t['rung'])
+    result = {'search': search_key, 'config': best['config'], 'params': best['params'],
+              'n_estimators': best['n_estimators'], 'metric': args.metric, 'score': best['score'],
+              'auc': best['auc'], 'pr_auc': best['pr_auc'], 'neg_fraction': fractions[-1]}
+    with open(args.output, 'w') as f:
+        json.dump(result, f, indent=2)
+
+    print("\n" + "=" * 50)
+    print(f"Best: config {best['config']} {best['params']}, {best['n_estimators']} trees")
+    print(f"  validation AUC {best['auc']:.4f}, PR-AUC {best['pr_auc']:.4f} "
+          f"(baseline, rung {baseline['rung']}: AUC {baseline['auc']:.4f}, PR-AUC {baseline['pr_auc']:.4f})")
+    print(f"{len(fits)} trials, {sum(t['fit_s'] for t in fits):.0f} s of fitting, "
+          f"{time.time() - start:.0f} s wall this run")
+    print(f"Best parameters: {args.output}; trials: {trials_path}")
+    print("=" * 50)
+    print("Done.")
+
+
+if __name__ == "__main__":
+    main()
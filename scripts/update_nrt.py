@@ -0,0 +1,253 @@
+# scripts/update_nrt.py
+# Daily incremental update from the FIRMS NRT download: only rows after each
+# table's high-water mark are read, and only the new day slices downstream are
+# written, instead of re-ingesting the archive and rebuilding every table.
+#
+#   fire_events                 NRT rows upserted (table mode); Parquet mode reloads the changed NRT CSV
+#   fire_events_with_dust       new rows appended, dust columns computed in SQL (if the table exists)
+#   fire_events_utah            new Utah-bbox rows appended
+#   utah_grid_ignition_labels   spine rows appended for new days, late detections flip ignition to 1
+#                               (every-detection labels only; a first-day-only table is left alone)
+#   data/label_cube/            re-packed from the labels table
+#   utah_grid_neighbor_fires    recomputed from the first changed day (if the table exists)
+#
+# Rows match on (latitude, longitude, acq_date, acq_time), so NRT detections already
+# in the archive, or re-sent in the next NRT file, are not inserted twice. Rows
+# ingested before acq_time was kept (NULL) match on position + date.
+#
+# pipeline_watermarks holds the last acq day each table has seen; each run re-reads
+# OVERLAP_DAYS before it because NRT files keep filling in the latest days.
+#
+#   python scripts/update_nrt.py                      # data/firms/fire_nrt_SV-C2_*.csv
+#   python scripts/update_nrt.py --files data/firms/fire_nrt_SV-C2_708466.csv
+import argparse
+import glob
+import os
+import time
+from datetime import datetime
+
+import duckdb
+
+import neighbor_fires
+from features import KM_PER_DEGREE, LAKE_LAT, LAKE_LON
+from firms_parquet import (CONFIDENCE_EXCLUDE, MAX_LAT, MAX_LON, MIN_LAT, MIN_LON, PARQUET_DIR,
+                           create_view, ingest)
+from label_cube import EVERY_DETECTION, LABEL_CUBE_DIR, LABELS_TABLE, LabelCube, get_label_mode
+from utah_grid import IN_GRID_SQL, N_CELLS, date_from_day_id, register_grid_macros
+
+NRT_GLOB = os.path.join('data', 'firms', 'fire_nrt_SV-C2_*.csv')
+WATERMARK_TABLE = 'pipeline_watermarks'
+OVERLAP_DAYS = 3
+
+# features.dist_to_lake_km / dust_exposure (as add_dust_feature.py) in SQL, for fire rows
+_LAKE_KM = f"sqrt(pow(longitude - ({LAKE_LON}), 2) + pow(latitude - {LAKE_LAT}, 2)) * {KM_PER_DEGREE}"
+DUST_SQL = {
+    'distance_to_lake_km': _LAKE_KM,
+    'dust_exposure': f"LEAST(1 / ({_LAKE_KM} + 1), 1.0)",
+}
+UTAH_BBOX_SQL = "latitude BETWEEN 37 AND 42 AND longitude BETWEEN -114 AND -109"  # as filter_utah_fires.py
+
+
+# ================= CATALOG =================
+def table_kind(con, name):
+    """'BASE TABLE', 'VIEW' or None."""
+    row = con.execute("SELECT table_type FROM information_schema.tables WHERE table_name = ?", [name]).fetchone()
+    return row[0] if row else None
+
+
+def column_types(con, name):
+    return dict(con.execute("SELECT column_name, data_type FROM information_schema.columns WHERE table_name = ?",
+                            [name]).fetchall())
+
+
+# ================= WATERMARKS =================
+def last_day(con, table):
+    return con.execute(f"SELECT MAX(date_to_day(acq_date)) FROM {table}").fetchone()[0]
+
+
+def get_watermark(con, stage, table):
+    """Last acq day `table` has seen: the stored mark, capped by the table itself (it may have been rebuilt)."""
+    con.execute(f"""
+    CREATE TABLE IF NOT EXISTS {WATERMARK_TABLE} (
+        stage VARCHAR PRIMARY KEY, last_day_id SMALLINT, updated TIMESTAMP
+    )
+    """)
+    stored = con.execute(f"SELECT last_day_id FROM {WATERMARK_TABLE} WHERE stage = ?", [stage]).fetchone()
+    actual = last_day(con, table)
+    if actual is None:
+        return -OVERLAP_DAYS  # empty table: read everything
+    return actual if stored is None else min(stored[0], actual)
+
+
+def set_watermark(con, stage, table):
+    con.execute(f"INSERT OR REPLACE INTO {WATERMARK_TABLE} VALUES (?, ?, now()::TIMESTAMP)",
+                [stage, last_day(con, table)])
+
+
+# ================= UPSERT =================
+def nrt_source_sql(csv_files):
+    """The NRT CSVs with the ingest's bbox/confidence filters and typed acq_date/acq_time."""
+    return '\nUNION ALL\n'.join(f"""
+    SELECT '{os.path.basename(f)}' AS source_file, latitude, longitude,
+           CAST(acq_date AS DATE) AS acq_date, CAST(acq_time AS SMALLINT) AS acq_time,
+           brightness, frp, confidence
+    FROM read_csv_auto('{f}')
+    WHERE latitude BETWEEN {MIN_LAT} AND {MAX_LAT}
+      AND longitude BETWEEN {MIN_LON} AND {MAX_LON}
+      AND confidence != '{CONFIDENCE_EXCLUDE}'
+    """ for f in csv_files)
+
+
+def append_new(con, source_sql, target, since_day, where='TRUE'):
+    """Insert rows of source_sql from since_day on that target doesn't have yet. Returns rows added.
+
+    The inserted rows stay in the temp table new_rows for the next stage.
+    """
+    types = column_types(con, target)
+    if 'acq_time' not in types:
+        con.execute(f"ALTER TABLE {target} ADD COLUMN acq_time SMALLINT")  # tables ingested before acq_time
+        types['acq_time'] = 'SMALLINT'
+    since = f"day_to_date({since_day})"
+    # Keys compared in the target's column types (FLOAT in Parquet mode, DOUBLE in table mode)
+    con.execute(f"""
+    CREATE OR REPLACE TEMP TABLE new_rows AS
+    WITH s AS (
+        SELECT * REPLACE (CAST(latitude AS {types['latitude']}) AS latitude,
+                          CAST(longitude AS {types['longitude']}) AS longitude,
+                          CAST(acq_date AS DATE) AS acq_date)
+        FROM ({source_sql})
+        WHERE CAST(acq_date AS DATE) >= {since} AND {where}
+    ),
+    e AS (
+        SELECT latitude, longitude, CAST(acq_date AS DATE) AS acq_date, acq_time
+        FROM {target}
+        WHERE CAST(acq_date AS DATE) >= {since}
+    )
+    SELECT DISTINCT ON (s.latitude, s.longitude, s.acq_date, s.acq_time) s.*
+    FROM s ANTI JOIN e
+      ON s.latitude = e.latitude AND s.longitude = e.longitude AND s.acq_date = e.acq_date
+     AND (s.acq_time = e.acq_time OR e.acq_time IS NULL)
+    """)
+    available = set(column_types(con, 'new_rows'))
+    select = [col if col in available else f"{DUST_SQL[col]} AS {col}"
+              for col in types if col in available or col in DUST_SQL]
+    return con.execute(f"INSERT INTO {target} BY NAME SELECT {', '.join(select)} FROM new_rows").fetchone()[0]
+
+
+# ================= LABELS =================
+def append_labels(con, table=LABELS_TABLE):
+    """Fold new_rows (Utah detections) into the labels. Returns (first changed day, days appended, cells flipped)."""
+    # Every new detection becomes an ignition, which is only the table's own definition in every-detection mode
+    mode = get_label_mode(con, table)
+    if mode is None:
+        raise ValueError(f"{table} has no recorded label mode; rebuild it with scripts_create_utah_grid_labels.py, "
+                         "or record it with scripts/label_cube.py --set-mode every-detection")
+    if mode != EVERY_DETECTION:
+        raise ValueError(f"{table} holds {mode} labels, which NRT detections can't be appended to; rebuild with "
+                         "cluster_fire_events.py + scripts_create_utah_grid_labels.py --first-day-only")
+    first_day, last = con.execute(f"SELECT MIN(day_id), MAX(day_id) FROM {table}").fetchone()
+    con.execute(f"""
+    CREATE OR REPLACE TEMP TABLE new_fires AS
+    SELECT DISTINCT latlon_to_cell(latitude, longitude) AS cell_id, date_to_day(acq_date) AS day_id
+    FROM new_rows
+    WHERE {IN_GRID_SQL} AND date_to_day(acq_date) >= {first_day}
+    """)
+    min_new, max_new = con.execute("SELECT MIN(day_id), MAX(day_id) FROM new_fires").fetchone()
+    if min_new is None:
+        return None, 0, 0
+
+    # Detections on days the table already has: flip those cell-days
+    flipped = con.execute(f"""
+    UPDATE {table} SET ignition = 1
+    FROM new_fires f
+    WHERE {table}.cell_id = f.cell_id AND {table}.day_id = f.day_id AND {table}.ignition = 0
+    """).fetchone()[0]
+
+    # New days: the same cell x day spine as scripts_create_utah_grid_labels.py, for the new slice only
+    n_days = max(max_new - last, 0)
+    if n_days:
+        con.execute(f"""
+        INSERT INTO {table}
+        SELECT CAST(c AS SMALLINT) AS cell_id, CAST(d AS SMALLINT) AS day_id,
+               CAST(f.cell_id IS NOT NULL AS TINYINT) AS ignition
+        FROM range({N_CELLS}) AS cells(c)
+        CROSS JOIN range({last + 1}, {max_new + 1}) AS days(d)
+        LEFT JOIN new_fires f ON f.cell_id = c AND f.day_id = d
+        ORDER BY cell_id, day_id
+        """)
+    return min(min_new, last + 1), n_days, flipped
+
+
+def update(con, csv_files, parquet_dir=PARQUET_DIR):
+    """Run every stage; returns {stage: summary string}."""
+    register_grid_macros(con)
+    tables = set(con.execute("SHOW TABLES").fetchdf()['name'])
+    report = {}
+
+    # fire_events: upsert, or reload the changed NRT CSV into the Parquet dataset
+    if table_kind(con, 'fire_events') == 'VIEW':
+        results = ingest(csv_files, parquet_dir)
+        create_view(con, 'fire_events', parquet_dir)
+        report['fire_events'] = ', '.join(f"{os.path.basename(f)} {status}" for f, (status, _) in results.items())
+    else:
+        hwm = get_watermark(con, 'fire_events', 'fire_events')
+        added = append_new(con, nrt_source_sql(csv_files), 'fire_events', hwm - OVERLAP_DAYS)
+        report['fire_events'] = f"+{added:,} rows"
+        set_watermark(con, 'fire_events', 'fire_events')
+
+    # Derived fire tables, each from its parent's rows after its own watermark
+    source = 'fire_events'
+    if 'fire_events_with_dust' in tables:
+        hwm = get_watermark(con, 'fire_events_with_dust', 'fire_events_with_dust')
+        added = append_new(con, 'SELECT * FROM fire_events', 'fire_events_with_dust', hwm - OVERLAP_DAYS)
+        report['fire_events_with_dust'] = f"+{added:,} rows"
+        set_watermark(con, 'fire_events_with_dust', 'fire_events_with_dust')
+        source = 'fire_events_with_dust'
+
+    hwm = get_watermark(con, 'fire_events_utah', 'fire_events_utah')
+    added = append_new(con, f'SELECT * FROM {source}', 'fire_events_utah', hwm - OVERLAP_DAYS, UTAH_BBOX_SQL)
+    report['fire_events_utah'] = f"+{added:,} rows"
+    set_watermark(con, 'fire_events_utah', 'fire_events_utah')
+
+    # Labels + cube + neighbour features, only from the first day that changed
+    if LABELS_TABLE in tables:
+        try:
+            first_changed, n_days, flipped = append_labels(con)
+        except ValueError as e:
+            report[LABELS_TABLE] = f"REFUSED: {e}"
+            return report
+        report[LABELS_TABLE] = f"+{n_days:,} days ({n_days * N_CELLS:,} rows), {flipped:,} cell-days flipped"
+        if first_changed is not None:
+            LabelCube.from_table(con, LABELS_TABLE).save(LABEL_CUBE_DIR, source=LABELS_TABLE,
+                                                         label_mode=EVERY_DETECTION)
+            report['label_cube'] = f"re-packed to {LABEL_CUBE_DIR}/"
+            if neighbor_fires.NEIGHBOR_TABLE in tables:
+                rows = neighbor_fires.update(con, first_changed)
+                report[neighbor_fires.NEIGHBOR_TABLE] = (f"{rows:,} cell-days recomputed "
+                                                         f"from {date_from_day_id(first_changed)}")
+    return report
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Incremental FIRMS NRT update of fire_events, labels and features")
+    parser.add_argument('--db', default='eco_pyric.duckdb')
+    parser.add_argument('--files', nargs='+', default=None, help=f"NRT CSVs (default {NRT_GLOB})")
+    parser.add_argument('--out', default=PARQUET_DIR, help="Parquet dataset directory (Parquet mode)")
+    args = parser.parse_args()
+
+    csv_files = args.files or sorted(glob.glob(NRT_GLOB))
+    print("=== INCREMENTAL FIRMS NRT UPDATE ===")
+    print(f"Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print(f"Files: {', '.join(os.path.basename(f) for f in csv_files) or 'none'}")
+    if not csv_files:
+        raise SystemExit(f"No NRT files found ({NRT_GLOB})")
+
+    con = duckdb.connect(args.db)
+    t0 = time.time()
+    for stage, summary in update(con, csv_files, args.out).items():
+        print(f"  {stage}: {summary}")
+    print(con.execute(f"SELECT stage, day_to_date(last_day_id) AS through FROM {WATERMARK_TABLE} ORDER BY stage")
+          .fetchdf().to_string(index=False))
+    con.close()
+    print(f"Updated in {time.time() - t0:.2f} seconds")
+    print("Done.")
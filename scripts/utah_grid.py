@@ -0,0 +1,101 @@
+# scripts/utah_grid.py
+# Utah 0.1° grid definition + the compact (cell_id, day_id) encoding used by
+# utah_grid_ignition_labels and every script that reads it.
+#
+#   cell_id = lat_idx * N_LON + lon_idx   (row-major, int16)
+#   day_id  = days since EPOCH_START      (int16)
+import numpy as np
+from datetime import date
+
+LAT_MIN, LAT_MAX = 37.0, 42.0
+LON_MIN, LON_MAX = -114.0, -109.0
+GRID_STEP = 0.1
+
+N_LAT = int(round((LAT_MAX - LAT_MIN) / GRID_STEP)) + 1  # 51
+N_LON = int(round((LON_MAX - LON_MIN) / GRID_STEP)) + 1  # 51
+N_CELLS = N_LAT * N_LON                                   # 2,601
+
+# Start of the VIIRS record; int16 day ids cover ~89 years from here
+EPOCH_START = date(2012, 1, 1)
+_EPOCH = np.datetime64(EPOCH_START, 'D')
+
+
+# ================= CELLS =================
+def cell_id_from_latlon(lat, lon):
+    """Snap lat/lon to the nearest grid cell. Points outside the grid get -1."""
+    lat_idx = np.rint((np.asarray(lat, dtype=np.float64) - LAT_MIN) / GRID_STEP).astype(np.int32)
+    lon_idx = np.rint((np.asarray(lon, dtype=np.float64) - LON_MIN) / GRID_STEP).astype(np.int32)
+    inside = (lat_idx >= 0) & (lat_idx < N_LAT) & (lon_idx >= 0) & (lon_idx < N_LON)
+    return np.where(inside, lat_idx * N_LON + lon_idx, -1).astype(np.int16)
+
+
+def cell_lat(cell_id):
+    return np.round(LAT_MIN + (np.asarray(cell_id) // N_LON) * GRID_STEP, 1)
+
+
+def cell_lon(cell_id):
+    return np.round(LON_MIN + (np.asarray(cell_id) % N_LON) * GRID_STEP, 1)
+
+
+def cell_latlon(cell_id):
+    """cell_id -> (grid_lat, grid_lon) float64 arrays."""
+    return cell_lat(cell_id), cell_lon(cell_id)
+
+
+def all_cell_ids():
+    return np.arange(N_CELLS, dtype=np.int16)
+
+
+# ================= DAYS =================
+def day_id_from_date(dates):
+    """Dates (date / datetime64 / 'YYYY-MM-DD' strings) -> int16 day ids."""
+    days = np.asarray(dates, dtype='datetime64[D]') - _EPOCH
+    return days.astype(np.int16)
+
+
+def date_from_day_id(day_id):
+    """int16 day ids -> datetime64[D]."""
+    return _EPOCH + np.asarray(day_id).astype('timedelta64[D]')
+
+
+def month_from_day_id(day_id):
+    d = date_from_day_id(day_id)
+    return (d.astype('datetime64[M]').astype(np.int64) % 12 + 1).astype(np.int8)
+
+
+# ================= DUCKDB =================
+def register_grid_macros(con):
+    """Register SQL macros mirroring the helpers above on a DuckDB connection.
+
+    cell_lat(cell_id), cell_lon(cell_id), latlon_to_cell(lat, lon),
+    day_to_date(day_id), date_to_day(date)
+    """
+    con.execute(f"""
+    CREATE OR REPLACE TEMP MACRO cell_lat(c) AS
+        round({LAT_MIN} + (CAST(c AS INTEGER) // {N_LON}) * {GRID_STEP}, 1)
+    """)
+    con.execute(f"""
+    CREATE OR REPLACE TEMP MACRO cell_lon(c) AS
+        round({LON_MIN} + (CAST(c AS INTEGER) % {N_LON}) * {GRID_STEP}, 1)
+    """)
+    # latlon_to_cell does no bounds check: filter points to the grid bbox first
+    con.execute(f"""
+    CREATE OR REPLACE TEMP MACRO latlon_to_cell(lat, lon) AS
+        CAST(CAST(round((lat - {LAT_MIN}) / {GRID_STEP}) AS INTEGER) * {N_LON}
+             + CAST(round((lon - {LON_MIN}) / {GRID_STEP}) AS INTEGER) AS SMALLINT)
+    """)
+    con.execute(f"""
+    CREATE OR REPLACE TEMP MACRO day_to_date(d) AS
+        DATE '{EPOCH_START}' + CAST(d AS INTEGER)
+    """)
+    con.execute(f"""
+    CREATE OR REPLACE TEMP MACRO date_to_day(d) AS
+        CAST(CAST(d AS DATE) - DATE '{EPOCH_START}' AS SMALLINT)
+    """)
+
+
+# Fires that snap to a grid cell (use before latlon_to_cell)
+IN_GRID_SQL = f"""
+latitude >= {LAT_MIN - GRID_STEP / 2} AND latitude < {LAT_MAX + GRID_STEP / 2}
+AND longitude >= {LON_MIN - GRID_STEP / 2} AND longitude < {LON_MAX + GRID_STEP / 2}
+"""
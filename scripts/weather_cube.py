@@ -0,0 +1,186 @@
+# scripts/weather_cube.py
+# Dense daily weather cube on the Utah grid, interpolated from NOAA GHCN-Daily stations.
+#
+# Each variable is a float32 (n_days, N_CELLS) .npy indexed as cube[var][day_id, cell_id]
+# and opened with mmap, so training and forecasting read weather with plain array
+# indexing instead of a join. Values are metric: °C, mm, km/h.
+#
+# Station -> cell interpolation is inverse-distance weighting over the K nearest
+# stations, stored as a sparse (cells x stations) matrix. Stations that didn't
+# report a variable on a day drop out of that day's weights. Temperatures are
+# moved to the cell's elevation with a standard lapse rate first.
+import hashlib
+import json
+import os
+
+import numpy as np
+from scipy import sparse
+from scipy.spatial import cKDTree
+
+import noaa_station_days
+
+
+CUBE_DIR = os.path.join('data', 'weather_cube')
+WEATHER_DIR = noaa_station_days.WEATHER_DIR
+
+CUBE_VARS = ['TAVG', 'TMAX', 'TMIN', 'PRCP', 'AWND']
+ANTECEDENT_META = 'antecedent.json'  # derived vars from antecedent_dryness.py
+TEMP_VARS = {'TAVG', 'TMAX', 'TMIN'}
+UNITS = {'TAVG': 'degC', 'TMAX': 'degC', 'TMIN': 'degC', 'PRCP': 'mm', 'AWND': 'km/h'}
+
+K_NEIGHBORS = 12        # stations per cell
+MAX_DIST_KM = 150.0     # ignore stations farther than this
+IDW_POWER = 2.0
+MIN_DIST_KM = 1.0       # a station inside a cell doesn't get infinite weight
+LAPSE_RATE_C_PER_M = 0.0065
+
+KM_PER_DEG_LAT = 111.0
+KM_PER_DEG_LON = 111.0 * np.cos(np.radians(39.5))  # equirectangular at mid-Utah
+
+
+def to_metric(var, values):
+    """GHCN-Daily CSV 'standard' units (°F, inches, mph) -> °C, mm, km/h."""
+    if var in TEMP_VARS:
+        return (values - 32.0) * 5.0 / 9.0
+    if var == 'PRCP':
+        return values * 25.4
+    if var == 'AWND':
+        return values * 1.609344
+    return values
+
+
+def to_standard(var, values):
+    """Inverse of to_metric: cube values back to GHCN-Daily 'standard' units."""
+    if var in TEMP_VARS:
+        return values * 9.0 / 5.0 + 32.0
+    if var == 'PRCP':
+        return values / 25.4
+    if var == 'AWND':
+        return values / 1.609344
+    return values
+
+
+# ================= STATION DATA =================
+def load_station_days(con, weather_dir=WEATHER_DIR):
+    """One row per (STATION, DATE) with the cube variables, from the noaa_station_days table."""
+    return noaa_station_days.load_station_days(
+        con, ['STATION', 'LATITUDE', 'LONGITUDE', 'ELEVATION', 'DATE'] + CUBE_VARS, weather_dir)
+
+
+def station_table(station_days):
+    """(STATION, LATITUDE, LONGITUDE, ELEVATION), one row per station, sorted by id."""
+    return (station_days.groupby('STATION')[['LATITUDE', 'LONGITUDE', 'ELEVATION']]
+            .median().reset_index().sort_values('STATION').reset_index(drop=True))
+
+
+def station_fingerprint(stations, cell_elevation):
+    payload = stations.round(5).to_csv(index=False).encode()
+    payload += np.round(cell_elevation, 1).tobytes()
+    payload += json.dumps([K_NEIGHBORS, MAX_DIST_KM, IDW_POWER, MIN_DIST_KM]).encode()
+    return hashlib.sha1(payload).hexdigest()[:16]
+
+
+# ================= IDW WEIGHTS =================
+def project_km(lat, lon):
+    return np.column_stack([np.asarray(lat) * KM_PER_DEG_LAT, np.asarray(lon) * KM_PER_DEG_LON])
+
+
+def idw_weights(station_lat, station_lon, cell_lat, cell_lon,
+                k=K_NEIGHBORS, max_dist_km=MAX_DIST_KM, power=IDW_POWER):
+    """Sparse (cells x stations) CSR of unnormalized inverse-distance weights."""
+    tree = cKDTree(project_km(station_lat, station_lon))
+    k = min(k, len(station_lat))
+    dist, idx = tree.query(project_km(cell_lat, cell_lon), k=k, distance_upper_bound=max_dist_km)
+    dist, idx = dist.reshape(len(cell_lat), k), idx.reshape(len(cell_lat), k)
+
+    found = np.isfinite(dist)
+    rows = np.repeat(np.arange(len(cell_lat)), k)[found.ravel()]
+    w = 1.0 / np.maximum(dist[found], MIN_DIST_KM) ** power
+    return sparse.csr_matrix((w, (rows, idx[found])), shape=(len(cell_lat), len(station_lat)))
+
+
+def interpolate_days(W, values, station_elev=None, cell_elev=None):
+    """Station values (stations, days) -> cell values (cells, days).
+
+    Weights are renormalized per day over the stations that reported. With
+    elevations, each station's value is shifted to the cell elevation by the
+    lapse rate: T_cell = sum w (T_s + lapse * (z_s - z_cell)) / sum w. Stations
+    with no elevation get no lapse shift (z_s = z_cell), so they can't turn a
+    cell NaN.
+    """
+    reported = ~np.isnan(values)
+    den = np.asarray(W @ reported.astype(np.float64))
+    num = np.asarray(W @ np.where(reported, values, 0.0))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        out = num / den
+        if station_elev is not None:
+            with_elev = reported & ~np.isnan(station_elev)[:, None]
+            z_num = np.asarray(W @ np.where(with_elev, station_elev[:, None], 0.0))
+            z_den = np.asarray(W @ with_elev.astype(np.float64))
+            # sum w (z_s - z_cell) / sum w over the reporting stations that have an elevation
+            shift = np.where(z_den > 0, (z_num - z_den * cell_elev[:, None]) / den, 0.0)
+            out += LAPSE_RATE_C_PER_M * shift
+    return out.astype(np.float32)
+
+
+def load_or_build_weights(stations, cell_lat, cell_lon, cell_elev, cube_dir=CUBE_DIR):
+    """Weights are rebuilt only when the station set (or cell elevations / IDW settings) changes."""
+    fp = station_fingerprint(stations, cell_elev)
+    path = os.path.join(cube_dir, 'idw_weights.npz')
+    meta_path = os.path.join(cube_dir, 'idw_weights.json')
+    if os.path.exists(path) and os.path.exists(meta_path):
+        with open(meta_path) as f:
+            if json.load(f).get('fingerprint') == fp:
+                return sparse.load_npz(path), fp, False
+
+    W = idw_weights(stations['LATITUDE'].values, stations['LONGITUDE'].values, cell_lat, cell_lon)
+    os.makedirs(cube_dir, exist_ok=True)
+    sparse.save_npz(path, W)
+    with open(meta_path, 'w') as f:
+        json.dump({'fingerprint': fp, 'stations': stations['STATION'].tolist()}, f)
+    return W, fp, True
+
+
+# ================= READING THE CUBE =================
+class WeatherCube:
+    """mmap-backed daily weather on the grid; index as cube[var][day_id, cell_id]."""
+
+    def __init__(self, cube_dir=CUBE_DIR):
+        with open(os.path.join(cube_dir, 'meta.json')) as f:
+            self.meta = json.load(f)
+        self.n_days = self.meta['n_days']
+        self.fingerprint = self.meta['fingerprint']
+        self.values = {var: np.load(os.path.join(cube_dir, f"{var}.npy"), mmap_mode='r')
+                       for var in self.meta['vars']}
+        # Antecedent-dryness arrays, when they've been computed for this cube's days
+        derived_path = os.path.join(cube_dir, ANTECEDENT_META)
+        if os.path.exists(derived_path):
+            with open(derived_path) as f:
+                derived = json.load(f)
+            if derived['n_days'] == self.n_days:
+                self.values.update({var: np.load(os.path.join(cube_dir, f"{var}.npy"), mmap_mode='r')
+                                    for var in derived['vars']})
+
+    def __getitem__(self, var):
+        return self.values[var]
+
+    def lookup(self, var, day_id, cell_id):
+        """Per-row values for (day_id, cell_id) arrays; NaN for days outside the cube."""
+        day_id = np.asarray(day_id, dtype=np.int64)
+        inside = (day_id >= 0) & (day_id < self.n_days)
+        out = np.full(len(day_id), np.nan, dtype=np.float32)
+        out[inside] = self.values[var][day_id[inside], np.asarray(cell_id, dtype=np.int64)[inside]]
+        return out
+
+    def training_weather(self, day_id, cell_id):
+        """(tavg °C, prcp mm) per row; TAVG falls back to the TMAX/TMIN midpoint where a day lacks it."""
+        tavg = self.lookup('TAVG', day_id, cell_id)
+        midpoint = (self.lookup('TMAX', day_id, cell_id) + self.lookup('TMIN', day_id, cell_id)) / 2
+        return np.where(np.isnan(tavg), midpoint, tavg), self.lookup('PRCP', day_id, cell_id)
+
+
+def open_cube(cube_dir=CUBE_DIR):
+    """The built cube, or None if build_weather_cube.py hasn't been run."""
+    if not os.path.exists(os.path.join(cube_dir, 'meta.json')):
+        return None
+    return WeatherCube(cube_dir)
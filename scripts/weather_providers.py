@@ -0,0 +1,276 @@
+# scripts/weather_providers.py
+# Pluggable daily weather for the forecast scripts / service.
+#
+# A provider returns per-cell daily weather for one date as float32 arrays
+# aligned with the requested cell lat/lon arrays:
+#     {'tavg': °C, 'rh': %, 'wspd': km/h, 'prcp': mm}
+# forecast() returns the same for several days as (days, cells) arrays.
+import hashlib
+import json
+import os
+import shutil
+from datetime import date, datetime, timedelta, timezone
+
+import numpy as np
+import requests
+
+from utah_grid import LAT_MIN, LAT_MAX, LON_MIN, LON_MAX, EPOCH_START, cell_id_from_latlon
+
+WEATHER_VARS = ['tavg', 'rh', 'wspd', 'prcp']
+
+# Open-Meteo daily variable for each weather var
+OPEN_METEO_DAILY = {
+    'tavg': 'temperature_2m_mean',
+    'rh': 'relative_humidity_2m_mean',
+    'wspd': 'wind_speed_10m_max',
+    'prcp': 'precipitation_sum'
+}
+OPEN_METEO_URL = "https://api.open-meteo.com/v1/forecast"
+
+# Demo point used by the v2/v3 forecasts (Saratoga Springs area)
+DEMO_LAT, DEMO_LON = 40.5, -111.9
+
+
+class WeatherProvider:
+    name = 'base'
+
+    def daily(self, day, lats, lons):
+        raise NotImplementedError
+
+    def forecast(self, lats, lons, n_days, start=None):
+        """(dates, {var: (days, cells) float32}) starting today (or start)."""
+        start = start or date.today()
+        dates = [start + timedelta(days=d) for d in range(n_days)]
+        per_day = [self.daily(d, lats, lons) for d in dates]
+        return dates, {var: np.stack([w[var] for w in per_day]) for var in WEATHER_VARS}
+
+
+def _broadcast(values, n):
+    return {var: np.full(n, np.nan if values.get(var) is None else values[var], dtype=np.float32)
+            for var in WEATHER_VARS}
+
+
+class OpenMeteoPointProvider(WeatherProvider):
+    """One Open-Meteo forecast at the demo point, broadcast to every cell (same as v3)."""
+    name = 'open-meteo'
+
+    def __init__(self, lat=DEMO_LAT, lon=DEMO_LON, base_url=OPEN_METEO_URL, timeout=15):
+        self.lat, self.lon, self.base_url, self.timeout = lat, lon, base_url, timeout
+
+    def daily(self, day, lats, lons):
+        params = {
+            'latitude': self.lat,
+            'longitude': self.lon,
+            'daily': ','.join(OPEN_METEO_DAILY.values()),
+            'timezone': 'auto',
+            'start_date': day.isoformat(),
+            'end_date': day.isoformat()
+        }
+        r = requests.get(self.base_url, params=params, timeout=self.timeout)
+        r.raise_for_status()
+        data = r.json()['daily']
+        return _broadcast({
+            'tavg': data['temperature_2m_mean'][0],
+            'rh': data['relative_humidity_2m_mean'][0],
+            'wspd': data['wind_speed_10m_max'][0],
+            'prcp': data['precipitation_sum'][0]
+        }, len(lats))
+
+
+class StubProvider(WeatherProvider):
+    """Offline weather: fixed values, or per-date values from a JSON file.
+
+    The file maps 'YYYY-MM-DD' (or 'default') to {'tavg': .., 'rh': .., 'wspd': .., 'prcp': ..}.
+    """
+    name = 'stub'
+    DEFAULT = {'tavg': 25.0, 'rh': 20.0, 'wspd': 15.0, 'prcp': 0.0}
+
+    def __init__(self, path=None, **values):
+        self.by_date = {}
+        if path:
+            with open(path) as f:
+                self.by_date = json.load(f)
+        self.default = {**self.DEFAULT, **self.by_date.get('default', {}), **values}
+
+    def daily(self, day, lats, lons):
+        return _broadcast({**self.default, **self.by_date.get(day.isoformat(), {})}, len(lats))
+
+
+# ================= LATTICE PROVIDER =================
+def lattice_axes(step):
+    """Coarse lattice covering the Utah grid (inclusive of both edges)."""
+    lats = np.round(np.arange(LAT_MIN, LAT_MAX + step / 2, step), 4)
+    lons = np.round(np.arange(LON_MIN, LON_MAX + step / 2, step), 4)
+    return lats, lons
+
+
+def bilinear_weights(axis_lat, axis_lon, lats, lons):
+    """(idx, w), each (n, 4): lattice point index and weight of the 4 corners around every target."""
+    step_lat, step_lon = axis_lat[1] - axis_lat[0], axis_lon[1] - axis_lon[0]
+    fi = (np.asarray(lats, dtype=float) - axis_lat[0]) / step_lat
+    fj = (np.asarray(lons, dtype=float) - axis_lon[0]) / step_lon
+    i = np.clip(np.floor(fi).astype(int), 0, len(axis_lat) - 2)
+    j = np.clip(np.floor(fj).astype(int), 0, len(axis_lon) - 2)
+    dy, dx = np.clip(fi - i, 0, 1), np.clip(fj - j, 0, 1)
+
+    n_lon = len(axis_lon)
+    idx = np.stack([i * n_lon + j, i * n_lon + j + 1, (i + 1) * n_lon + j, (i + 1) * n_lon + j + 1], axis=1)
+    w = np.stack([(1 - dy) * (1 - dx), (1 - dy) * dx, dy * (1 - dx), dy * dx], axis=1)
+    return idx, w
+
+
+def interpolate(values, idx, w):
+    """Lattice values (..., points) -> (..., targets); missing lattice values drop out of the weights."""
+    corner = values[..., idx]                     # (..., targets, 4)
+    ok = ~np.isnan(corner)
+    w = w + 1e-9  # a target on a missing node falls back to the mean of its other corners
+    num = (np.where(ok, corner, 0) * w).sum(axis=-1)
+    den = (ok * w).sum(axis=-1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return (num / den).astype(np.float32)
+
+
+def model_run_tag(now=None, cycle_hours=6):
+    """Latest forecast cycle (UTC) — responses fetched within one cycle share a cache entry."""
+    now = now or datetime.now(timezone.utc)
+    return now.replace(hour=now.hour - now.hour % cycle_hours, minute=0, second=0, microsecond=0).strftime('%Y%m%dT%H')
+
+
+class OpenMeteoLatticeProvider(WeatherProvider):
+    """Open-Meteo forecasts on a coarse lattice, bilinearly interpolated to every cell.
+
+    The lattice (0.5° by default, 121 points over Utah) is requested with
+    Open-Meteo's comma-separated multi-coordinate query in chunks. Each
+    chunk's response is cached on disk under the current model-run tag, so
+    all forecasts in one cycle reuse it. Interpolation weights per target
+    grid are computed once and reused.
+    """
+    name = 'open-meteo-lattice'
+    CACHE_DIR = os.path.join('cache', 'open_meteo')
+
+    def __init__(self, step=0.5, chunk_size=50, base_url=OPEN_METEO_URL, cache_dir=CACHE_DIR,
+                 cycle_hours=6, keep_runs=4, timeout=30):
+        self.axis_lat, self.axis_lon = lattice_axes(step)
+        grid_lat, grid_lon = np.meshgrid(self.axis_lat, self.axis_lon, indexing='ij')
+        self.points = np.column_stack([grid_lat.ravel(), grid_lon.ravel()])
+        self.chunk_size = chunk_size
+        self.base_url = base_url
+        self.cache_dir = cache_dir
+        self.cycle_hours = cycle_hours
+        self.keep_runs = keep_runs
+        self.timeout = timeout
+        self.requests_made = 0
+        self._weights = {}
+
+    def _weights_for(self, lats, lons):
+        lats, lons = np.asarray(lats, dtype=float), np.asarray(lons, dtype=float)
+        key = hashlib.sha1(lats.tobytes() + lons.tobytes()).hexdigest()
+        if key not in self._weights:
+            self._weights[key] = bilinear_weights(self.axis_lat, self.axis_lon, lats, lons)
+        return self._weights[key]
+
+    def _fetch_chunk(self, points, params, run_dir):
+        query = {
+            'latitude': ','.join(f"{lat:g}" for lat in points[:, 0]),
+            'longitude': ','.join(f"{lon:g}" for lon in points[:, 1]),
+            'daily': ','.join(OPEN_METEO_DAILY.values()),
+            'timezone': 'America/Denver',
+            **params
+        }
+        key = hashlib.sha1(json.dumps({'url': self.base_url, **query}, sort_keys=True).encode()).hexdigest()[:16]
+        path = os.path.join(run_dir, f"{key}.json")
+        if os.path.exists(path):
+            with open(path) as f:
+                return json.load(f)
+
+        r = requests.get(self.base_url, params=query, timeout=self.timeout)
+        r.raise_for_status()
+        self.requests_made += 1
+        data = r.json()
+        data = data if isinstance(data, list) else [data]  # single-coordinate responses aren't wrapped
+
+        os.makedirs(run_dir, exist_ok=True)
+        tmp = f"{path}.tmp-{os.getpid()}"
+        with open(tmp, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp, path)
+        return data
+
+    def _prune_runs(self):
+        if not os.path.isdir(self.cache_dir):
+            return
+        runs = sorted(os.listdir(self.cache_dir))
+        for run in runs[:-self.keep_runs]:
+            shutil.rmtree(os.path.join(self.cache_dir, run), ignore_errors=True)
+
+    def lattice_forecast(self, params):
+        """(dates, {var: (days, lattice points)}) for one set of date params."""
+        run_dir = os.path.join(self.cache_dir, model_run_tag(cycle_hours=self.cycle_hours))
+        results = []
+        for start in range(0, len(self.points), self.chunk_size):
+            results.extend(self._fetch_chunk(self.points[start:start + self.chunk_size], params, run_dir))
+        self._prune_runs()
+
+        dates = [datetime.strptime(t, '%Y-%m-%d').date() for t in results[0]['daily']['time']]
+        values = {
+            var: np.array([[np.nan if v is None else v for v in res['daily'][om_var]] for res in results],
+                          dtype=float).T
+            for var, om_var in OPEN_METEO_DAILY.items()
+        }
+        return dates, values
+
+    def forecast(self, lats, lons, n_days, start=None):
+        params = {'forecast_days': n_days} if start is None else {
+            'start_date': start.isoformat(), 'end_date': (start + timedelta(days=n_days - 1)).isoformat()
+        }
+        dates, values = self.lattice_forecast(params)
+        idx, w = self._weights_for(lats, lons)
+        return dates, {var: interpolate(v, idx, w) for var, v in values.items()}
+
+    def daily(self, day, lats, lons):
+        _, weather = self.forecast(lats, lons, 1, start=day)
+        return {var: v[0] for var, v in weather.items()}
+
+
+# ================= NOAA CUBE PROVIDER =================
+class NoaaCubeProvider(WeatherProvider):
+    """Historical weather from the NOAA station cube (backtests / replaying past days).
+
+    Stations don't report humidity, so rh is the same 50% placeholder training uses.
+    """
+    name = 'noaa-cube'
+
+    def __init__(self, cube_dir=None):
+        from weather_cube import CUBE_DIR, WeatherCube
+        self.cube = WeatherCube(cube_dir or CUBE_DIR)
+
+    def daily(self, day, lats, lons):
+        cell_id = cell_id_from_latlon(lats, lons)
+        day_id = np.full(len(cell_id), (day - EPOCH_START).days)
+        day_id[cell_id < 0] = -1  # outside the grid -> NaN
+        tavg, prcp = self.cube.training_weather(day_id, cell_id)
+        return {
+            'tavg': tavg.astype(np.float32),
+            'rh': np.full(len(cell_id), 50.0, dtype=np.float32),
+            'wspd': self.cube.lookup('AWND', day_id, cell_id),
+            'prcp': prcp.astype(np.float32)
+        }
+
+
+PROVIDERS = {
+    OpenMeteoPointProvider.name: OpenMeteoPointProvider,
+    OpenMeteoLatticeProvider.name: OpenMeteoLatticeProvider,
+    StubProvider.name: StubProvider,
+    NoaaCubeProvider.name: NoaaCubeProvider
+}
+
+
+def get_provider(name, **kwargs):
+    if name not in PROVIDERS:
+        raise ValueError(f"Unknown weather provider '{name}' (choose from {', '.join(PROVIDERS)})")
+    return PROVIDERS[name](**kwargs)
+
+
+if __name__ == "__main__":
+    lats, lons = np.array([40.5, 38.0]), np.array([-111.9, -113.0])
+    print(get_provider('stub').daily(date.today(), lats, lons))
@@ -1,3 +1,4 @@
+import argparse
 import duckdb
 import pandas as pd
 import numpy as np
@@ -7,36 +8,86 @@ from sklearn.metrics import accuracy_score, roc_auc_score, classification_report
 import shap
 import matplotlib.pyplot as plt
 
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scripts'))
+from features import FEATURES
+from training_data import derive_features
+import feature_cache
+from sampling import SAMPLING_SEED, sample_training_rows
+from weather_cube import open_cube
+from shap_engine import explain_sample, importance
+
+parser = argparse.ArgumentParser(description="Train the daily ignition classifier (10M-row subset)")
+parser.add_argument('--no-cache', action='store_true',
+                    help="rebuild the feature matrix even if a cached copy exists")
+parser.add_argument('--neg-fraction', type=float, default=1.0,
+                    help="keep this fraction of non-ignition training rows per (month, cell), "
+                         "re-weighted to the full data (1.0 = no sampling)")
+args = parser.parse_args()
+
 print("=== TRAINING DAILY IGNITION CLASSIFIER (UTAH GRID) ===")
 
 con = duckdb.connect('eco_pyric.duckdb')
+cube = open_cube()  # NOAA weather cube, or None -> placeholders
 
-df = con.execute("""
-SELECT grid_lat, grid_lon, date, ignition, dist_to_road_km
+query = """
+SELECT cell_id, day_id, ignition, dist_to_road_km
 FROM utah_grid_ignition_labels_proximity
 LIMIT 10000000  -- 10M rows - your latest run
-""").fetchdf()
+"""
+features = FEATURES
+split_seed = 42
+
+# Assembled matrices are cached on disk, keyed by the source rows, feature list and split seed
+key = feature_cache.cache_key(feature_cache.source_fingerprint(con, query), features, split_seed, test_size=0.2,
+                              neg_fraction=args.neg_fraction, sampling_seed=SAMPLING_SEED,
+                              weather=cube.fingerprint if cube is not None else None)
+cached, meta = (None, None) if args.no_cache else feature_cache.load_matrices(key)
+
+if cached is not None:
+    print(f"Opened cached feature matrix {key} (mmap)")
+    X_train = pd.DataFrame(cached['X_train'], columns=features, copy=False)
+    X_test = pd.DataFrame(cached['X_test'], columns=features, copy=False)
+    y_train = pd.Series(cached['y_train'], name='ignition', copy=False)
+    y_test = pd.Series(cached['y_test'], name='ignition', copy=False)
+    w_train = cached.get('w_train')
+    scale_pos_weight = meta['scale_pos_weight']
+else:
+    df = con.execute(query).fetchdf()
+
+    print(f"Loaded {len(df):,} grid-date rows for training")
+
+    # Decode compact cell/day ids + add dryness proxies (shared registry, scripts/features.py)
+    X = pd.DataFrame(derive_features(df['cell_id'].values, df['day_id'].values,
+                                     df['dist_to_road_km'].values, cube), columns=features)
+    y = df['ignition'].astype(np.int8)
+    ids = df[['cell_id', 'day_id']]
 
-print(f"Loaded {len(df):,} grid-date rows for training")
+    X_train, X_test, y_train, y_test, ids_train, _ = train_test_split(X, y, ids, test_size=0.2, random_state=split_seed)
 
-# Add dryness proxies
-df['month'] = pd.to_datetime(df['date']).dt.month
-df['tavg'] = 10  # Placeholder - replace with real forecast avg
-df['prcp'] = 0   # Placeholder
-df['vpd_proxy'] = 0.6108 * np.exp(17.27 * df['tavg'] / (df['tavg'] + 237.3)) * (1 - 50 / 100)
-df['vpd_proxy'] = df['vpd_proxy'].clip(lower=0)
-df['dryness_proxy'] = (df['tavg'] - (df['tavg'] - 10)) / 10
-df['low_precip_dryness'] = np.where(df['prcp'] < 1, 1.0, 0.5)
+    scale_pos_weight = (y == 0).sum() / (y == 1).sum()
 
-features = ['dist_to_road_km', 'month', 'vpd_proxy', 'dryness_proxy', 'low_precip_dryness', 'grid_lat', 'grid_lon']
-X = df[features]
-y = df['ignition']
+    arrays = {}
+    meta = {'features': features, 'split_seed': split_seed, 'scale_pos_weight': float(scale_pos_weight),
+            'query': query}
+    w_train = None
+    if args.neg_fraction < 1:
+        # Keep every ignition, downsample non-ignitions per (month, cell), weight back to full data
+        X_train, y_train, w_train, sampler = sample_training_rows(
+            X_train, y_train, ids_train['cell_id'].values, ids_train['day_id'].values, args.neg_fraction
+        )
+        arrays['w_train'] = w_train
+        meta['sampling'] = sampler.summary()
+        print(f"Sampling: {meta['sampling']}")
 
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    arrays.update({'X_train': X_train.values, 'y_train': y_train.values,
+                   'X_test': X_test.values, 'y_test': y_test.values})
+    feature_cache.save_matrices(key, arrays, meta=meta)
+    print(f"Cached feature matrix as {key}")
 
-scale_pos_weight = (y == 0).sum() / (y == 1).sum()
 model = XGBClassifier(n_estimators=200, learning_rate=0.05, max_depth=7, scale_pos_weight=scale_pos_weight, random_state=42)
-model.fit(X_train, y_train)
+model.fit(X_train, y_train, sample_weight=w_train)
 
 y_pred = model.predict(X_test)
 y_pred_proba = model.predict_proba(X_test)[:, 1]
@@ -53,11 +104,14 @@ print(classification_report(y_test, y_pred))
 print("\nConfusion Matrix:")
 print(confusion_matrix(y_test, y_pred))
 
-# SHAP
-explainer = shap.Explainer(model)
-shap_values = explainer(X_test)
+# SHAP on a stratified test sample (label x month) instead of the whole split; values are
+# stored per model version under cache/shap/ (scripts/shap_engine.py)
+shap_arrays, shap_meta = explain_sample(model, X_test, y_test, strata=X_test['month'])
+print(f"SHAP values for {len(shap_arrays['X']):,} of {len(X_test):,} test rows")
+print(f"Mean |SHAP| (population-weighted):\n{importance(shap_arrays, shap_meta).round(4).to_string()}")
 
-shap.summary_plot(shap_values, X_test, show=False)
+shap.summary_plot(np.asarray(shap_arrays['shap_values']), pd.DataFrame(shap_arrays['X'], columns=features),
+                  show=False)
 plt.savefig("plots/shap_summary_classifier.png", dpi=150, bbox_inches='tight')
 print("Saved SHAP summary: plots/shap_summary_classifier.png")
 
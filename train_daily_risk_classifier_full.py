@@ -1,9 +1,11 @@
 # scripts/train_daily_risk_classifier_full.py
+import argparse
 import duckdb
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 from sklearn.model_selection import train_test_split
+import xgboost as xgb
 from xgboost import XGBClassifier
 from sklearn.metrics import accuracy_score, roc_auc_score, classification_report, confusion_matrix
 import shap
@@ -12,6 +14,34 @@ import time
 import psutil
 from joblib import dump
 
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scripts'))
+from utah_grid import N_CELLS
+from training_data import (
+    FEATURES, BATCH_ROWS, SPLIT_SEED, TEST_FRACTION, GridBatchIter, derive_features, iter_batches, split_hash
+)
+from perf_utils import peak_rss_mb
+import feature_cache
+from sampling import SAMPLING_SEED, NegativeSampler, sample_training_rows
+from weather_cube import open_cube
+from label_cube import open_label_cube
+from shap_engine import explain_sample, importance, top_interactions
+
+SHAP_CANDIDATES = 100000  # --stream: test rows held back for the stratified SHAP sample
+
+parser = argparse.ArgumentParser(description="Train the daily ignition classifier on the full Utah grid")
+parser.add_argument('--stream', action='store_true',
+                    help="out-of-core mode: feed XGBoost from DuckDB Arrow batches, never hold the full frame")
+parser.add_argument('--batch-rows', type=int, default=BATCH_ROWS,
+                    help="rows per Arrow record batch in --stream mode")
+parser.add_argument('--no-cache', action='store_true',
+                    help="rebuild the in-memory feature matrix even if a cached copy exists")
+parser.add_argument('--neg-fraction', type=float, default=1.0,
+                    help="keep this fraction of non-ignition training rows per (month, cell), "
+                         "re-weighted to the full data (1.0 = no sampling)")
+args = parser.parse_args()
+
 print("=== TRAINING DAILY IGNITION CLASSIFIER – FULL GRID ===")
 print(f"Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
 
@@ -20,62 +50,171 @@ start_mem = psutil.Process().memory_info().rss / 1024**2  # MB
 
 con = duckdb.connect('eco_pyric.duckdb')
 
-print("Loading FULL grid data... (13.5M rows — may take several minutes)")
-df = con.execute("""
-SELECT grid_lat, grid_lon, date, ignition, dist_to_road_km
-FROM utah_grid_ignition_labels_proximity
-""").fetchdf()
-
-load_time = time.time() - start_time
-print(f"Loaded {len(df):,} rows in {load_time:.1f} seconds")
-print(f"Memory usage after loading: {psutil.Process().memory_info().rss / 1024**2:.1f} MB")
-
-# Add dryness proxies
-df['month'] = pd.to_datetime(df['date']).dt.month
-df['tavg'] = 10   # Placeholder — replace with real forecast avg if available
-df['prcp'] = 0    # Placeholder
-df['vpd_proxy'] = 0.6108 * np.exp(17.27 * df['tavg'] / (df['tavg'] + 237.3)) * (1 - 50 / 100)
-df['vpd_proxy'] = df['vpd_proxy'].clip(lower=0)
-df['dryness_proxy'] = (df['tavg'] - (df['tavg'] - 10)) / 10
-df['low_precip_dryness'] = np.where(df['prcp'] < 1, 1.0, 0.5)
-
-features = [
-    'dist_to_road_km',
-    'month',
-    'vpd_proxy',
-    'dryness_proxy',
-    'low_precip_dryness',
-    'grid_lat',
-    'grid_lon'
-]
-
-X = df[features]
-y = df['ignition']
-
-print("Splitting data...")
-X_train, X_test, y_train, y_test = train_test_split(
-    X, y, test_size=0.2, random_state=42, stratify=y
-)
+# NOAA weather cube (scripts/build_weather_cube.py); placeholders are used until it's built
+cube = open_cube()
+print(f"Weather: {'NOAA cube ' + cube.fingerprint if cube is not None else 'placeholders (tavg=10, prcp=0)'}")
 
-scale_pos_weight = (y == 0).sum() / (y == 1).sum()
-print(f"Scale pos weight: {scale_pos_weight:.2f}")
-
-model = XGBClassifier(
-    n_estimators=200,
-    learning_rate=0.05,
-    max_depth=7,
-    scale_pos_weight=scale_pos_weight,
-    random_state=42,
-    tree_method='hist',         # Much faster on large data
-    enable_categorical=False
-)
+if args.stream:
+    print(f"Streaming FULL grid data from DuckDB in {args.batch_rows:,}-row Arrow batches...")
+    n_rows, n_pos, first_day = con.execute("""
+    SELECT COUNT(*), SUM(ignition), MIN(day_id)
+    FROM utah_grid_ignition_labels_proximity
+    """).fetchone()
+
+    scale_pos_weight = (n_rows - n_pos) / n_pos
+    print(f"Scale pos weight: {scale_pos_weight:.2f}")
+
+    sampler = None
+    if args.neg_fraction < 1:
+        # Counting pass (ids only) so every kept negative gets its stratum's realized rate
+        print(f"Counting negatives per (month, cell) for {args.neg_fraction:.3f} downsampling...")
+        sampler = NegativeSampler(args.neg_fraction)
+        labels = open_label_cube()
+        if (labels is not None and labels.first_day == first_day and labels.n_days * N_CELLS == n_rows
+                and labels.n_ignitions() == n_pos):
+            sampler.count_cube(labels)  # ids straight from the bit-packed labels, no DuckDB pass
+        else:
+            for _, y_batch, cell_id, day_id, _ in iter_batches(con, subset='train', batch_rows=args.batch_rows,
+                                                               with_features=False):
+                sampler.count(y_batch, cell_id, day_id)
+        print(f"Sampling: {sampler.summary()}")
+
+    # Train/test split is a deterministic hash of (cell_id, day_id), applied per batch
+    print("Building QuantileDMatrix from training batches...")
+    dtrain = xgb.QuantileDMatrix(GridBatchIter(con, 'train', batch_rows=args.batch_rows, sampler=sampler, cube=cube),
+                                 max_bin=256)
+
+    load_time = time.time() - start_time
+    print(f"Quantized {dtrain.num_row():,} training rows in {load_time:.1f} seconds")
+    print(f"Memory usage after loading: {psutil.Process().memory_info().rss / 1024**2:.1f} MB "
+          f"(peak RSS {peak_rss_mb():.1f} MB)")
+
+    params = {
+        'objective': 'binary:logistic',
+        'eta': 0.05,
+        'max_depth': 7,
+        'scale_pos_weight': scale_pos_weight,
+        'seed': 42,
+        'tree_method': 'hist'
+    }
+
+    print("Training model...")
+    booster = xgb.train(params, dtrain, num_boost_round=200)
+    del dtrain
+
+    # Wrap the booster so the saved model keeps the XGBClassifier / predict_proba interface
+    model = XGBClassifier()
+    model.load_model(bytearray(booster.save_raw('json')))
+
+    print("Evaluating on streamed test split...")
+    y_parts, proba_parts, shap_parts, shap_y_parts = [], [], [], []
+    shap_rate = SHAP_CANDIDATES / (n_rows * TEST_FRACTION)
+    for X_batch, y_batch, cell_id, day_id, _ in iter_batches(con, subset='test', batch_rows=args.batch_rows,
+                                                             cube=cube):
+        y_parts.append(y_batch.astype(np.int8))
+        proba_parts.append(booster.inplace_predict(X_batch))
+        # Fixed SHAP candidate pool, chosen by an independent hash of (cell_id, day_id)
+        in_pool = split_hash(cell_id, day_id, SPLIT_SEED + 1) < shap_rate
+        shap_parts.append(X_batch[in_pool])
+        shap_y_parts.append(y_batch[in_pool].astype(np.int8))
 
-print("Training model... (this may take 20–90 minutes on 13.5M rows)")
-model.fit(X_train, y_train)
+    y_test = np.concatenate(y_parts)
+    y_pred_proba = np.concatenate(proba_parts)
+    y_pred = (y_pred_proba > 0.5).astype(int)
+    X_shap = pd.DataFrame(np.concatenate(shap_parts), columns=FEATURES)
+    y_shap = np.concatenate(shap_y_parts)
+else:
+    query = """
+    SELECT cell_id, day_id, ignition, dist_to_road_km
+    FROM utah_grid_ignition_labels_proximity
+    """
+    features = FEATURES
+    split_seed = 42
 
-print("Evaluating...")
-y_pred = model.predict(X_test)
-y_pred_proba = model.predict_proba(X_test)[:, 1]
+    # Assembled matrices are cached on disk, keyed by the source rows, feature list and split seed
+    key = feature_cache.cache_key(feature_cache.source_fingerprint(con, query), features, split_seed,
+                                  test_size=0.2, stratify=True,
+                                  neg_fraction=args.neg_fraction, sampling_seed=SAMPLING_SEED,
+                                  weather=cube.fingerprint if cube is not None else None)
+    cached, meta = (None, None) if args.no_cache else feature_cache.load_matrices(key)
+
+    if cached is not None:
+        X_train = pd.DataFrame(cached['X_train'], columns=features, copy=False)
+        X_test = pd.DataFrame(cached['X_test'], columns=features, copy=False)
+        y_train = pd.Series(cached['y_train'], name='ignition', copy=False)
+        y_test = pd.Series(cached['y_test'], name='ignition', copy=False)
+        w_train = cached.get('w_train')
+        scale_pos_weight = meta['scale_pos_weight']
+        sampler = None
+        if 'neg_counts' in cached:
+            sampler = NegativeSampler(args.neg_fraction)
+            sampler.n_pos = meta['sampling']['positives']
+            sampler.n_neg, sampler.n_below = np.array(cached['neg_counts']), np.array(cached['neg_below'])
+            sampler.min_u = np.array(cached['neg_min_u'])
+
+        load_time = time.time() - start_time
+        print(f"Opened cached feature matrix {key} (mmap) in {load_time:.1f} seconds")
+    else:
+        print("Loading FULL grid data... (13.5M rows — may take several minutes)")
+        df = con.execute(query).fetchdf()
+
+        load_time = time.time() - start_time
+        print(f"Loaded {len(df):,} rows in {load_time:.1f} seconds")
+        print(f"Memory usage after loading: {psutil.Process().memory_info().rss / 1024**2:.1f} MB")
+
+        # Decode compact cell/day ids + add dryness proxies (shared registry, scripts/features.py)
+        X = pd.DataFrame(derive_features(df['cell_id'].values, df['day_id'].values,
+                                         df['dist_to_road_km'].values, cube), columns=features)
+        y = df['ignition'].astype(np.int8)
+        ids = df[['cell_id', 'day_id']]
+        del df
+
+        print("Splitting data...")
+        X_train, X_test, y_train, y_test, ids_train, _ = train_test_split(
+            X, y, ids, test_size=0.2, random_state=split_seed, stratify=y
+        )
+
+        scale_pos_weight = (y == 0).sum() / (y == 1).sum()
+
+        arrays = {}
+        meta = {'features': features, 'split_seed': split_seed, 'scale_pos_weight': float(scale_pos_weight),
+                'query': query}
+        w_train, sampler = None, None
+        if args.neg_fraction < 1:
+            X_train, y_train, w_train, sampler = sample_training_rows(
+                X_train, y_train, ids_train['cell_id'].values, ids_train['day_id'].values, args.neg_fraction
+            )
+            arrays.update({'w_train': w_train, 'neg_counts': sampler.n_neg,
+                           'neg_below': sampler.n_below, 'neg_min_u': sampler.min_u})
+            meta['sampling'] = sampler.summary()
+
+        arrays.update({'X_train': X_train.values, 'y_train': y_train.values,
+                       'X_test': X_test.values, 'y_test': y_test.values})
+        feature_cache.save_matrices(key, arrays, meta=meta)
+        print(f"Cached feature matrix as {key}")
+
+    print(f"Scale pos weight: {scale_pos_weight:.2f}")
+    if sampler is not None:
+        print(f"Sampling: {sampler.summary()}")
+        print(f"Training on {len(y_train):,} sampled rows")
+
+    model = XGBClassifier(
+        n_estimators=200,
+        learning_rate=0.05,
+        max_depth=7,
+        scale_pos_weight=scale_pos_weight,
+        random_state=42,
+        tree_method='hist',         # Much faster on large data
+        enable_categorical=False
+    )
+
+    print("Training model... (this may take 20–90 minutes on 13.5M rows)")
+    model.fit(X_train, y_train, sample_weight=w_train)
+
+    print("Evaluating...")
+    y_pred = model.predict(X_test)
+    y_pred_proba = model.predict_proba(X_test)[:, 1]
+    X_shap, y_shap = X_test, y_test
 
 acc = accuracy_score(y_test, y_pred)
 auc = roc_auc_score(y_test, y_pred_proba)
@@ -89,12 +228,19 @@ print(classification_report(y_test, y_pred))
 print("\nConfusion Matrix:")
 print(confusion_matrix(y_test, y_pred))
 
-# SHAP on a small subset to save time/memory
-print("Generating SHAP summary (on 10k test samples)...")
-explainer = shap.Explainer(model)
-shap_values = explainer(X_test.sample(10000, random_state=42))
+# SHAP on a stratified test sample (label x month), explained across a process pool and
+# stored next to the model per model version (scripts/shap_engine.py)
+print(f"Generating SHAP summary (stratified sample from {len(X_shap):,} test rows)...")
+shap_start = time.time()
+shap_arrays, shap_meta = explain_sample(model, X_shap, y_shap, strata=X_shap['month'],
+                                        model_path='risk_classifier_model.joblib')
+print(f"SHAP values for {len(shap_arrays['X']):,} rows, interaction values for "
+      f"{len(shap_arrays['interaction_rows']):,} in {time.time() - shap_start:.1f} seconds")
+print(f"Mean |SHAP| (population-weighted):\n{importance(shap_arrays, shap_meta).round(4).to_string()}")
+print(f"Strongest interactions:\n{top_interactions(shap_arrays, shap_meta).round(4).to_string()}")
 
-shap.summary_plot(shap_values, X_test.sample(10000, random_state=42), show=False)
+shap.summary_plot(np.asarray(shap_arrays['shap_values']), pd.DataFrame(shap_arrays['X'], columns=FEATURES),
+                  show=False)
 plt.savefig("plots/shap_summary_classifier_full.png", dpi=150, bbox_inches='tight')
 print("Saved SHAP summary: plots/shap_summary_classifier_full.png")
 
@@ -102,10 +248,16 @@ print("Saved SHAP summary: plots/shap_summary_classifier_full.png")
 dump(model, 'risk_classifier_model.joblib')
 print("Trained model saved as 'risk_classifier_model.joblib'")
 
+if sampler is not None:
+    # Record the sampling rates behind the instance weights next to the model
+    sampler.save('risk_classifier_model.sampling.json')
+    print("Sampling rates saved as 'risk_classifier_model.sampling.json'")
+
 con.close()
 
 end_time = time.time()
 end_mem = psutil.Process().memory_info().rss / 1024**2
 print(f"Training finished in {end_time - start_time:.1f} seconds")
 print(f"Peak memory usage: {end_mem - start_mem:.1f} MB")
-print("Done!")
\ No newline at end of file
+print(f"Peak RSS: {peak_rss_mb():.1f} MB")
+print("Done!")